@@ -0,0 +1,386 @@
+"""
+TranslatorUKR 1.0 - Мікробенчмарк розбору рядків (без запитів до API)
+
+Порівнює швидкість класифікації рядків до (каскад re.match з рядковими патернами)
+і після (скомпільований класифікатор translator_core) на тих самих даних.
+
+Приклади:
+    python benchmarks/parse_benchmark.py
+    python benchmarks/parse_benchmark.py --lines 200000 --repeat 5
+    python benchmarks/parse_benchmark.py --file game/Localization/ui.po
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from translator_core import is_timestamp, is_code_line, extract_translatable_text, extract_placeholders
+
+
+# ============ ПОПЕРЕДНЯ РЕАЛІЗАЦІЯ (для порівняння) ============
+
+def legacy_is_timestamp(line):
+    """Перевірка чи рядок є таймстампом (для субтитрів)"""
+    # SRT timestamp pattern: 00:00:00,000 --> 00:00:00,000
+    pattern = r'^\d{2}:\d{2}:\d{2}[,\.]\d{3}\s*-->\s*\d{2}:\d{2}:\d{2}[,\.]\d{3}$'
+    return bool(re.match(pattern, line.strip()))
+
+
+def legacy_is_code_line(line):
+    """Перевірка чи рядок є кодом/технічним рядком (не перекладати)"""
+    stripped = line.strip()
+    
+    # Порожній рядок
+    if not stripped:
+        return True
+    
+    # Тільки числа
+    if stripped.isdigit():
+        return True
+    
+    # Блок коду markdown (```)
+    if stripped.startswith('```'):
+        return True
+    
+    # Теги [SPEAKER: ...], [CHARACTER: ...] тощо
+    if re.match(r'^\[[A-Z_]+:\s*[^\]]+\]$', stripped):
+        return True
+    
+    # Коментарі (різні формати)
+    if stripped.startswith('//') or stripped.startswith('/*') or stripped.startswith('*/'):
+        return True
+    if stripped.startswith('#') and not stripped.startswith('##'):
+        return True
+    if stripped.startswith('--') and not stripped.startswith('---'):
+        return True
+    if stripped.startswith(';') or stripped.startswith('<!--') or stripped.startswith('-->'):
+        return True
+    
+    # Чисто структурні символи JSON/XML/Python
+    if stripped in ['{', '}', '[', ']', ',', '};', '},', '];', '],', '(', ')', '):']:
+        return True
+    
+    # JSON/Python структурні рядки
+    # Список/масив: dialogue_data = [
+    if re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*\s*=\s*[\[\{]$', stripped):
+        return True
+    
+    # Булеві/None значення в JSON/Python
+    if re.match(r'^["\']?is_code["\']?\s*:\s*(True|False|true|false),?$', stripped, re.IGNORECASE):
+        return True
+    if re.match(r'^["\']?[a-zA-Z_]+["\']?\s*:\s*(True|False|true|false|None|null|\d+),?$', stripped, re.IGNORECASE):
+        return True
+    
+    # Закриваючі/самозакриваючі теги XML
+    if re.match(r'^<\/[^>]+>$', stripped) or re.match(r'^<[^>]+\/>$', stripped):
+        return True
+    
+    # Відкриваючий тег без тексту
+    if re.match(r'^<[a-zA-Z_][^>]*>$', stripped) and '>' not in stripped[1:-1]:
+        return True
+    
+    return False
+
+
+def legacy_extract_translatable_text(line):
+    """
+    Витягує текст для перекладу зі збереженням структури.
+    Повертає: (prefix, text_to_translate, suffix, placeholders)
+    """
+    # Зберігаємо початкові пробіли/відступи
+    leading_spaces = len(line) - len(line.lstrip())
+    indent = line[:leading_spaces]
+    stripped = line.strip()
+    
+    # === Формат KEY { text } (Unreal, деякі ігрові движки) ===
+    # Текст може містити будь-які символи крім закриваючої дужки
+    key_brace_match = re.match(r'^([a-zA-Z_][a-zA-Z0-9_]*)\s*\{\s*(.+)\s*\}$', stripped, re.DOTALL)
+    if key_brace_match:
+        key, value = key_brace_match.groups()
+        value = value.strip()
+        if value:
+            prefix = f'{indent}{key} {{ '
+            suffix = ' }'
+            placeholders = legacy_extract_placeholders(value)
+            return prefix, value, suffix, placeholders
+    
+    # === Формат тільки { text } без ключа ===
+    brace_only_match = re.match(r'^\{\s*(.+)\s*\}$', stripped, re.DOTALL)
+    if brace_only_match:
+        value = brace_only_match.group(1).strip()
+        if value:
+            prefix = f'{indent}{{ '
+            suffix = ' }'
+            placeholders = legacy_extract_placeholders(value)
+            return prefix, value, suffix, placeholders
+    
+    # === JSON формат: "key": "value" ===
+    # Шукаємо патерн "ключ": "значення" або 'ключ': 'значення'
+    json_match = re.match(r'^(["\'])([^"\']+)\1\s*:\s*(["\'])(.*)(\3)\s*(,?)$', stripped)
+    if json_match:
+        key_quote, key, val_quote, value, _, comma = json_match.groups()
+        
+        # Список ключів які НЕ перекладаємо (системні ключі)
+        skip_keys = ['speaker', 'id', 'key', 'name', 'type', 'class', 'tag', 'is_code', 
+                     'code', 'script', 'function', 'method', 'variable', 'path', 'file',
+                     'icon', 'image', 'sound', 'audio', 'animation', 'sprite', 'texture']
+        
+        # Якщо ключ системний - не перекладаємо значення
+        if key.lower() in skip_keys:
+            return indent, "", "", []
+        
+        # Перекладаємо тільки VALUE якщо це текстовий контент
+        # (message, text, description, title, label, hint, tooltip, dialogue, etc.)
+        translatable_keys = ['message', 'text', 'description', 'title', 'label', 'hint',
+                             'tooltip', 'dialogue', 'dialog', 'content', 'body', 'value',
+                             'caption', 'placeholder', 'button', 'option', 'choice',
+                             'question', 'answer', 'reply', 'response', 'note', 'warning',
+                             'error', 'success', 'info', 'help', 'about', 'summary']
+        
+        if value.strip() and key.lower() in translatable_keys:
+            prefix = f'{indent}{key_quote}{key}{key_quote}: {val_quote}'
+            suffix = f'{val_quote}{comma}'
+            placeholders = legacy_extract_placeholders(value)
+            return prefix, value, suffix, placeholders
+        
+        return indent, "", "", []  # Ключ не в списку - не перекладаємо
+    
+    # === JSON просте значення: "value" або "value", ===
+    json_simple = re.match(r'^(["\'])(.+)\1\s*(,?)$', stripped)
+    if json_simple:
+        quote, value, comma = json_simple.groups()
+        # Перевіряємо чи це не ключ (немає двокрапки далі - це значення)
+        if value.strip():
+            prefix = f'{indent}{quote}'
+            suffix = f'{quote}{comma}'
+            placeholders = legacy_extract_placeholders(value)
+            return prefix, value, suffix, placeholders
+    
+    # === XML формат: <tag attr="x">text</tag> ===
+    xml_match = re.match(r'^(<[^>]+>)(.+)(<\/[^>]+>)$', stripped)
+    if xml_match:
+        open_tag, content, close_tag = xml_match.groups()
+        if content.strip():
+            prefix = f'{indent}{open_tag}'
+            suffix = close_tag
+            placeholders = legacy_extract_placeholders(content)
+            return prefix, content, suffix, placeholders
+    
+    # === INI формат: key=value ===
+    ini_match = re.match(r'^([a-zA-Z_][a-zA-Z0-9_\.]*)\s*=\s*(.+)$', stripped)
+    if ini_match:
+        key, value = ini_match.groups()
+        # Перевіряємо чи значення не є числом або булевим
+        if not re.match(r'^-?\d+\.?\d*$', value) and value.lower() not in ['true', 'false', 'yes', 'no', 'null', 'none']:
+            # Видаляємо лапки якщо є
+            if (value.startswith('"') and value.endswith('"')) or (value.startswith("'") and value.endswith("'")):
+                inner_value = value[1:-1]
+                prefix = f'{indent}{key}={value[0]}'
+                suffix = value[-1]
+            else:
+                inner_value = value
+                prefix = f'{indent}{key}='
+                suffix = ''
+            placeholders = legacy_extract_placeholders(inner_value)
+            return prefix, inner_value, suffix, placeholders
+    
+    # === YAML формат: key: value або key: "value" ===
+    yaml_match = re.match(r'^([a-zA-Z_][a-zA-Z0-9_\-]*)\s*:\s*(.+)$', stripped)
+    if yaml_match:
+        key, value = yaml_match.groups()
+        # Пропускаємо якщо значення - список або об'єкт
+        if not value.startswith('[') and not value.startswith('{'):
+            # Видаляємо лапки
+            if (value.startswith('"') and value.endswith('"')) or (value.startswith("'") and value.endswith("'")):
+                inner_value = value[1:-1]
+                prefix = f'{indent}{key}: {value[0]}'
+                suffix = value[-1]
+            else:
+                inner_value = value
+                prefix = f'{indent}{key}: '
+                suffix = ''
+            # Пропускаємо числа та булеві
+            if not re.match(r'^-?\d+\.?\d*$', inner_value) and inner_value.lower() not in ['true', 'false', 'yes', 'no', 'null', '~']:
+                placeholders = legacy_extract_placeholders(inner_value)
+                return prefix, inner_value, suffix, placeholders
+    
+    # === Lua формат: ["key"] = "value" або key = "value" ===
+    lua_match = re.match(r'^(\[?["\']?[^\]"\']+["\']?\]?\s*=\s*)(["\'])(.*)(\2)\s*(,?)$', stripped)
+    if lua_match:
+        key_part, quote, value, _, comma = lua_match.groups()
+        if value.strip():
+            prefix = f'{indent}{key_part}{quote}'
+            suffix = f'{quote}{comma}'
+            placeholders = legacy_extract_placeholders(value)
+            return prefix, value, suffix, placeholders
+    
+    # === PO/POT формат: msgstr "text" ===
+    po_match = re.match(r'^(msgstr\s+)(["\'])(.*)(\2)$', stripped)
+    if po_match:
+        prefix_part, quote, value, _ = po_match.groups()
+        if value.strip():
+            prefix = f'{indent}{prefix_part}{quote}'
+            suffix = quote
+            placeholders = legacy_extract_placeholders(value)
+            return prefix, value, suffix, placeholders
+    
+    # === CSV формат (спрощено) - текст в лапках ===
+    csv_match = re.match(r'^([^,]*,)(["\'])(.+)\2(,.*)$', stripped)
+    if csv_match:
+        before, quote, value, after = csv_match.groups()
+        prefix = f'{indent}{before}{quote}'
+        suffix = f'{quote}{after}'
+        placeholders = legacy_extract_placeholders(value)
+        return prefix, value, suffix, placeholders
+    
+    # === Якщо не знайшли формат - перекладаємо весь рядок якщо є текст ===
+    # Перевіряємо чи містить кириличні або латинські літери (тобто текст)
+    if re.search(r'[a-zA-Zа-яА-ЯіІїЇєЄґҐ]', stripped):
+        placeholders = legacy_extract_placeholders(stripped)
+        return indent, stripped, "", placeholders
+    
+    # Немає тексту для перекладу
+    return indent, "", "", []
+
+
+def legacy_extract_placeholders(text):
+    """Витягує всі плейсхолдери/коди з тексту"""
+    placeholders = []
+    
+    # Порядок важливий - спочатку більш специфічні патерни
+    patterns = [
+        r'\{\{[^}]+\}\}',              # {{name}}, {{variable}}
+        r'\{[^}]+\}',                  # {0}, {name}, {variable}
+        r'%\([^)]+\)[sdifx]',          # %(name)s
+        r'%\d*\.?\d*[sdifxXeEgGcpb%]', # %s, %d, %2d, %.2f, %%
+        r'\$\{[^}]+\}',                # ${variable}
+        r'\$[a-zA-Z_][a-zA-Z0-9_]*',   # $variable
+        r'<[^>]+>',                    # <tag>, <color=#FF0000>, </tag>
+        r'\[[^\]]+\]',                 # [variable], [color]
+        r'\\[nrtv\\"\'/]',             # \n, \t, \r, \\, \", \', \/
+        r'&[a-zA-Z]+;',                # &nbsp;, &amp;
+        r'&#x?[0-9a-fA-F]+;',          # &#123;, &#xAB;
+        r'@[a-zA-Z_][a-zA-Z0-9_]*',    # @variable (деякі движки)
+        r'#[a-zA-Z_][a-zA-Z0-9_]*#',   # #variable# (деякі движки)
+    ]
+    
+    for pattern in patterns:
+        matches = re.findall(pattern, text)
+        placeholders.extend(matches)
+    
+    return placeholders
+
+
+# ============ БЕНЧМАРК ============
+
+# Типові рядки різних форматів, з яких складається синтетичний корпус
+SAMPLE_LINES = [
+    '{',
+    '  "id": "quest_017",',
+    '  "title": "The Lost Sword",',
+    '  "text": "Hello {name}, you have %d new messages.",',
+    '  "is_code": false,',
+    '  "reward": 250,',
+    '},',
+    '<string name="menu_start">Start <b>new</b> game</string>',
+    '<item id="5"/>',
+    '</resources>',
+    '[Dialog]',
+    'greeting=Welcome back, $player!',
+    'volume=0.75',
+    'description: "A sword forged in the fires of the north"',
+    'enabled: true',
+    'tooltip: Press [E] to interact',
+    'L["QUEST_DONE"] = "Quest completed!",',
+    'msgid "Save game"',
+    'msgstr "Save game"',
+    '# translator comment',
+    'menu_01,"Load game, continue",ui',
+    '1',
+    '00:00:01,000 --> 00:00:04,000',
+    'I never thought I would see this place again.',
+    '[SPEAKER: Michael]',
+    'DIALOG_01 { Where are you going? }',
+    '',
+]
+
+
+def build_corpus(line_count, seed=42):
+    """Синтетичний корпус із типових рядків"""
+    rng = random.Random(seed)
+    return [rng.choice(SAMPLE_LINES) for _ in range(line_count)]
+
+
+def classify(lines, timestamp, code_line, extract):
+    """Шлях класифікації рушія: таймстамп -> код -> витягування тексту"""
+    results = []
+    for line in lines:
+        if not line.strip() or timestamp(line) or code_line(line):
+            results.append(None)
+        else:
+            results.append(extract(line)[:3])
+    return results
+
+
+def placeholders(lines, extract):
+    """Витягування плейсхолдерів з кожного рядка"""
+    return [extract(line) for line in lines]
+
+
+def measure(fn, repeat):
+    """Найкращий час із repeat запусків"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Мікробенчмарк розбору рядків TranslatorUKR")
+    parser.add_argument("--lines", type=int, default=100000, help="кількість рядків синтетичного корпусу")
+    parser.add_argument("--repeat", type=int, default=3, help="кількість повторів (береться найкращий)")
+    parser.add_argument("--file", help="файл для перевірки замість синтетичного корпусу")
+    args = parser.parse_args(argv)
+    
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            lines = f.read().split("\n")
+    else:
+        lines = build_corpus(args.lines)
+    
+    # Результати класифікації мають збігатися рядок у рядок
+    before = classify(lines, legacy_is_timestamp, legacy_is_code_line, legacy_extract_translatable_text)
+    after = classify(lines, is_timestamp, is_code_line, extract_translatable_text)
+    mismatches = sum(1 for a, b in zip(before, after) if a != b)
+    
+    paths = [
+        ("класифікація рядків",
+         lambda: classify(lines, legacy_is_timestamp, legacy_is_code_line, legacy_extract_translatable_text),
+         lambda: classify(lines, is_timestamp, is_code_line, extract_translatable_text)),
+        ("плейсхолдери",
+         lambda: placeholders(lines, legacy_extract_placeholders),
+         lambda: placeholders(lines, extract_placeholders)),
+    ]
+    
+    print(f"Рядків: {len(lines)} | повторів: {args.repeat}")
+    print(f"{'шлях':<22}{'до, р/с':>14}{'після, р/с':>14}{'прискорення':>14}")
+    for name, legacy_fn, new_fn in paths:
+        legacy_time = measure(legacy_fn, args.repeat)
+        new_time = measure(new_fn, args.repeat)
+        print(f"{name:<22}{len(lines) / legacy_time:>14,.0f}{len(lines) / new_time:>14,.0f}"
+              f"{legacy_time / new_time:>13.1f}x")
+    
+    print(f"Розбіжностей класифікації: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,524 @@
+"""
+TranslatorUKR 1.0 - Бенчмарк конвеєра перекладу з локальним mock-сервером (без справжнього API)
+
+Запускає OpenAI-сумісний сервер-заглушку (/v1/chat/completions, /v1/models) з
+налаштовуваною затримкою, jitter, відповідями 429 і потоковим виводом та перекладає
+синтетичні JSON/PO/SRT/XML файли справжнім TranslationEngine. Результати - таблиця
+в stderr і JSON (--json) для порівняння між релізами.
+
+Приклади:
+    python benchmarks/pipeline_benchmark.py
+    python benchmarks/pipeline_benchmark.py --units 5000 -j 16 --latency 0.3 --jitter 0.1
+    python benchmarks/pipeline_benchmark.py --rate-limit 0.05 --stream --json results.json
+    python benchmarks/pipeline_benchmark.py --async -j 64 --batch-chars 2000 --passes 2
+    python benchmarks/pipeline_benchmark.py --servers 3 --server-slots 4 -j 4 --latency 0.2
+    python benchmarks/pipeline_benchmark.py --servers 2 --server-latencies 0.1,0.3 --server-slots 4 -j 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+
+from translator_core import (
+    TranslationEngine, TranslationMemory, AsyncBackend, Route, create_client, count_tokens,
+    read_lines, save_translation, translated_file_name, format_parser_for, is_failed_line
+)
+
+
+# ============ MOCK-СЕРВЕР ============
+
+# Номер сегмента пакетного запиту: "[3] text"
+NUMBER_RE = re.compile(r'^(\[\d+\]\s*)(.*)$')
+LINE_PREFIX = "Translate to Ukrainian: "
+
+
+def mock_translate(text):
+    """'Переклад' сервера: позначка перед кожним рядком, номери пакетного запиту зберігаються"""
+    if text.startswith(LINE_PREFIX):
+        text = text[len(LINE_PREFIX):]
+    lines = []
+    for line in text.split("\n"):
+        match = NUMBER_RE.match(line)
+        prefix, body = match.groups() if match else ("", line)
+        lines.append(f"{prefix}УКР {body}" if body.strip() else line)
+    return "\n".join(lines)
+
+
+def new_stats():
+    return {"requests": 0, "rate_limited": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+
+
+def cached_prefix_tokens(server, system_prompt):
+    """
+    Кеш префікса промпту, як у провайдерів: токени найдовшого вже баченого початку
+    системного промпту (з точністю до абзацу). Викликається під server.lock
+    """
+    cached = 0
+    prefix = ""
+    for paragraph in system_prompt.split("\n\n"):
+        prefix = f"{prefix}\n\n{paragraph}" if prefix else paragraph
+        if prefix in server.prefixes:
+            cached = count_tokens(prefix)
+        else:
+            server.prefixes.add(prefix)
+    return cached
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """OpenAI-сумісні /v1/models і /v1/chat/completions та службові /_stats, /_reset"""
+    
+    protocol_version = "HTTP/1.1"  # keep-alive, як у справжніх API
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def _send_chunk(self, payload):
+        """Подія SSE окремим фрагментом chunked-відповіді"""
+        data = payload if isinstance(payload, bytes) else f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+    
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock-model", "object": "model", "owned_by": "benchmark"}]})
+        elif self.path == "/_stats":
+            with self.server.lock:
+                self._send_json(200, self.server.stats)
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+    
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path == "/_reset":
+            with self.server.lock:
+                self.server.stats = new_stats()
+            self._send_json(200, {})
+            return
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        
+        request = json.loads(body)
+        config = self.server.config
+        prompt_tokens = sum(count_tokens(message["content"]) for message in request["messages"])
+        system_prompt = request["messages"][0]["content"] if request["messages"][0]["role"] == "system" else ""
+        with self.server.lock:
+            self.server.stats["requests"] += 1
+            limited = self.server.rng.random() < config["rate_limit"]
+            delay = max(0.0, config["latency"] + self.server.rng.uniform(-config["jitter"], config["jitter"]))
+            if limited:
+                self.server.stats["rate_limited"] += 1
+            else:
+                cached_tokens = cached_prefix_tokens(self.server, system_prompt)
+                self.server.stats["prompt_tokens"] += prompt_tokens
+                self.server.stats["cached_tokens"] += cached_tokens
+        
+        if limited:
+            self._send_json(429, {"error": {"message": "Rate limit reached for requests (mock)",
+                                            "type": "requests", "code": "rate_limit_exceeded"}},
+                            {"retry-after-ms": str(config["retry_after_ms"])})
+            return
+        
+        # Сервер з обмеженою кількістю слотів (як GPU-машина): зайві запити чекають у черзі
+        if self.server.slots:
+            with self.server.slots:
+                time.sleep(delay)
+        else:
+            time.sleep(delay)
+        content = mock_translate(request["messages"][-1]["content"])
+        completion_tokens = count_tokens(content)
+        with self.server.lock:
+            self.server.stats["completion_tokens"] += completion_tokens
+        
+        base = {"id": "chatcmpl-mock", "created": int(time.time()), "model": request.get("model", "mock-model")}
+        if not request.get("stream"):
+            self._send_json(200, dict(base, object="chat.completion", choices=[
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+            ], usage={"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens,
+                      "prompt_tokens_details": {"cached_tokens": cached_tokens}}))
+            return
+        
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        step = config["stream_chunk"]
+        for start in range(0, len(content), step):
+            self._send_chunk(dict(base, object="chat.completion.chunk", choices=[
+                {"index": 0, "delta": {"content": content[start:start + step]}, "finish_reason": None}
+            ]))
+        self._send_chunk(dict(base, object="chat.completion.chunk", choices=[
+            {"index": 0, "delta": {}, "finish_reason": "stop"}
+        ]))
+        self._send_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    """Клієнт, що закрив keep-alive з'єднання, - не помилка"""
+    
+    daemon_threads = True
+    
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def serve(config, ready):
+    """Точка входу процесу сервера: порт повертається через чергу ready"""
+    server = QuietHTTPServer(("127.0.0.1", config["port"]), MockHandler)
+    server.config = config
+    server.stats = new_stats()
+    server.prefixes = set()  # початки системних промптів, уже "закешовані" сервером
+    server.lock = threading.Lock()
+    server.slots = threading.BoundedSemaphore(config["slots"]) if config["slots"] else None
+    server.rng = random.Random(config["seed"])
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+class MockServer:
+    """Mock-сервер в окремому процесі: його GIL і пам'ять не впливають на вимірювання"""
+    
+    def __init__(self, latency=0.05, jitter=0.0, rate_limit=0.0, retry_after_ms=200, stream_chunk=8,
+                 port=0, seed=42, slots=0):
+        self.config = {"latency": latency, "jitter": jitter, "rate_limit": rate_limit,
+                       "retry_after_ms": retry_after_ms, "stream_chunk": stream_chunk,
+                       "port": port, "seed": seed, "slots": slots}
+        self.process = None
+        self.url = None
+    
+    def start(self):
+        ready = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=serve, args=(self.config, ready), daemon=True)
+        self.process.start()
+        self.url = f"http://127.0.0.1:{ready.get(timeout=30)}"
+        return self
+    
+    @property
+    def base_url(self):
+        return f"{self.url}/v1"
+    
+    def _call(self, path, data=None):
+        with urllib.request.urlopen(urllib.request.Request(self.url + path, data=data), timeout=10) as response:
+            return json.loads(response.read())
+    
+    def stats(self):
+        return self._call("/_stats")
+    
+    def reset(self):
+        self._call("/_reset", data=b"")
+    
+    def stop(self):
+        if self.process:
+            self.process.terminate()
+            self.process.join(timeout=5)
+
+
+# ============ СИНТЕТИЧНІ ФАЙЛИ ============
+
+SUBJECTS = ["The old knight", "Your companion", "The merchant", "A strange voice", "The captain",
+            "The village elder", "Nobody", "The ancient dragon", "Your sister", "The guard"]
+VERBS = ["is waiting for you", "has found the key", "wants to trade", "remembers the war",
+         "cannot open the gate", "needs {count} more coins", "was seen near the river",
+         "is looking for <b>help</b>", "left a message for %s", "will return at dawn"]
+PLACES = ["in the tavern.", "beyond the northern wall.", "at the harbor.", "near the old mill.",
+          "in the royal library.", "under the bridge.", "on the mountain pass.", "in {location}."]
+UI_TEXTS = ["Start new game", "Load game", "Settings", "Quit to desktop", "Press [E] to interact",
+            "Inventory is full", "Quest completed!", "Not enough mana", "Save game?", "Continue"]
+
+
+def build_texts(count, repeat_ratio, seed):
+    """Тексти корпусу: речення з плейсхолдерами та частка повторів (кнопки, репліки)"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        if texts and rng.random() < repeat_ratio:
+            texts.append(rng.choice(UI_TEXTS + texts[-50:]))
+        else:
+            texts.append(f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(PLACES)}")
+    return texts
+
+
+def build_json(texts):
+    items = [{"id": f"line_{n:05d}", "speaker": "npc", "text": text} for n, text in enumerate(texts)]
+    return json.dumps({"dialogue": items}, ensure_ascii=False, indent=2)
+
+
+def build_po(texts):
+    def quote(text):
+        return text.replace("\\", "\\\\").replace('"', '\\"')
+    
+    entries = ['msgid ""\nmsgstr ""\n"Content-Type: text/plain; charset=UTF-8\\n"\n']
+    for n, text in enumerate(texts):
+        entries.append(f'#: src/dialogue.c:{n + 1}\nmsgid "{quote(text)}"\nmsgstr ""\n')
+    return "\n".join(entries)
+
+
+def build_srt(texts):
+    cues = []
+    for n, text in enumerate(texts):
+        start = n * 3
+        words = text.split()
+        # Кожна третя репліка - на двох рядках
+        if n % 3 == 0 and len(words) > 3:
+            text = " ".join(words[:len(words) // 2]) + "\n" + " ".join(words[len(words) // 2:])
+        cues.append(f"{n + 1}\n{start // 3600:02d}:{start // 60 % 60:02d}:{start % 60:02d},000 --> "
+                    f"{start // 3600:02d}:{start // 60 % 60:02d}:{start % 60 + 2:02d},500\n{text}\n")
+    return "\n".join(cues)
+
+
+def build_xml(texts):
+    def escape(text):
+        # Вбудовані теги форматування лишаються тегами
+        return text.replace("&", "&amp;")
+    
+    items = [f'  <string name="line_{n:05d}">{escape(text)}</string>' for n, text in enumerate(texts)]
+    return '<?xml version="1.0" encoding="utf-8"?>\n<resources>\n' + "\n".join(items) + "\n</resources>\n"
+
+
+BUILDERS = {"json": build_json, "po": build_po, "srt": build_srt, "xml": build_xml}
+
+
+# ============ ВИМІРЮВАННЯ ============
+
+class LatencyRecorder:
+    """Час запитів на стороні клієнта: від відправки до заголовків відповіді (httpx event hooks)"""
+    
+    def __init__(self):
+        self.samples = []
+        self._starts = {}
+        self._lock = threading.Lock()
+    
+    def reset(self):
+        with self._lock:
+            self.samples = []
+            self._starts = {}
+    
+    def on_request(self, request):
+        with self._lock:
+            self._starts[id(request)] = time.perf_counter()
+    
+    def on_response(self, response):
+        with self._lock:
+            start = self._starts.pop(id(response.request), None)
+            if start is not None:
+                self.samples.append(time.perf_counter() - start)
+    
+    async def aon_request(self, request):
+        self.on_request(request)
+    
+    async def aon_response(self, response):
+        self.on_response(response)
+
+
+def percentile(samples, fraction):
+    """Перцентиль за найближчим рангом (None - немає даних)"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def peak_rss_mb():
+    """Піковий RSS цього процесу в МБ (None - недоступно, напр. на Windows без psutil)"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux - кілобайти, macOS - байти
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def run_format(name, file_path, output_path, args, servers, recorder, clients, backend, memory):
+    """Переклад одного синтетичного файлу справжнім рушієм (кілька серверів - пул маршрутів). Повертає метрики"""
+    lines = read_lines(file_path)
+    model = f"mock-{name}"
+    engine = TranslationEngine(
+        clients[0], model,
+        provider="Benchmark",
+        concurrency=args.concurrency * len(servers),
+        batch_chars=args.batch_chars,
+        translation_memory=memory,
+        stream=args.stream,
+        on_partial=(lambda source, text: None) if args.stream else None,
+        backend=backend,
+        routes=[Route(client, model, "Benchmark") for client in clients[1:]]
+    )
+    for server in servers:
+        server.reset()
+    recorder.reset()
+    
+    start = time.perf_counter()
+    translated_lines = engine.translate_lines(lines, parser=format_parser_for(file_path))
+    elapsed = time.perf_counter() - start
+    save_translation(output_path, translated_lines)
+    
+    server_stats = [server.stats() for server in servers]
+    stats = {key: sum(item[key] for item in server_stats) for key in new_stats()}
+    latencies = list(recorder.samples)
+    lookups = memory.hits + memory.misses if memory else 0
+    return {
+        "format": name,
+        "lines": len(lines),
+        "seconds": round(elapsed, 3),
+        "lines_per_sec": round(len(lines) / elapsed, 1) if elapsed else None,
+        "requests": stats["requests"],
+        "rate_limited": stats["rate_limited"],
+        "latency_p50_ms": round(percentile(latencies, 0.5) * 1000, 1) if latencies else None,
+        "latency_p95_ms": round(percentile(latencies, 0.95) * 1000, 1) if latencies else None,
+        "tokens_sent": stats["prompt_tokens"],
+        "tokens_cached": stats["cached_tokens"],
+        "prompt_cache_rate": round(stats["cached_tokens"] / stats["prompt_tokens"], 3) if stats["prompt_tokens"] else None,
+        "tokens_received": stats["completion_tokens"],
+        "cache_hits": memory.hits if memory else 0,
+        "cache_misses": memory.misses if memory else 0,
+        "cache_hit_rate": round(memory.hits / lookups, 3) if lookups else None,
+        "failed_lines": sum(1 for line in translated_lines if is_failed_line(line)),
+        "complete": len(translated_lines) == len(lines),
+        "server_requests": "/".join(str(item["requests"]) for item in server_stats),
+    }
+
+
+def print_table(results, servers=1):
+    """Таблиця результатів у stderr (stdout лишається для --json -)"""
+    columns = [("pass", "прохід", 7), ("format", "формат", 7), ("lines", "рядків", 8),
+               ("lines_per_sec", "р/с", 9), ("requests", "запитів", 9), ("rate_limited", "429", 6),
+               ("latency_p50_ms", "p50 мс", 9), ("latency_p95_ms", "p95 мс", 9),
+               ("tokens_sent", "токенів", 10), ("prompt_cache_rate", "кеш пр.", 9),
+               ("cache_hit_rate", "кеш", 7), ("failed_lines", "[!]", 6)]
+    if servers > 1:
+        columns.append(("server_requests", "по серверах", 16))
+    print("".join(f"{title:>{width}}" for _, title, width in columns), file=sys.stderr)
+    for result in results:
+        cells = []
+        for key, _, width in columns:
+            value = result.get(key)
+            cells.append(f"{'-' if value is None else value:>{width}}")
+        print("".join(cells), file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк конвеєра перекладу TranslatorUKR з mock-сервером")
+    parser.add_argument("--units", type=int, default=2000, help="текстів у кожному синтетичному файлі")
+    parser.add_argument("--formats", default="json,po,srt,xml", help="формати через кому")
+    parser.add_argument("--repeat-ratio", type=float, default=0.2, help="частка повторюваних текстів")
+    parser.add_argument("--passes", type=int, default=1, help="проходів (другий і далі - з теплим кешем)")
+    parser.add_argument("-j", "--concurrency", type=int, default=8, help="кількість одночасних запитів (на кожен сервер)")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="асинхронний бекенд")
+    parser.add_argument("--batch-chars", type=int, default=0, help="ліміт символів пакетного запиту (0 - вимкнено)")
+    parser.add_argument("--stream", action="store_true", help="потокові відповіді (stream=True)")
+    parser.add_argument("--no-cache", action="store_true", help="без пам'яті перекладів")
+    parser.add_argument("--latency", type=float, default=0.05, help="затримка відповіді сервера, с")
+    parser.add_argument("--jitter", type=float, default=0.0, help="випадкове відхилення затримки, ±с")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="ймовірність відповіді 429")
+    parser.add_argument("--retry-after-ms", type=int, default=200, help="retry-after-ms у відповідях 429")
+    parser.add_argument("--servers", type=int, default=1, help="кількість mock-серверів (пул, як кілька локальних машин)")
+    parser.add_argument("--server-latencies", help="затримка кожного сервера через кому, с (за замовчуванням - --latency)")
+    parser.add_argument("--server-slots", type=int, default=0,
+                        help="запитів, які кожен сервер обробляє одночасно (0 - без обмеження)")
+    parser.add_argument("--seed", type=int, default=42, help="зерно генератора корпусу і сервера")
+    parser.add_argument("--json", dest="json_path", help="файл для результатів у JSON ('-' - stdout)")
+    args = parser.parse_args(argv)
+    
+    formats = [name.strip() for name in args.formats.split(",") if name.strip()]
+    unknown = [name for name in formats if name not in BUILDERS]
+    if unknown:
+        parser.error(f"невідомі формати: {', '.join(unknown)}")
+    try:
+        latencies = [float(value) for value in args.server_latencies.split(",")] if args.server_latencies else []
+    except ValueError:
+        parser.error("--server-latencies: числа через кому")
+    servers_count = max(args.servers, len(latencies))
+    latencies += [args.latency] * (servers_count - len(latencies))
+    
+    servers = [MockServer(latency, args.jitter, args.rate_limit, args.retry_after_ms,
+                          seed=args.seed + number, slots=args.server_slots).start()
+               for number, latency in enumerate(latencies)]
+    recorder = LatencyRecorder()
+    backend = None
+    connections = max(10, args.concurrency * servers_count)
+    http_client = httpx.Client(
+        timeout=60,
+        limits=httpx.Limits(max_connections=connections),
+        event_hooks={"request": [recorder.on_request], "response": [recorder.on_response]}
+    )
+    clients = [create_client("benchmark", server.base_url, http_client=http_client) for server in servers]
+    if args.use_async:
+        backend = AsyncBackend("benchmark", servers[0].base_url, max_connections=connections,
+                               event_hooks={"request": [recorder.aon_request], "response": [recorder.aon_response]})
+    
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as work_dir:
+            work_dir = Path(work_dir)
+            memory = None if args.no_cache else TranslationMemory(str(work_dir / "memory.db"))
+            texts = build_texts(args.units, args.repeat_ratio, args.seed)
+            files = {}
+            for name in formats:
+                files[name] = work_dir / f"corpus.{name}"
+                files[name].write_text(BUILDERS[name](texts), encoding="utf-8")
+            
+            for pass_number in range(1, args.passes + 1):
+                for name in formats:
+                    output_path = work_dir / translated_file_name(files[name])
+                    result = run_format(name, files[name], output_path, args, servers, recorder,
+                                        clients, backend, memory)
+                    results.append(dict(result, **{"pass": pass_number}))
+    finally:
+        if backend:
+            backend.close()
+        for server in servers:
+            server.stop()
+    
+    print_table(results, servers_count)
+    report = {
+        "benchmark": "pipeline",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key != "json_path"},
+        "peak_rss_mb": round(peak_rss_mb(), 1) if peak_rss_mb() is not None else None,
+        "results": results,
+    }
+    print(f"Піковий RSS: {report['peak_rss_mb'] or '-'} МБ", file=sys.stderr)
+    if args.json_path == "-":
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    elif args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    
+    return 1 if any(result["failed_lines"] or not result["complete"] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+TranslatorUKR 1.0 - Тести розбору структурованих форматів (JSON, PO, SRT, XML)
+
+Перевіряються одиниці перекладу (текст і позиції) та запис перекладу на місце
+оригіналу через UnitWriter, зокрема одиниці, що займають кілька рядків.
+
+Запуск:
+    python -m pytest tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from translator_core import JsonFormat, PoFormat, SrtFormat, XmlFormat, UnitWriter
+
+
+def parse(format_class, text):
+    lines = text.split("\n")
+    return lines, list(format_class().iter_units(lines))
+
+
+def write_back(lines, units, translate):
+    """Переклад кожної одиниці функцією translate і запис у рядки, як у TranslationEngine"""
+    writer = UnitWriter()
+    for unit in units:
+        writer.add(unit)
+    result = list(lines)
+    for unit in units:
+        for idx, line in writer.finish(unit, translate(unit.text), lines):
+            result[idx] = line
+    return result
+
+
+class XmlFormatTest(unittest.TestCase):
+    
+    def texts(self, text):
+        return [unit.text for unit in parse(XmlFormat, text)[1]]
+    
+    def test_sibling_elements_with_inline_names_are_separate_units(self):
+        lines, units = parse(XmlFormat, '<root>\n  <a href="x">Hello</a>\n  <s>One</s>\n  <s>Two</s>\n</root>')
+        self.assertEqual([unit.text for unit in units], ["Hello", "One", "Two"])
+        self.assertEqual([unit.lines for unit in units], [[1], [2], [3]])
+        self.assertEqual(write_back(lines, units, str.upper),
+                         ['<root>', '  <a href="x">HELLO</a>', '  <s>ONE</s>', '  <s>TWO</s>', '</root>'])
+    
+    def test_sibling_elements_on_one_line(self):
+        lines, units = parse(XmlFormat, '<items><s>One</s><s>Two</s></items>')
+        self.assertEqual([unit.text for unit in units], ["One", "Two"])
+        self.assertEqual(write_back(lines, units, str.upper), ['<items><s>ONE</s><s>TWO</s></items>'])
+    
+    def test_inline_tags_inside_text_stay_in_unit(self):
+        self.assertEqual(self.texts('<p>Press <b>Start</b> now</p>'), ['Press <b>Start</b> now'])
+        self.assertEqual(self.texts('<p><color=#fff>Unity</color> text</p>'), ['<color=#fff>Unity</color> text'])
+        self.assertEqual(self.texts('<p><b>Only bold</b></p>'), ['Only bold'])
+        # Елемент без власного тексту навколо: форматування всередині його вмісту зберігається
+        self.assertEqual(self.texts('<a href="x">Hello <b>big</b> world</a>'), ['Hello <b>big</b> world'])
+    
+    def test_text_node_over_several_lines(self):
+        lines, units = parse(XmlFormat, '<p>First line\n  second <i>line</i>\n  third<br/>end</p>')
+        self.assertEqual(len(units), 1)
+        self.assertEqual(units[0].text, 'First line second <i>line</i> third<br/>end')
+        self.assertEqual(units[0].lines, [0, 1, 2])
+        result = write_back(lines, units, lambda text: 'Перший рядок другий <i>рядок</i> третій<br/>кінець')
+        self.assertEqual(len(result), 3)
+        self.assertEqual(" ".join(line.strip() for line in result),
+                         '<p>Перший рядок другий <i>рядок</i> третій<br/>кінець</p>')
+    
+    def test_mixed_content_over_several_lines(self):
+        lines, units = parse(XmlFormat, '<p><b>Warning:</b> do\n  this now</p>')
+        self.assertEqual([unit.text for unit in units], ['<b>Warning:</b> do this now'])
+        self.assertEqual(units[0].lines, [0, 1])
+    
+    def test_comments_and_markup_are_not_text(self):
+        self.assertEqual(self.texts('<!-- Hello\n  world -->\n<root attr="Hi">\n  <name>Sword</name>\n</root>'), ['Sword'])
+    
+    def test_encode_escapes_text_but_keeps_inline_tags(self):
+        lines, units = parse(XmlFormat, '<p>Press <b>Start</b> now</p>')
+        result = write_back(lines, units, lambda text: 'A < B & <b>C</b> &amp; D')
+        self.assertEqual(result, ['<p>A &lt; B &amp; <b>C</b> &amp; D</p>'])
+
+
+class PoFormatTest(unittest.TestCase):
+    
+    def test_continuation_strings(self):
+        lines, units = parse(PoFormat, 'msgid ""\nmsgstr ""\n\nmsgid ""\n"Long text that "\n"continues here"\nmsgstr ""')
+        self.assertEqual([unit.text for unit in units], ['Long text that continues here'])
+        self.assertEqual(write_back(lines, units, str.upper)[6], 'msgstr "LONG TEXT THAT CONTINUES HERE"')
+    
+    def test_filled_msgstr_is_skipped(self):
+        _, units = parse(PoFormat, 'msgid "Done"\nmsgstr "Готово"\n\nmsgid "Open"\nmsgstr ""')
+        self.assertEqual([unit.text for unit in units], ['Open'])
+    
+    def test_escaping(self):
+        lines, units = parse(PoFormat, 'msgid "Say \\"hi\\""\nmsgstr ""')
+        self.assertEqual(units[0].text, 'Say "hi"')
+        self.assertEqual(write_back(lines, units, lambda text: 'Скажи "привіт"')[1], 'msgstr "Скажи \\"привіт\\""')
+
+
+class SrtFormatTest(unittest.TestCase):
+    
+    def test_multiline_cue(self):
+        lines, units = parse(SrtFormat, '1\n00:00:01,000 --> 00:00:02,000\nFirst line of cue\nsecond line\n\n'
+                                        '2\n00:00:03,000 --> 00:00:04,000\nOne more')
+        self.assertEqual([unit.text for unit in units], ['First line of cue\nsecond line', 'One more'])
+        self.assertEqual(units[0].lines, [2, 3])
+        result = write_back(lines, units, str.upper)
+        self.assertEqual(result[1:4], ['00:00:01,000 --> 00:00:02,000', 'FIRST LINE OF CUE', 'SECOND LINE'])
+        self.assertEqual(result[7], 'ONE MORE')
+
+
+class JsonFormatTest(unittest.TestCase):
+    
+    def test_escaped_values(self):
+        lines, units = parse(JsonFormat, '{"title": "Hello \\"x\\"", "id": "btn_ok"}')
+        self.assertEqual([unit.text for unit in units], ['Hello "x"'])
+        self.assertEqual(write_back(lines, units, str.upper), ['{"title": "HELLO \\"X\\"", "id": "btn_ok"}'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+TranslatorUKR 1.0 - Тести продовження перекладу з журналу (CheckpointJournal)
+
+Переклад зупиняється після першого готового запису, як кнопкою "Стоп" чи збоєм,
+і продовжується новим рушієм з тим самим журналом (сервер-заглушка з test_router).
+
+Запуск:
+    python -m pytest tests
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from test_router import StubServer, make_engine
+from translator_core import CheckpointJournal, format_parser_for
+
+
+PO_LINES = [
+    'msgid ""',
+    'msgstr ""',
+    '"Content-Type: text/plain; charset=UTF-8\\n"',
+    '',
+    'msgid "Hello"',
+    'msgstr ""',
+    '',
+    'msgid "Goodbye"',
+    'msgstr ""',
+    '',
+    'msgid "Thanks"',
+    'msgstr ""',
+]
+
+
+class JournalResumeTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.server = StubServer()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+    
+    def tearDown(self):
+        self.server.close()
+        self.tmp.cleanup()
+    
+    def translate(self, name, lines, model, stop_at=None, resume=False):
+        """Переклад як у translator_cli.translate_file; stop_at - зупинка після запису цього рядка"""
+        file_path = self.dir / name
+        journal = CheckpointJournal.for_file(file_path, self.dir / "checkpoints")
+        known = journal.load(lines) if resume else {}
+        journal.start(lines, known)
+        engine = make_engine([self.server.base_url], model, concurrency=1)
+        
+        def on_line(idx, translated_line):
+            if idx not in known:
+                journal.append(idx, lines[idx], translated_line)
+            if idx == stop_at:
+                engine.stop()
+        
+        try:
+            return known, engine.translate_lines(lines, on_line, known, parser=format_parser_for(file_path))
+        finally:
+            journal.close()
+    
+    def test_po_resume_after_interrupt(self):
+        _, partial = self.translate("game.po", PO_LINES, "po-first", stop_at=5)
+        self.assertEqual(partial[5], 'msgstr "УКР Hello"')
+        self.assertLess(len(partial), len(PO_LINES))
+        
+        requests = self.server.requests
+        known, result = self.translate("game.po", PO_LINES, "po-resume", resume=True)
+        self.assertEqual(known[5], 'msgstr "УКР Hello"')
+        # Порожні msgstr інших записів мають той самий хеш, але не ту одиницю
+        self.assertNotIn(8, known)
+        self.assertNotIn(11, known)
+        self.assertEqual(result[5], 'msgstr "УКР Hello"')
+        self.assertEqual(result[8], 'msgstr "УКР Goodbye"')
+        self.assertEqual(result[11], 'msgstr "УКР Thanks"')
+        self.assertEqual(self.server.requests - requests, 2)
+    
+    def test_po_resume_after_lines_shifted(self):
+        self.translate("shift.po", PO_LINES, "shift-first", stop_at=8)
+        
+        # Новий запис на початку файлу: готові записи зсунулись на три рядки
+        lines = PO_LINES[:4] + ['msgid "Welcome"', 'msgstr ""', ''] + PO_LINES[4:]
+        known, result = self.translate("shift.po", lines, "shift-resume", resume=True)
+        self.assertEqual(known[8], 'msgstr "УКР Hello"')
+        self.assertEqual(known[11], 'msgstr "УКР Goodbye"')
+        self.assertEqual(result[5], 'msgstr "УКР Welcome"')
+        self.assertEqual(result[8], 'msgstr "УКР Hello"')
+        self.assertEqual(result[11], 'msgstr "УКР Goodbye"')
+        self.assertEqual(result[14], 'msgstr "УКР Thanks"')
+    
+    def test_plain_lines_resume_by_hash(self):
+        lines = [f"Plain line number {k} of the story" for k in range(6)]
+        self.translate("story.txt", lines, "plain-first", stop_at=2)
+        
+        shifted = ["A new first line of the story"] + lines
+        known, result = self.translate("story.txt", shifted, "plain-resume", resume=True)
+        self.assertEqual(sorted(known), [1, 2, 3])
+        self.assertEqual(result, [f"УКР {line}" for line in shifted])
+
+
+if __name__ == "__main__":
+    unittest.main()
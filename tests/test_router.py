@@ -0,0 +1,233 @@
+"""
+TranslatorUKR 1.0 - Тести пулу серверів (ProviderRouter) з локальними сервером-заглушками
+
+Кожен тест піднімає кілька OpenAI-сумісних серверів у потоках (обробник - MockHandler
+бенчмарку) і перекладає рядки справжнім TranslationEngine, як translator_cli.py з
+кількома --base-url. Сервер можна "вбити" або перевести в режим відповідей 5xx/429.
+
+Запуск:
+    python -m pytest tests
+    python -m unittest discover tests
+"""
+
+import random
+import socket
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.pipeline_benchmark import MockHandler, QuietHTTPServer, new_stats
+from translator_core import CIRCUIT_FAILURES, TranslationEngine, Route, create_client, is_failed_line
+
+
+class StubHandler(MockHandler):
+    """MockHandler, що вміє імітувати мертвий сервер (обрив з'єднання) і відповіді 5xx"""
+    
+    def do_GET(self):
+        if self.server.mode == "dead":
+            self.close_connection = True
+            return
+        super().do_GET()
+    
+    def do_POST(self):
+        if self.server.mode == "dead":
+            # Без відповіді: клієнт отримує обрив з'єднання, як від вимкненої машини
+            self.close_connection = True
+            return
+        if self.server.mode == "error":
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with self.server.lock:
+                self.server.stats["requests"] += 1
+            self._send_json(500, {"error": {"message": "Internal server error (stub)"}})
+            return
+        super().do_POST()
+
+
+class StubServer:
+    """Сервер-заглушка в потоці: mode - ok, dead або error; rate_limit - частка відповідей 429"""
+    
+    def __init__(self, latency=0.01, slots=0, rate_limit=0.0):
+        self.httpd = QuietHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.httpd.config = {"latency": latency, "jitter": 0.0, "rate_limit": rate_limit,
+                             "retry_after_ms": 10, "stream_chunk": 8}
+        self.httpd.mode = "ok"
+        self.httpd.stats = new_stats()
+        self.httpd.prefixes = set()
+        self.httpd.lock = threading.Lock()
+        self.httpd.slots = threading.BoundedSemaphore(slots) if slots else None
+        self.httpd.rng = random.Random(42)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+    
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+    
+    @property
+    def requests(self):
+        with self.httpd.lock:
+            return self.httpd.stats["requests"]
+    
+    def set_mode(self, mode):
+        self.httpd.mode = mode
+    
+    def kill(self):
+        """Сервер зникає: нові з'єднання відхиляються, відкриті keep-alive обриваються"""
+        self.httpd.mode = "dead"
+        self.httpd.shutdown()
+        self.httpd.server_close()
+    
+    def close(self):
+        if self.httpd.mode != "dead":
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+
+def free_port():
+    """Порт, на якому ніхто не слухає"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_engine(base_urls, model, concurrency=4, **kwargs):
+    """Рушій з пулом серверів, як у translator_cli.py: перший - основний, решта - маршрути"""
+    clients = [create_client("test", url, timeout=5) for url in base_urls]
+    return TranslationEngine(
+        clients[0], model,
+        provider="Test",
+        concurrency=concurrency,
+        routes=[Route(client, model, "Test") for client in clients[1:]],
+        **kwargs
+    )
+
+
+def sample_lines(count, tag):
+    return [f"{tag} sentence number {k} about the old castle" for k in range(count)]
+
+
+class RouterTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.servers = []
+    
+    def tearDown(self):
+        for server in self.servers:
+            server.close()
+    
+    def start(self, **kwargs):
+        server = StubServer(**kwargs)
+        self.servers.append(server)
+        return server
+    
+    def assertTranslated(self, lines, result):
+        """Усі рядки перекладено і повернуто в початковому порядку"""
+        self.assertEqual(len(result), len(lines))
+        self.assertFalse([line for line in result if is_failed_line(line)])
+        self.assertEqual(result, [f"УКР {line}" for line in lines])
+    
+    def test_shards_proportionally_to_server_speed(self):
+        # Одна "GPU" на сервер: швидкий відповідає втричі частіше за повільний
+        fast = self.start(latency=0.05, slots=1)
+        slow = self.start(latency=0.15, slots=1)
+        engine = make_engine([fast.base_url, slow.base_url], "shard", concurrency=4)
+        lines = sample_lines(100, "shard")
+        
+        self.assertTranslated(lines, engine.translate_lines(lines))
+        self.assertGreater(slow.requests, 0)
+        self.assertGreater(fast.requests, 2 * slow.requests)
+        self.assertEqual(fast.requests + slow.requests, len(lines))
+    
+    def test_equal_servers_share_work(self):
+        servers = [self.start(latency=0.02, slots=1) for _ in range(3)]
+        engine = make_engine([server.base_url for server in servers], "equal", concurrency=6)
+        lines = sample_lines(90, "equal")
+        
+        self.assertTranslated(lines, engine.translate_lines(lines))
+        for server in servers:
+            self.assertGreater(server.requests, len(lines) / 3 / 2)
+    
+    def test_probe_opens_circuit_of_dead_server(self):
+        alive = self.start()
+        dead_url = f"http://127.0.0.1:{free_port()}/v1"
+        engine = make_engine([dead_url, alive.base_url], "probe")
+        
+        results = engine.router.probe(timeout=2)
+        self.assertEqual([ok for _, ok in results], [False, True])
+        dead_route = engine.router.routes[0]
+        self.assertEqual(dead_route.failures, CIRCUIT_FAILURES)
+        self.assertIs(engine.router.pick(), engine.router.routes[1])
+    
+    def test_dead_server_is_skipped_from_start(self):
+        alive = self.start()
+        dead_url = f"http://127.0.0.1:{free_port()}/v1"
+        statuses = []
+        engine = make_engine([dead_url, alive.base_url], "skip",
+                             on_status=lambda text, kind: statuses.append(text))
+        lines = sample_lines(30, "skip")
+        
+        self.assertTranslated(lines, engine.translate_lines(lines))
+        self.assertEqual(alive.requests, len(lines))
+        self.assertEqual(engine.router.routes[0].requests, 0)
+        self.assertTrue(any("Не відповідають" in text for text in statuses))
+    
+    def test_failover_when_server_dies_mid_run(self):
+        first = self.start()
+        second = self.start()
+        engine = make_engine([first.base_url, second.base_url], "dies")
+        lines = sample_lines(20, "before")
+        self.assertTranslated(lines, engine.translate_lines(lines))
+        self.assertGreater(first.requests, 0)
+        
+        # Пул уже перевірено - про смерть сервера рушій дізнається лише з помилок запитів
+        first.kill()
+        served = second.requests
+        lines = sample_lines(40, "after")
+        self.assertTranslated(lines, engine.translate_lines(lines))
+        self.assertEqual(second.requests - served, len(lines))
+        self.assertGreaterEqual(engine.router.routes[0].failures, 1)
+    
+    def test_failover_on_server_errors(self):
+        broken = self.start()
+        healthy = self.start()
+        broken.set_mode("error")
+        engine = make_engine([broken.base_url, healthy.base_url], "errors")
+        lines = sample_lines(40, "errors")
+        
+        self.assertTranslated(lines, engine.translate_lines(lines))
+        self.assertEqual(healthy.requests, len(lines))
+        # Після CIRCUIT_FAILURES збоїв поспіль запобіжник розмикається і сервер більше не отримує запитів
+        self.assertLessEqual(broken.requests, engine.concurrency + CIRCUIT_FAILURES)
+        self.assertGreater(engine.router.routes[0].open_until, 0)
+    
+    def test_failover_on_rate_limit(self):
+        limited = self.start(rate_limit=1.0)
+        healthy = self.start()
+        engine = make_engine([limited.base_url, healthy.base_url], "limited")
+        lines = sample_lines(40, "limited")
+        
+        self.assertTranslated(lines, engine.translate_lines(lines))
+        self.assertEqual(healthy.requests, len(lines))
+        self.assertGreater(limited.requests, 0)
+        self.assertGreater(engine.router.routes[0].rate_limiter.rate_limited, 0)
+    
+    def test_order_with_streaming_and_uneven_servers(self):
+        servers = [self.start(latency=latency, slots=2) for latency in (0.005, 0.02, 0.04)]
+        engine = make_engine([server.base_url for server in servers], "stream", concurrency=6,
+                             stream=True, on_partial=lambda source, text: None)
+        lines = sample_lines(60, "stream")
+        received = []
+        
+        result = engine.translate_lines(lines, on_line=lambda idx, text: received.append(idx))
+        self.assertTranslated(lines, result)
+        self.assertEqual(received, list(range(len(lines))))
+        self.assertTrue(all(route.in_flight == 0 for route in engine.router.routes))
+        self.assertEqual({record["route"] for record in engine.telemetry.records},
+                         {route.name for route in engine.router.routes})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,18 +6,34 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import threading
+import queue
 import os
 import time
 from pathlib import Path
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
 import json
 import re
+import sqlite3
 import ctypes
+from translator_core import (
+    PROVIDERS, TranslationEngine, TranslationMemory, ProjectTranslator, CheckpointJournal, AsyncBackend,
+    RunTelemetry, GlossaryIndex, GlossaryChecker, Route, create_client, routes_from_config, glossary_segments,
+    split_base_urls, probe_endpoint,
+    extract_placeholders, translated_file_name, save_translation, format_parser_for,
+    LineReader, is_large_file, translate_file_streaming
+)
 
 # Налаштування теми
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
+# Великі файли: скільки рядків оригіналу/перекладу тримати в панелях
+PREVIEW_LINES = 2000
+# Файли з більшою кількістю рядків показуються віртуально (у віджеті лише видима частина)
+VIRTUAL_LINES = 5000
+# Інтервал оновлення інтерфейсу під час перекладу (мс): готові рядки накопичуються між кадрами
+UI_FRAME_MS = 50
+
 
 def set_dark_title_bar(window):
     """Встановлює темний title bar для вікна Windows"""
@@ -33,6 +49,295 @@ def set_dark_title_bar(window):
         pass  # Ігноруємо помилки на не-Windows системах
 
 
+class VirtualPane:
+    """
+    Віртуальний перегляд великого списку рядків у CTkTextbox: у віджеті лише видимі рядки
+    з запасом margin, смуга прокрутки показує позицію в усьому файлі. Правки у вікні
+    записуються назад у список рядків.
+    """
+    
+    def __init__(self, textbox, get_lines, margin=200, on_render=None, on_scroll=None, on_view=None):
+        self.textbox = textbox
+        self.inner = textbox._textbox
+        self.get_lines = get_lines  # Список може бути замінено новим - беремо щоразу
+        self.margin = margin
+        self.on_render = on_render  # on_render() - рядки у віджеті замінено або зсунуто
+        self.on_scroll = on_scroll  # on_scroll(верхній рядок) - прокрутка користувачем
+        self.on_view = on_view  # on_view() - змінилась видима частина (в обох режимах)
+        self.active = False
+        self.first = 0  # індекс рядка, з якого починається вміст віджета
+        self.count = 0  # рядків у віджеті
+        self.top = 0  # верхній видимий рядок
+        self.query = ""  # пошуковий запит, що підсвічується у вікні
+        self.dirty = False  # у вікні були натискання клавіш (можливі правки)
+        
+        for sequence in ("<KeyRelease>", "<<Paste>>", "<<Cut>>", "<<Undo>>", "<<Redo>>"):
+            self.inner.bind(sequence, self._on_edit, add="+")
+        # Прокрутку віджета відстежуємо завжди (видима частина - для підсвітки)
+        self.inner.configure(yscrollcommand=self._on_widget_scroll)
+    
+    def activate(self):
+        """Увімкнення віртуального режиму: вміст віджета тепер - вікно над рядками"""
+        self.active = True
+        self.textbox._y_scrollbar.configure(command=self._on_scrollbar)
+        self.reset()
+        self.scroll_to(0, force=True)
+    
+    def deactivate(self):
+        """Звичайний режим: віджет містить увесь текст"""
+        if not self.active:
+            return
+        self.active = False
+        self.textbox._y_scrollbar.configure(command=self.inner.yview)
+        self.reset()
+    
+    def reset(self):
+        """Вікно порожнє (віджет очищено ззовні)"""
+        self.first = self.count = self.top = 0
+        self.dirty = False
+    
+    def visible_rows(self):
+        """Скільки рядків вміщується у видиму частину віджета"""
+        info = self.inner.dlineinfo("@0,0")
+        line_height = info[3] if info else 18
+        return max(1, self.inner.winfo_height() // max(1, line_height))
+    
+    def _on_edit(self, event=None):
+        if self.active:
+            self.dirty = True
+    
+    def sync_edits(self):
+        """Перенесення правок з вікна у список рядків"""
+        if not self.active or not self.dirty:
+            return
+        self.dirty = False
+        # Частковий переклад (потоковий вивід) - не частина тексту
+        ranges = self.inner.tag_ranges("streaming")
+        text = self.inner.get("1.0", ranges[0] if ranges else "end-1c")
+        window_lines = text.split("\n")
+        self.get_lines()[self.first:self.first + self.count] = window_lines
+        self.count = len(window_lines)
+    
+    def text(self):
+        """Увесь текст (з правками у вікні)"""
+        self.sync_edits()
+        return "\n".join(self.get_lines())
+    
+    def scroll_to(self, top, force=False, notify=False):
+        """Показ рядків починаючи з top; вікно перемальовується, лише коли видима частина біля його краю"""
+        lines = self.get_lines()
+        total = len(lines)
+        rows = self.visible_rows()
+        top = max(0, min(top, total - rows))
+        
+        reserve = self.margin // 4
+        near_start = top < self.first + reserve and self.first > 0
+        near_end = top + rows > self.first + self.count - reserve and self.first + self.count < total
+        if force or near_start or near_end or top + rows > self.first + self.count:
+            self._render(lines, max(0, top - self.margin), min(total, top + rows + self.margin))
+        
+        changed = top != self.top
+        self.top = top
+        self.inner.yview(f"{top - self.first + 1}.0")
+        self._update_scrollbar(total, rows)
+        if notify and changed and self.on_scroll:
+            self.on_scroll(top)
+    
+    def scroll_to_end(self):
+        """Прокрутка в кінець (новий рядок перекладу)"""
+        self.scroll_to(len(self.get_lines()))
+        self.inner.see("end")
+    
+    def follow_tail(self):
+        """Нові рядки в кінці списку дописуються у вікно, яке тримається біля кінця"""
+        self.sync_edits()
+        lines = self.get_lines()
+        total = len(lines)
+        end = self.first + self.count
+        if end > total or total - end > self.margin:
+            self.scroll_to_end()
+            return
+        
+        state = self.inner.cget("state")
+        self.inner.configure(state="normal")
+        if end < total:
+            self.inner.insert("end", ("\n" if self.count else "") + "\n".join(lines[end:total]))
+            self.count = total - self.first
+        # Вікно не росте: зайві рядки зверху видаляються
+        rows = self.visible_rows()
+        excess = self.count - (rows + 2 * self.margin)
+        if excess > 0:
+            self.inner.delete("1.0", f"{excess + 1}.0")
+            self.first += excess
+            self.count -= excess
+            if self.on_render:
+                self.on_render()
+        self.inner.configure(state=state)
+        
+        self.top = max(self.first, total - rows)
+        self.inner.see("end")
+        self._update_scrollbar(total, rows)
+    
+    def goto(self, line, column=0):
+        """Перехід до позиції (рядок, стовпчик) у всьому тексті; повертає індекс у віджеті"""
+        self.scroll_to(line - self.visible_rows() // 2)
+        index = f"{line - self.first + 1}.{column}"
+        self.inner.mark_set("insert", index)
+        self.inner.see(index)
+        return index
+    
+    def find(self, query):
+        """Усі входження (рядок, стовпчик) запиту в нижньому регістрі"""
+        matches = []
+        for idx, line in enumerate(self.get_lines()):
+            lowered = line.lower()
+            column = lowered.find(query)
+            while column >= 0:
+                matches.append((idx, column))
+                column = lowered.find(query, column + len(query))
+        return matches
+    
+    def _render(self, lines, first, last):
+        """Заміна вмісту віджета рядками first..last"""
+        self.sync_edits()
+        state = self.inner.cget("state")
+        self.inner.configure(state="normal")
+        content = "\n".join(lines[first:last])
+        self.inner.delete("1.0", "end")
+        self.inner.insert("1.0", content)
+        self.inner.configure(state=state)
+        self.first = first
+        self.count = last - first
+        
+        if self.query:
+            self.tag_query()
+        if self.on_render:
+            self.on_render()
+    
+    def tag_query(self):
+        """Підсвітка пошукового запиту в поточному вікні"""
+        start = "1.0"
+        while True:
+            pos = self.inner.search(self.query, start, nocase=True, stopindex="end")
+            if not pos:
+                break
+            start = f"{pos}+{len(self.query)}c"
+            self.inner.tag_add("search", pos, start)
+    
+    def _update_scrollbar(self, total, rows):
+        if total:
+            self.textbox._y_scrollbar.set(self.top / total, min(1.0, (self.top + rows) / total))
+        else:
+            self.textbox._y_scrollbar.set(0.0, 1.0)
+    
+    def _on_widget_scroll(self, first, last):
+        """Прокрутка всередині вікна (колесо, клавіші, see) -> позиція у всьому тексті"""
+        if not self.active:
+            self.textbox._y_scrollbar.set(first, last)
+        else:
+            top = self.first + int(self.inner.index("@0,0").split(".")[0]) - 1
+            if top != self.top:
+                self.scroll_to(top, notify=True)
+            else:
+                self._update_scrollbar(len(self.get_lines()), self.visible_rows())
+        if self.on_view:
+            self.on_view()
+    
+    def _on_scrollbar(self, action, amount, unit=None):
+        """Смуга прокрутки керує позицією у всьому тексті, а не у вікні"""
+        if action == "moveto":
+            top = int(float(amount) * len(self.get_lines()))
+        else:
+            step = self.visible_rows() if unit == "pages" else 1
+            top = self.top + int(amount) * step
+        self.scroll_to(top, notify=True)
+
+
+class SyntaxHighlighter:
+    """
+    Підсвітка синтаксису видимої частини текстового поля. Рядки розбираються у фоновому
+    потоці, повторно - лише ті, текст яких змінився; готові діапазони застосовуються
+    одним викликом tag_add на тег.
+    """
+    
+    # (тег, шаблон, скільки символів відкинути з кінця збігу, символи без яких збігу не буде)
+    PATTERNS = [
+        ("speaker", re.compile(r'\[[A-Z_]+:[^\]]+\]'), 0, "["),               # [SPEAKER: Name]
+        ("key", re.compile(r'"[^"]+"\s*:'), 1, '"'),                          # JSON ключі "key":
+        ("string", re.compile(r'"[^"]*"'), 0, '"'),                           # Рядки в лапках
+        ("placeholder", re.compile(r'\{[^}]+\}|%[sdif]|\$\w+'), 0, "{%$"),    # {var}, %s, $var
+        ("tag", re.compile(r'<[^>]+>'), 0, "<"),                              # HTML/XML теги
+        ("number", re.compile(r'\b\d+\.?\d*\b'), 0, "0123456789"),            # Числа
+        ("bracket", re.compile(r'[\[\]{}(),]'), 0, "[]{}(),"),                # Дужки
+        ("comment", re.compile(r'//.*$|#.*$'), 0, "/#"),                      # Коментарі
+    ]
+    TAGS = [tag for tag, _, _, _ in PATTERNS]
+    
+    def __init__(self, textbox, margin=100):
+        self.inner = textbox._textbox
+        self.margin = margin
+        self.highlighted = {}  # номер рядка у віджеті -> текст, для якого стоять теги
+        self.generation = 0  # змінюється при заміні вмісту - старі результати відкидаються
+        self.jobs = queue.Queue()
+        threading.Thread(target=self._worker, daemon=True).start()
+        
+        # Правки: перерозбираються лише змінені рядки (після того, як віджет їх застосує)
+        for sequence in ("<KeyRelease>", "<<Paste>>", "<<Cut>>", "<<Undo>>", "<<Redo>>"):
+            self.inner.bind(sequence, lambda event: self.inner.after_idle(self.highlight_visible), add="+")
+    
+    def reset(self):
+        """Вміст віджета замінено - підсвітку треба будувати заново"""
+        self.highlighted = {}
+        self.generation += 1
+    
+    def highlight_visible(self):
+        """Розбір видимих рядків (із запасом), текст яких змінився з останньої підсвітки"""
+        first_visible = int(self.inner.index("@0,0").split(".")[0])
+        last_visible = int(self.inner.index(f"@0,{self.inner.winfo_height()}").split(".")[0])
+        first = max(1, first_visible - self.margin)
+        last = min(int(self.inner.index("end-1c").split(".")[0]), last_visible + self.margin)
+        texts = self.inner.get(f"{first}.0", f"{last}.end").split("\n")
+        
+        changed = [first + i for i, text in enumerate(texts) if self.highlighted.get(first + i) != text]
+        if not changed:
+            return
+        # Один суцільний діапазон - теги знімаються і ставляться одним викликом на тег
+        start, end = changed[0], changed[-1]
+        span = texts[start - first:end - first + 1]
+        for line_no, text in enumerate(span, start):
+            self.highlighted[line_no] = text
+        self.jobs.put((self.generation, start, end, span))
+    
+    @classmethod
+    def tokenize(cls, first_line, texts):
+        """Діапазони підсвітки: {тег: [початок, кінець, початок, кінець, ...]} в індексах Tk"""
+        ranges = {tag: [] for tag in cls.TAGS}
+        for line_no, line in enumerate(texts, first_line):
+            for tag, pattern, trim, required in cls.PATTERNS:
+                if not any(char in line for char in required):
+                    continue
+                indices = ranges[tag]
+                for match in pattern.finditer(line):
+                    indices.append(f"{line_no}.{match.start()}")
+                    indices.append(f"{line_no}.{match.end() - trim}")
+        return ranges
+    
+    def _worker(self):
+        """Фоновий потік: розбір рядків, застосування - в main loop"""
+        while True:
+            generation, start, end, texts = self.jobs.get()
+            ranges = self.tokenize(start, texts)
+            self.inner.after(0, self._apply, generation, start, end, ranges)
+    
+    def _apply(self, generation, start, end, ranges):
+        if generation != self.generation:
+            return
+        for tag in self.TAGS:
+            self.inner.tag_remove(tag, f"{start}.0", f"{end}.end")
+            if ranges[tag]:
+                self.inner.tag_add(tag, *ranges[tag])
+
+
 class TranslatorApp(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -46,8 +351,18 @@ class TranslatorApp(ctk.CTk):
         self.file_path = None
         self.original_lines = []
         self.translated_lines = []
+        # Великий файл: в пам'яті лише перші рядки, переклад пишеться потоково у файл -ukr
+        self.stream_mode = False
+        self.stream_output_path = None
+        # Оновлення від робочого потоку: (індекс, рядок, всього) або (None, частковий переклад, None)
+        self.ui_updates = queue.Queue()
         self.is_translating = False
+        self.glossary_resending = False  # Фоновий повторний переклад рядків з порушенням глосарію
         self.client = None
+        self.engine = None
+        self.last_report = None  # (підсумки телеметрії, шлях JSON звіту) останнього перекладу
+        self.async_backend = None  # Асинхронний клієнт, пул з'єднань живе між запусками
+        self.async_backend_key = None
         
         # Статистика
         self.translation_start_time = None
@@ -55,12 +370,26 @@ class TranslatorApp(ctk.CTk):
         
         # Глосарій термінів (власні переклади)
         self.glossary = {}
+        self.glossary_index = GlossaryIndex()  # Оновлюється разом з редагуванням глосарію
         self._load_glossary()
         
         # Історія файлів
         self.recent_files = []
         self._load_recent_files()
         
+        # Пакетний переклад - максимум сегментів в одному запиті
+        self.batch_max_segments = 40
+        
+        # Власні бюджети токенів моделей {"префікс назви": {"context": ..., "output": ...}}
+        self.model_budgets = {}
+        self.provider_pool = []  # Додаткові провайдери для балансування (provider_pool у налаштуваннях)
+        
+        # Пам'ять перекладів (кеш між запусками)
+        try:
+            self.translation_memory = TranslationMemory("translation_memory.db")
+        except sqlite3.Error:
+            self.translation_memory = None
+        
         # Автозбереження
         self.autosave_enabled = True
         self.autosave_interval = 30  # секунд
@@ -69,30 +398,7 @@ class TranslatorApp(ctk.CTk):
         self.games_window = None
         
         # Провайдери API
-        self.providers = {
-            "OpenAI": {"url": "https://api.openai.com/v1", "models": ["gpt-4o-mini", "gpt-4o", "gpt-4-turbo", "gpt-4.1-mini", "gpt-4.1", "o1-mini", "o1"], "needs_key": True},
-            "Anthropic": {"url": "https://api.anthropic.com/v1", "models": ["claude-3-5-sonnet-20241022", "claude-3-5-haiku-20241022", "claude-3-opus-20240229"], "needs_key": True},
-            "DeepSeek": {"url": "https://api.deepseek.com/v1", "models": ["deepseek-chat", "deepseek-coder", "deepseek-reasoner"], "needs_key": True},
-            "Google AI": {"url": "https://generativelanguage.googleapis.com/v1beta/openai", "models": ["gemini-2.0-flash", "gemini-1.5-pro", "gemini-1.5-flash"], "needs_key": True},
-            "Mistral": {"url": "https://api.mistral.ai/v1", "models": ["mistral-large-latest", "mistral-medium-latest", "mistral-small-latest", "codestral-latest"], "needs_key": True},
-            "Groq": {"url": "https://api.groq.com/openai/v1", "models": ["llama-3.3-70b-versatile", "llama-3.1-8b-instant", "mixtral-8x7b-32768", "gemma2-9b-it"], "needs_key": True},
-            "OpenRouter": {"url": "https://openrouter.ai/api/v1", "models": ["openai/gpt-4o-mini", "anthropic/claude-3.5-sonnet", "google/gemini-2.0-flash-exp:free", "deepseek/deepseek-chat"], "needs_key": True},
-            "Together": {"url": "https://api.together.xyz/v1", "models": ["meta-llama/Llama-3.3-70B-Instruct-Turbo", "mistralai/Mixtral-8x7B-Instruct-v0.1", "Qwen/Qwen2.5-72B-Instruct-Turbo"], "needs_key": True},
-            "Fireworks": {"url": "https://api.fireworks.ai/inference/v1", "models": ["accounts/fireworks/models/llama-v3p1-70b-instruct", "accounts/fireworks/models/mixtral-8x7b-instruct"], "needs_key": True},
-            "Cerebras": {"url": "https://api.cerebras.ai/v1", "models": ["llama3.1-70b", "llama3.1-8b"], "needs_key": True},
-            "Perplexity": {"url": "https://api.perplexity.ai", "models": ["llama-3.1-sonar-large-128k-chat", "llama-3.1-sonar-small-128k-chat"], "needs_key": True},
-            "Cohere": {"url": "https://api.cohere.ai/v1", "models": ["command-r-plus", "command-r", "command"], "needs_key": True},
-            "─── Локальні LLM ───": {"url": "", "models": [], "needs_key": False, "separator": True},
-            "Ollama": {"url": "http://localhost:11434/v1", "models": ["llama3.2", "llama3.1", "mistral", "gemma2", "qwen2.5", "phi3", "deepseek-r1"], "needs_key": False},
-            "LM Studio": {"url": "http://localhost:1234/v1", "models": ["local-model"], "needs_key": False},
-            "LocalAI": {"url": "http://localhost:8080/v1", "models": ["gpt-4", "ggml-model"], "needs_key": False},
-            "Text Gen WebUI": {"url": "http://localhost:5000/v1", "models": ["local-model"], "needs_key": False},
-            "Jan": {"url": "http://localhost:1337/v1", "models": ["local-model"], "needs_key": False},
-            "GPT4All": {"url": "http://localhost:4891/v1", "models": ["local-model"], "needs_key": False},
-            "Kobold": {"url": "http://localhost:5001/v1", "models": ["local-model"], "needs_key": False},
-            "vLLM": {"url": "http://localhost:8000/v1", "models": ["local-model"], "needs_key": False},
-            "Власний URL": {"url": "", "models": [], "needs_key": True}
-        }
+        self.providers = dict(PROVIDERS)
         
         # Кольори
         self.colors = {
@@ -202,6 +508,17 @@ class TranslatorApp(ctk.CTk):
         )
         self.recent_menu_btn.pack(side="left", padx=(0, 10))
         
+        # Переклад проєкту (папки)
+        self.project_btn = ctk.CTkButton(
+            right_frame, text="📁 Проєкт",
+            width=100, height=32,
+            font=ctk.CTkFont(size=12),
+            fg_color=self.colors["bg_input"],
+            hover_color=self.colors["border"],
+            command=self._open_batch_window
+        )
+        self.project_btn.pack(side="left", padx=(0, 10))
+        
         # Міні-ігри
         self.games_btn = ctk.CTkButton(
             right_frame, text="🎮 Ігри",
@@ -351,6 +668,72 @@ class TranslatorApp(ctk.CTk):
         )
         self.custom_model_entry.pack(side="left")
         
+        # Кількість одночасних запитів до API
+        ctk.CTkLabel(
+            row2_frame, text="Потоки:",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=self.colors["text"]
+        ).pack(side="left", padx=(20, 10))
+        
+        self.concurrency_var = ctk.StringVar(value="1")
+        self.concurrency_menu = ctk.CTkOptionMenu(
+            row2_frame, width=70, height=38,
+            values=["1", "2", "4", "8", "16", "32", "64", "128", "256"],
+            variable=self.concurrency_var,
+            font=ctk.CTkFont(size=13),
+            fg_color=self.colors["bg_input"],
+            button_color=self.colors["accent"],
+            button_hover_color=self.colors["accent_hover"],
+            dropdown_fg_color=self.colors["bg_card"],
+            dropdown_hover_color=self.colors["bg_input"]
+        )
+        self.concurrency_menu.pack(side="left")
+        
+        # Пакетний режим - кілька сегментів в одному запиті (ліміт символів)
+        ctk.CTkLabel(
+            row2_frame, text="Пакет:",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=self.colors["text"]
+        ).pack(side="left", padx=(15, 10))
+        
+        self.batch_var = ctk.StringVar(value="Вимк.")
+        self.batch_menu = ctk.CTkOptionMenu(
+            row2_frame, width=90, height=38,
+            values=["Вимк.", "500", "1000", "2000", "4000", "8000"],
+            variable=self.batch_var,
+            font=ctk.CTkFont(size=13),
+            fg_color=self.colors["bg_input"],
+            button_color=self.colors["accent"],
+            button_hover_color=self.colors["accent_hover"],
+            dropdown_fg_color=self.colors["bg_card"],
+            dropdown_hover_color=self.colors["bg_input"]
+        )
+        self.batch_menu.pack(side="left")
+        
+        # Асинхронний режим - всі запити в одному event loop з пулом з'єднань
+        self.async_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            row2_frame, text="Async",
+            variable=self.async_var,
+            width=70,
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=self.colors["text"],
+            fg_color=self.colors["accent"],
+            hover_color=self.colors["accent_hover"]
+        ).pack(side="left", padx=(15, 0))
+        
+        # Пул провайдерів - запити розподіляються між основним і provider_pool з налаштувань
+        self.pool_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            row2_frame, text="Пул",
+            variable=self.pool_var,
+            width=60,
+            font=ctk.CTkFont(size=13, weight="bold"),
+            text_color=self.colors["text"],
+            fg_color=self.colors["accent"],
+            hover_color=self.colors["accent_hover"]
+        ).pack(side="left", padx=(10, 0))
+        
         # Кнопка тестування з'єднання
         self.test_btn = ctk.CTkButton(
             row2_frame, text="🔌 Тест",
@@ -399,40 +782,48 @@ class TranslatorApp(ctk.CTk):
         self._update_status(f"Вибрано: {provider_name}", self.colors["accent"])
     
     def _test_connection(self):
-        """Тестування з'єднання з API"""
+        """Тестування з'єднання з API (кілька Base URL через кому - кожен сервер паралельно)"""
         def test_thread():
-            try:
-                api_key = self.api_key_entry.get() or "not-needed"
-                base_url = self.base_url_entry.get()
-                
-                if not base_url:
-                    self.after(0, lambda: self._update_status("❌ Введіть Base URL", "#da3633"))
-                    return
-                
-                client = OpenAI(api_key=api_key, base_url=base_url, timeout=10)
-                
-                # Спробуємо отримати список моделей
-                try:
-                    models = client.models.list()
-                    model_names = [m.id for m in models.data][:5]
-                    self.after(0, lambda: self._update_status(
-                        f"✅ З'єднання успішне! Моделі: {', '.join(model_names)}...", 
-                        self.colors["success"]
-                    ))
-                    
-                    # Оновлюємо список моделей якщо отримали
-                    if model_names:
-                        self.after(0, lambda: self._update_model_list(model_names))
-                except:
-                    # Якщо не можемо отримати моделі, просто перевіряємо чи відповідає сервер
-                    self.after(0, lambda: self._update_status(
-                        "✅ Сервер відповідає (список моделей недоступний)", 
-                        self.colors["success"]
-                    ))
-                    
-            except Exception as e:
-                error_msg = str(e)[:50]
+            api_key = self.api_key_entry.get()
+            base_urls = split_base_urls(self.base_url_entry.get())
+            
+            if not base_urls:
+                self.after(0, lambda: self._update_status("❌ Введіть Base URL", "#da3633"))
+                return
+            
+            with ThreadPoolExecutor(max_workers=len(base_urls)) as executor:
+                results = list(executor.map(lambda url: probe_endpoint(api_key, url), base_urls))
+            
+            model_names = next((models[:5] for _, models, _, _ in results if models), [])
+            alive = [alive for alive, _, _, _ in results]
+            if len(base_urls) > 1:
+                # Кілька серверів: скільки відповідає і за який час
+                details = ", ".join(
+                    f"{url.split('//')[-1]} {'✅' if ok else '❌'} {seconds:.1f}с"
+                    for url, (ok, _, seconds, _) in zip(base_urls, results)
+                )
+                color = self.colors["success"] if all(alive) else (self.colors["warning"] if any(alive) else "#da3633")
+                self.after(0, lambda: self._update_status(
+                    f"🔌 Сервери: {sum(alive)} з {len(base_urls)} відповідають ({details})", color
+                ))
+            elif model_names:
+                self.after(0, lambda: self._update_status(
+                    f"✅ З'єднання успішне! Моделі: {', '.join(model_names)}...", 
+                    self.colors["success"]
+                ))
+            elif alive[0]:
+                # Якщо не можемо отримати моделі, просто перевіряємо чи відповідає сервер
+                self.after(0, lambda: self._update_status(
+                    "✅ Сервер відповідає (список моделей недоступний)", 
+                    self.colors["success"]
+                ))
+            else:
+                error_msg = str(results[0][3])[:50]
                 self.after(0, lambda: self._update_status(f"❌ Помилка: {error_msg}", "#da3633"))
+            
+            # Оновлюємо список моделей якщо отримали
+            if model_names:
+                self.after(0, lambda: self._update_model_list(model_names))
         
         self._update_status("🔄 Тестування з'єднання...", self.colors["warning"])
         threading.Thread(target=test_thread, daemon=True).start()
@@ -496,7 +887,21 @@ class TranslatorApp(ctk.CTk):
             command=self._stop_translation,
             state="disabled"
         )
-        self.stop_btn.pack(side="left")
+        self.stop_btn.pack(side="left", padx=(0, 15))
+        
+        # Кнопка продовження перерваного перекладу
+        self.resume_btn = ctk.CTkButton(
+            controls_frame, text="↻ Продовжити",
+            width=140, height=45,
+            font=ctk.CTkFont(size=14, weight="bold"),
+            fg_color=self.colors["bg_input"],
+            hover_color=self.colors["border"],
+            text_color="white",
+            text_color_disabled=self.colors["text_muted"],
+            command=lambda: self._start_translation(resume=True),
+            state="disabled"
+        )
+        self.resume_btn.pack(side="left")
         
         # Кнопка збереження
         self.save_btn = ctk.CTkButton(
@@ -545,6 +950,19 @@ class TranslatorApp(ctk.CTk):
         )
         self.speed_label.pack(side="left", padx=(20, 0))
         
+        # Звіт про останній переклад
+        self.report_btn = ctk.CTkButton(
+            inner, text="📈 Звіт", width=80, height=26,
+            font=ctk.CTkFont(size=12),
+            fg_color=self.colors["bg_input"],
+            hover_color=self.colors["border"],
+            text_color=self.colors["text"],
+            text_color_disabled=self.colors["text_muted"],
+            command=self._show_run_report,
+            state="disabled"
+        )
+        self.report_btn.pack(side="left", padx=(15, 0))
+        
         # Лічильник рядків
         self.lines_label = ctk.CTkLabel(
             inner, text="0 / 0 рядків",
@@ -553,6 +971,22 @@ class TranslatorApp(ctk.CTk):
         )
         self.lines_label.pack(side="right")
         
+        # Статистика кешу перекладів
+        self.cache_label = ctk.CTkLabel(
+            inner, text="",
+            font=ctk.CTkFont(size=12),
+            text_color=self.colors["text_muted"]
+        )
+        self.cache_label.pack(side="right", padx=(0, 20))
+        
+        # Поточні ліміти провайдера та час очікування на них
+        self.rate_label = ctk.CTkLabel(
+            inner, text="",
+            font=ctk.CTkFont(size=12),
+            text_color=self.colors["text_muted"]
+        )
+        self.rate_label.pack(side="right", padx=(0, 20))
+        
         # Прогрес бар
         self.progress_bar = ctk.CTkProgressBar(
             progress_frame, height=8,
@@ -626,6 +1060,45 @@ class TranslatorApp(ctk.CTk):
         )
         self.search_result_label.pack(side="left", padx=(15, 0))
         
+        # === ПАМ'ЯТЬ ПЕРЕКЛАДІВ ===
+        memory_frame = ctk.CTkFrame(tools_frame, fg_color=self.colors["bg_card"],
+                                     corner_radius=10, border_width=1,
+                                     border_color=self.colors["border"])
+        memory_frame.pack(side="right", padx=(10, 0))
+        
+        memory_inner = ctk.CTkFrame(memory_frame, fg_color="transparent")
+        memory_inner.pack(fill="x", padx=15, pady=10)
+        
+        self.use_cache_var = ctk.BooleanVar(value=True)
+        ctk.CTkCheckBox(
+            memory_inner, text="🧠 Кеш перекладів",
+            variable=self.use_cache_var,
+            font=ctk.CTkFont(size=12),
+            text_color=self.colors["text"],
+            fg_color=self.colors["accent"],
+            hover_color=self.colors["accent_hover"]
+        ).pack(side="left", padx=(0, 10))
+        
+        # Потоковий вивід - переклад з'являється по мірі генерації токенів
+        self.stream_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            memory_inner, text="⚡ Потоковий вивід",
+            variable=self.stream_var,
+            font=ctk.CTkFont(size=12),
+            text_color=self.colors["text"],
+            fg_color=self.colors["accent"],
+            hover_color=self.colors["accent_hover"]
+        ).pack(side="left", padx=(0, 10))
+        
+        ctk.CTkButton(
+            memory_inner, text="🗑️ Очистити",
+            width=100, height=32,
+            font=ctk.CTkFont(size=12),
+            fg_color=self.colors["bg_input"],
+            hover_color="#da3633",
+            command=self._purge_translation_memory
+        ).pack(side="left")
+        
         # === ГЛОСАРІЙ ===
         glossary_frame = ctk.CTkFrame(tools_frame, fg_color=self.colors["bg_card"],
                                        corner_radius=10, border_width=1,
@@ -782,6 +1255,24 @@ class TranslatorApp(ctk.CTk):
         # Налаштування тегів для підсвітки синтаксису (переклад)
         self._setup_syntax_tags(self.translated_text, is_translation=True)
         
+        # Підсвітка видимої частини (розбір у фоновому потоці)
+        self.original_highlighter = SyntaxHighlighter(self.original_text)
+        self.translated_highlighter = SyntaxHighlighter(self.translated_text)
+        
+        # Віртуальний перегляд великих файлів (вмикається при завантаженні)
+        self.original_pane = VirtualPane(
+            self.original_text, lambda: self.original_lines,
+            on_render=self.original_highlighter.reset,
+            on_scroll=lambda top: self._on_pane_scroll(self.translated_pane, top),
+            on_view=self.original_highlighter.highlight_visible
+        )
+        self.translated_pane = VirtualPane(
+            self.translated_text, lambda: self.translated_lines,
+            on_render=self.translated_highlighter.reset,
+            on_scroll=lambda top: self._on_pane_scroll(self.original_pane, top),
+            on_view=self.translated_highlighter.highlight_visible
+        )
+        
         # Синхронізація скролу
         self._sync_scroll()
     
@@ -801,6 +1292,8 @@ class TranslatorApp(ctk.CTk):
             inner_text.tag_configure("tag", foreground="#7ee787")        # Теги - зелений
             inner_text.tag_configure("comment", foreground="#6e7681", font=("JetBrains Mono", 12, "italic"))
             inner_text.tag_configure("speaker", foreground="#d2a8ff", font=("JetBrains Mono", 13, "bold"))
+            # Переклад, що ще генерується (потоковий вивід)
+            inner_text.tag_configure("streaming", foreground="#8b949e", font=("JetBrains Mono", 13, "italic"))
         else:
             # Оригінал - холодніші тони
             inner_text.tag_configure("key", foreground="#79c0ff")        # Ключі - блакитний
@@ -815,67 +1308,6 @@ class TranslatorApp(ctk.CTk):
         # Номери рядків
         inner_text.tag_configure("line_num", foreground="#484f58")
     
-    def _apply_syntax_highlighting(self, textbox, content):
-        """Застосування підсвітки синтаксису до тексту"""
-        inner_text = textbox._textbox
-        
-        # Очищаємо теги
-        for tag in ["key", "string", "number", "bracket", "placeholder", "tag", "comment", "speaker"]:
-            inner_text.tag_remove(tag, "1.0", "end")
-        
-        lines = content.split("\n")
-        
-        for line_num, line in enumerate(lines, 1):
-            line_start = f"{line_num}.0"
-            
-            # Спікер [SPEAKER: Name]
-            for match in re.finditer(r'\[[A-Z_]+:[^\]]+\]', line):
-                start = f"{line_num}.{match.start()}"
-                end = f"{line_num}.{match.end()}"
-                inner_text.tag_add("speaker", start, end)
-            
-            # JSON ключі "key":
-            for match in re.finditer(r'"[^"]+"\s*:', line):
-                start = f"{line_num}.{match.start()}"
-                end = f"{line_num}.{match.end() - 1}"
-                inner_text.tag_add("key", start, end)
-            
-            # Рядки в лапках
-            for match in re.finditer(r'"[^"]*"', line):
-                start = f"{line_num}.{match.start()}"
-                end = f"{line_num}.{match.end()}"
-                inner_text.tag_add("string", start, end)
-            
-            # Плейсхолдери {var}, %s, $var
-            for match in re.finditer(r'\{[^}]+\}|%[sdif]|\$\w+', line):
-                start = f"{line_num}.{match.start()}"
-                end = f"{line_num}.{match.end()}"
-                inner_text.tag_add("placeholder", start, end)
-            
-            # HTML/XML теги
-            for match in re.finditer(r'<[^>]+>', line):
-                start = f"{line_num}.{match.start()}"
-                end = f"{line_num}.{match.end()}"
-                inner_text.tag_add("tag", start, end)
-            
-            # Числа
-            for match in re.finditer(r'\b\d+\.?\d*\b', line):
-                start = f"{line_num}.{match.start()}"
-                end = f"{line_num}.{match.end()}"
-                inner_text.tag_add("number", start, end)
-            
-            # Дужки
-            for match in re.finditer(r'[\[\]{}(),]', line):
-                start = f"{line_num}.{match.start()}"
-                end = f"{line_num}.{match.end()}"
-                inner_text.tag_add("bracket", start, end)
-            
-            # Коментарі
-            for match in re.finditer(r'//.*$|#.*$', line):
-                start = f"{line_num}.{match.start()}"
-                end = f"{line_num}.{match.end()}"
-                inner_text.tag_add("comment", start, end)
-    
     def _sync_scroll(self):
         """Синхронізація скролу між двома текстовими полями"""
         def on_scroll_original(*args):
@@ -884,16 +1316,23 @@ class TranslatorApp(ctk.CTk):
         def on_scroll_translated(*args):
             self.original_text.yview_moveto(args[0])
         
-        # Bind mouse wheel
+        # Bind mouse wheel (віртуальні панелі синхронізуються за номером рядка - _on_pane_scroll)
         def on_mousewheel_original(event):
-            self.translated_text.yview_scroll(int(-1*(event.delta/120)), "units")
+            if not self.original_pane.active:
+                self.translated_text.yview_scroll(int(-1*(event.delta/120)), "units")
         
         def on_mousewheel_translated(event):
-            self.original_text.yview_scroll(int(-1*(event.delta/120)), "units")
+            if not self.translated_pane.active:
+                self.original_text.yview_scroll(int(-1*(event.delta/120)), "units")
         
         self.original_text.bind("<MouseWheel>", on_mousewheel_original)
         self.translated_text.bind("<MouseWheel>", on_mousewheel_translated)
     
+    def _on_pane_scroll(self, other_pane, top):
+        """Прокрутка віртуальної панелі -> той самий логічний рядок у другій"""
+        if other_pane.active:
+            other_pane.scroll_to(top)
+    
     def _create_footer(self):
         """Footer з інформацією"""
         footer_frame = ctk.CTkFrame(self.main_frame, fg_color="transparent", height=30)
@@ -943,6 +1382,29 @@ class TranslatorApp(ctk.CTk):
                     custom_model = settings.get("custom_model", "")
                     if custom_model:
                         self.custom_model_entry.insert(0, custom_model)
+                    
+                    # Кількість потоків
+                    self.concurrency_var.set(str(settings.get("concurrency", 1)))
+                    
+                    # Пакетний режим
+                    batch_chars = settings.get("batch_chars", 0)
+                    self.batch_var.set(str(batch_chars) if batch_chars else "Вимк.")
+                    
+                    # Кеш перекладів
+                    self.use_cache_var.set(settings.get("use_cache", True))
+                    
+                    # Потоковий вивід
+                    self.stream_var.set(settings.get("stream", False))
+                    
+                    # Асинхронний режим
+                    self.async_var.set(settings.get("async_backend", False))
+                    
+                    # Бюджети токенів (редагуються лише у файлі налаштувань)
+                    self.model_budgets = settings.get("model_budgets", {})
+                    
+                    # Пул провайдерів (список - лише у файлі налаштувань)
+                    self.provider_pool = settings.get("provider_pool", [])
+                    self.pool_var.set(settings.get("use_pool", False))
             except:
                 pass
     
@@ -953,7 +1415,15 @@ class TranslatorApp(ctk.CTk):
             "api_key": self.api_key_entry.get(),
             "base_url": self.base_url_entry.get() or "https://api.openai.com/v1",
             "model": self.model_var.get(),
-            "custom_model": self.custom_model_entry.get()
+            "custom_model": self.custom_model_entry.get(),
+            "concurrency": self._get_concurrency(),
+            "batch_chars": self._get_batch_chars(),
+            "use_cache": self.use_cache_var.get(),
+            "stream": self.stream_var.get(),
+            "async_backend": self.async_var.get(),
+            "model_budgets": self.model_budgets,
+            "use_pool": self.pool_var.get(),
+            "provider_pool": self.provider_pool
         }
         with open("translator_settings.json", "w", encoding="utf-8") as f:
             json.dump(settings, f, indent=2)
@@ -986,6 +1456,11 @@ class TranslatorApp(ctk.CTk):
     
     def _load_file(self):
         """Завантаження файлу"""
+        self.stream_mode = False
+        self.stream_output_path = None
+        if is_large_file(self.file_path):
+            self._load_large_file()
+            return
         try:
             with open(self.file_path, "r", encoding="utf-8") as f:
                 content = f.read()
@@ -993,11 +1468,19 @@ class TranslatorApp(ctk.CTk):
             self.original_lines = content.split("\n")
             self.translated_lines = [""] * len(self.original_lines)
             
-            # Відображення в текстовому полі
+            # Відображення в текстовому полі (великий файл - лише видима частина)
+            virtual = len(self.original_lines) > VIRTUAL_LINES
             self.original_text.delete("1.0", "end")
-            self.original_text.insert("1.0", content)
-            
             self.translated_text.delete("1.0", "end")
+            self.original_highlighter.reset()
+            self.translated_highlighter.reset()
+            if virtual:
+                self.original_pane.activate()
+                self.translated_pane.activate()
+            else:
+                self.original_pane.deactivate()
+                self.translated_pane.deactivate()
+                self.original_text.insert("1.0", content)
             
             # Оновлення лічильників
             total_lines = len(self.original_lines)
@@ -1005,6 +1488,7 @@ class TranslatorApp(ctk.CTk):
             self.lines_label.configure(text=f"0 / {total_lines} рядків")
             
             self.translate_btn.configure(state="normal")
+            self._update_resume_button()
             self._update_status(f"📂 Файл завантажено: {total_lines} рядків", self.colors["accent"])
             
             # Додати в історію
@@ -1013,593 +1497,325 @@ class TranslatorApp(ctk.CTk):
             # Оновити статистику
             self._update_text_stats()
             
-            # Застосувати підсвітку синтаксису
-            self.after(100, lambda: self._apply_syntax_highlighting(self.original_text, content))
-            
+            # Підсвітка синтаксису видимої частини (далі - при прокрутці)
+            self.after(100, self.original_highlighter.highlight_visible)
+        
         except Exception as e:
             messagebox.showerror("Помилка", f"Не вдалося завантажити файл:\n{str(e)}")
     
-    def _start_translation(self):
-        """Початок перекладу"""
-        provider = self.provider_var.get()
-        needs_key = self.providers.get(provider, {}).get("needs_key", True)
-        
-        api_key = self.api_key_entry.get()
-        if needs_key and not api_key:
-            messagebox.showwarning("Увага", "Введіть API ключ!")
+    def _load_large_file(self):
+        """Великий файл: показуємо лише перші рядки, переклад буде потоковим"""
+        try:
+            reader = LineReader(self.file_path)
+            self.original_lines = []
+            for line in reader:
+                self.original_lines.append(line)
+                if len(self.original_lines) >= PREVIEW_LINES:
+                    break
+        except Exception as e:
+            messagebox.showerror("Помилка", f"Не вдалося завантажити файл:\n{str(e)}")
             return
         
-        # Для локальних моделей використовуємо фіктивний ключ
-        if not api_key:
-            api_key = "not-needed"
+        self.stream_mode = True
+        self.translated_lines = []
+        self.original_pane.deactivate()
+        self.translated_pane.deactivate()
+        content = "\n".join(self.original_lines)
+        self.original_text.delete("1.0", "end")
+        self.original_text.insert("1.0", content)
+        self.translated_text.delete("1.0", "end")
+        self.original_highlighter.reset()
+        self.translated_highlighter.reset()
+        
+        total_lines = reader.estimated_total
+        size_mb = reader.size / (1024 * 1024)
+        self.original_lines_label.configure(text=f"~{total_lines} рядків")
+        self.lines_label.configure(text=f"0 / ~{total_lines} рядків")
         
-        base_url = self.base_url_entry.get()
-        if not base_url:
-            messagebox.showwarning("Увага", "Введіть Base URL!")
+        self.translate_btn.configure(state="normal")
+        self.resume_btn.configure(state="disabled")
+        output_name = translated_file_name(self.file_path)
+        self._update_status(
+            f"📂 Великий файл ({size_mb:.0f} МБ): показано перші {len(self.original_lines)} рядків, "
+            f"переклад запишеться потоково в {output_name}",
+            self.colors["accent"]
+        )
+        
+        self._add_to_recent(self.file_path)
+        self._update_text_stats()
+        self.after(100, self.original_highlighter.highlight_visible)
+    
+    def _start_translation(self, resume=False):
+        """Початок перекладу (resume - продовжити з журналу, перекладаючи тільки нові/змінені рядки)"""
+        if self.is_translating or not self.file_path:
             return
         
-        try:
-            self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=60)
-        except Exception as e:
-            messagebox.showerror("Помилка", f"Не вдалося підключитися до API:\n{str(e)}")
+        self.engine = self._create_engine()
+        if self.engine is None:
             return
         
         self.is_translating = True
         self.translate_btn.configure(state="disabled")
+        self.resume_btn.configure(state="disabled")
         self.stop_btn.configure(state="normal")
         self.file_btn.configure(state="disabled")
         
         # Запуск перекладу в окремому потоці
-        thread = threading.Thread(target=self._translate_worker, daemon=True)
+        thread = threading.Thread(target=self._translate_worker, args=(resume,), daemon=True)
         thread.start()
+        self.after(UI_FRAME_MS, self._ui_tick)
         
         # Запуск автозбереження
         self._start_autosave()
     
-    def _translate_worker(self):
-        """Робочий потік для перекладу"""
+    def _create_engine(self):
+        """Створення рушія перекладу з поточних налаштувань (None якщо налаштування неповні)"""
+        provider = self.provider_var.get()
+        needs_key = self.providers.get(provider, {}).get("needs_key", True)
+        
+        api_key = self.api_key_entry.get()
+        if needs_key and not api_key:
+            messagebox.showwarning("Увага", "Введіть API ключ!")
+            return None
+        
+        # Кілька серверів однієї моделі (напр. локальні GPU-машини) - через кому
+        base_urls = split_base_urls(self.base_url_entry.get())
+        if not base_urls:
+            messagebox.showwarning("Увага", "Введіть Base URL!")
+            return None
+        
         # Використовуємо кастомну модель якщо вказана, інакше з меню
         model = self.custom_model_entry.get().strip() or self.model_var.get()
+        
+        try:
+            # Для локальних моделей використовується фіктивний ключ
+            self.client = create_client(api_key, base_urls[0], timeout=60)
+            routes = [Route(create_client(api_key, url, timeout=60), model, provider) for url in base_urls[1:]]
+        except Exception as e:
+            messagebox.showerror("Помилка", f"Не вдалося підключитися до API:\n{str(e)}")
+            return None
+        
+        # Пул: основний провайдер + додаткові з provider_pool
+        if self.pool_var.get():
+            if not self.provider_pool:
+                messagebox.showwarning("Увага", "Пул порожній: додайте provider_pool у translator_settings.json")
+                return None
+            try:
+                routes += routes_from_config(self.provider_pool)
+            except ValueError as e:
+                messagebox.showwarning("Увага", str(e))
+                return None
+        
+        # "Потоки" - на кожен сервер: з кожною новою машиною запитів одночасно більше
+        concurrency = self._get_concurrency() * len(base_urls)
+        return TranslationEngine(
+            self.client, model,
+            provider=provider,
+            glossary=self.glossary,
+            glossary_index=self.glossary_index,
+            concurrency=concurrency,
+            batch_chars=self._get_batch_chars(),
+            batch_max_segments=self.batch_max_segments,
+            translation_memory=self.translation_memory if self._cache_enabled() else None,
+            on_status=self._on_engine_status,
+            stream=self.stream_var.get(),
+            on_partial=self._on_engine_partial,
+            backend=self._get_async_backend(api_key, base_urls[0], concurrency) if self.async_var.get() else None,
+            budgets=self.model_budgets,
+            routes=routes
+        )
+    
+    def _get_async_backend(self, api_key, base_url, concurrency):
+        """Асинхронний бекенд; перестворюється лише при зміні ключа, URL або кількості потоків"""
+        max_connections = max(10, concurrency)
+        key = (api_key, base_url, max_connections)
+        if self.async_backend is not None and self.async_backend_key != key:
+            self.async_backend.close()
+            self.async_backend = None
+        if self.async_backend is None:
+            self.async_backend = AsyncBackend(api_key, base_url, timeout=60, max_connections=max_connections)
+            self.async_backend_key = key
+        return self.async_backend
+    
+    def _update_resume_button(self):
+        """Кнопка "Продовжити" активна, якщо для файлу є журнал прогресу"""
+        has_journal = (bool(self.file_path) and not self.stream_mode
+                       and CheckpointJournal.for_file(self.file_path).exists())
+        self.resume_btn.configure(state="normal" if has_journal else "disabled")
+    
+    def _get_concurrency(self):
+        """Кількість одночасних запитів до API"""
+        try:
+            return max(1, int(self.concurrency_var.get()))
+        except (ValueError, AttributeError):
+            return 1
+    
+    def _get_batch_chars(self):
+        """Ліміт символів для пакетного запиту (0 - пакетний режим вимкнено)"""
+        try:
+            return max(0, int(self.batch_var.get()))
+        except (ValueError, AttributeError):
+            return 0
+    
+    def _on_engine_status(self, text, kind):
+        """Повідомлення рушія перекладу (з робочого потоку) -> рядок статусу"""
+        color = "#da3633" if kind == "error" else self.colors.get(kind)
+        self.after(0, lambda: self._update_status(text, color))
+    
+    def _on_engine_partial(self, source, text):
+        """Частковий переклад з потокового запиту (з робочого потоку) -> панель перекладу"""
+        self.ui_updates.put((None, text, None))
+    
+    def _ui_tick(self):
+        """Кадр інтерфейсу під час перекладу: усе, що накопичилось, застосовується разом"""
+        self._flush_ui_updates()
+        if self.is_translating:
+            self.after(UI_FRAME_MS, self._ui_tick)
+    
+    def _flush_ui_updates(self):
+        """Готові рядки - одним вставленням, прогрес і лічильники - один раз за кадр"""
+        start = time.perf_counter()
+        lines = []
+        last = None
+        partial = None
+        while True:
+            try:
+                idx, text, total = self.ui_updates.get_nowait()
+            except queue.Empty:
+                break
+            if idx is None:
+                partial = text
+                continue
+            lines.append(text)
+            last = (idx, total)
+            partial = None  # Частковий переклад до готового рядка вже неактуальний
+        
+        if lines:
+            self._append_translated(lines, last[0] - len(lines) + 1)
+            self._update_progress(*last)
+        if partial is not None:
+            self._show_partial(partial)
+        if self.engine is not None and (lines or partial is not None):
+            self.engine.telemetry.add_time("ui", time.perf_counter() - start)
+    
+    def _show_partial(self, text):
+        """Показ перекладу, що генерується, в кінці панелі (замінюється готовим рядком)"""
+        if not self.is_translating:
+            return
+        inner_text = self.translated_text._textbox
+        self._clear_partial()
+        prefix = "\n" if inner_text.index("end-1c") != "1.0" else ""
+        inner_text.insert("end", f"{prefix}✎ {text}", "streaming")
+        inner_text.see("end")
+    
+    def _clear_partial(self):
+        """Видалення тимчасового часткового перекладу з панелі"""
+        inner_text = self.translated_text._textbox
+        ranges = inner_text.tag_ranges("streaming")
+        if ranges:
+            inner_text.delete(ranges[0], ranges[-1])
+    
+    def _translate_worker(self, resume=False):
+        """Робочий потік для перекладу"""
+        if self.stream_mode:
+            self._translate_stream_worker()
+            return
         total_lines = len(self.original_lines)
         
         self.translated_text.delete("1.0", "end")
         self.translated_lines = []
+        self.translated_pane.reset()
+        self.translated_highlighter.reset()
         
         # Статистика
         self.translation_start_time = time.time()
         self.translated_count = 0
         
-        # Відстеження блоків коду (``` ... ```)
-        inside_code_block = False
+        # Журнал прогресу: при продовженні готові рядки з незміненим оригіналом не перекладаються
+        journal = CheckpointJournal.for_file(self.file_path)
+        known = journal.load(self.original_lines) if resume else {}
+        if known:
+            self.after(0, lambda: self._update_status(
+                f"↻ Продовження: {len(known)} з {total_lines} рядків уже перекладено",
+                self.colors["accent"]
+            ))
+        journal.start(self.original_lines, known)
         
-        for i, line in enumerate(self.original_lines):
-            if not self.is_translating:
-                break
-            
-            # Оновлення статусу
-            self.after(0, lambda idx=i: self._update_progress(idx, total_lines))
-            
-            stripped = line.strip()
-            
-            # Перевірка на початок/кінець блоку коду
-            if stripped.startswith('```'):
-                inside_code_block = not inside_code_block
-                translated_line = line  # Копіюємо маркер ``` як є
-            # Якщо всередині блоку коду - не перекладаємо
-            elif inside_code_block:
-                translated_line = line
-            # Якщо рядок порожній, таймстамп або код - копіюємо як є
-            elif not stripped or self._is_timestamp(line) or self._is_code_line(line):
-                translated_line = line
-            else:
-                # Витягуємо текст для перекладу зі збереженням структури
-                prefix, text_to_translate, suffix, placeholders = self._extract_translatable_text(line)
-                
-                # Якщо немає тексту для перекладу - копіюємо як є
-                if not text_to_translate.strip():
-                    translated_line = line
-                else:
-                    # Перекладаємо тільки текст
-                    translated_text = self._translate_line(text_to_translate, model, placeholders)
-                    
-                    # Відновлюємо плейсхолдери
-                    translated_text = self._restore_placeholders(text_to_translate, translated_text, placeholders)
-                    
-                    # Збираємо рядок назад
-                    translated_line = prefix + translated_text + suffix
-            
+        def on_line(idx, translated_line):
             self.translated_lines.append(translated_line)
+            if idx not in known:
+                journal.append(idx, self.original_lines[idx], translated_line)
             
-            # Додавання перекладеного рядка в реальному часі
-            self.after(0, lambda text=translated_line, idx=i: self._append_translated(text, idx))
+            # Рядок і прогрес показуються в найближчому кадрі інтерфейсу (_ui_tick)
+            self.ui_updates.put((idx, translated_line, total_lines))
+        
+        try:
+            self.engine.translate_lines(self.original_lines, on_line, known,
+                                        parser=format_parser_for(self.file_path))
+        finally:
+            journal.close()
         
         # Завершення
         self.after(0, self._translation_complete)
     
-    def _is_timestamp(self, line):
-        """Перевірка чи рядок є таймстампом (для субтитрів)"""
-        # SRT timestamp pattern: 00:00:00,000 --> 00:00:00,000
-        pattern = r'^\d{2}:\d{2}:\d{2}[,\.]\d{3}\s*-->\s*\d{2}:\d{2}:\d{2}[,\.]\d{3}$'
-        return bool(re.match(pattern, line.strip()))
-    
-    def _is_code_line(self, line):
-        """Перевірка чи рядок є кодом/технічним рядком (не перекладати)"""
-        stripped = line.strip()
-        
-        # Порожній рядок
-        if not stripped:
-            return True
-        
-        # Тільки числа
-        if stripped.isdigit():
-            return True
-        
-        # Блок коду markdown (```)
-        if stripped.startswith('```'):
-            return True
-        
-        # Теги [SPEAKER: ...], [CHARACTER: ...] тощо
-        if re.match(r'^\[[A-Z_]+:\s*[^\]]+\]$', stripped):
-            return True
-        
-        # Коментарі (різні формати)
-        if stripped.startswith('//') or stripped.startswith('/*') or stripped.startswith('*/'):
-            return True
-        if stripped.startswith('#') and not stripped.startswith('##'):
-            return True
-        if stripped.startswith('--') and not stripped.startswith('---'):
-            return True
-        if stripped.startswith(';') or stripped.startswith('<!--') or stripped.startswith('-->'):
-            return True
-        
-        # Чисто структурні символи JSON/XML/Python
-        if stripped in ['{', '}', '[', ']', ',', '};', '},', '];', '],', '(', ')', '):']:
-            return True
-        
-        # JSON/Python структурні рядки
-        # Список/масив: dialogue_data = [
-        if re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*\s*=\s*[\[\{]$', stripped):
-            return True
-        
-        # Булеві/None значення в JSON/Python
-        if re.match(r'^["\']?is_code["\']?\s*:\s*(True|False|true|false),?$', stripped, re.IGNORECASE):
-            return True
-        if re.match(r'^["\']?[a-zA-Z_]+["\']?\s*:\s*(True|False|true|false|None|null|\d+),?$', stripped, re.IGNORECASE):
-            return True
-        
-        # Закриваючі/самозакриваючі теги XML
-        if re.match(r'^<\/[^>]+>$', stripped) or re.match(r'^<[^>]+\/>$', stripped):
-            return True
-        
-        # Відкриваючий тег без тексту
-        if re.match(r'^<[a-zA-Z_][^>]*>$', stripped) and '>' not in stripped[1:-1]:
-            return True
-            
-        return False
-    
-    def _extract_translatable_text(self, line):
-        """
-        Витягує текст для перекладу зі збереженням структури.
-        Повертає: (prefix, text_to_translate, suffix, placeholders)
-        """
-        # Зберігаємо початкові пробіли/відступи
-        leading_spaces = len(line) - len(line.lstrip())
-        indent = line[:leading_spaces]
-        stripped = line.strip()
-        
-        # === Формат KEY { text } (Unreal, деякі ігрові движки) ===
-        # Текст може містити будь-які символи крім закриваючої дужки
-        key_brace_match = re.match(r'^([a-zA-Z_][a-zA-Z0-9_]*)\s*\{\s*(.+)\s*\}$', stripped, re.DOTALL)
-        if key_brace_match:
-            key, value = key_brace_match.groups()
-            value = value.strip()
-            if value:
-                prefix = f'{indent}{key} {{ '
-                suffix = ' }'
-                placeholders = self._extract_placeholders(value)
-                return prefix, value, suffix, placeholders
-        
-        # === Формат тільки { text } без ключа ===
-        brace_only_match = re.match(r'^\{\s*(.+)\s*\}$', stripped, re.DOTALL)
-        if brace_only_match:
-            value = brace_only_match.group(1).strip()
-            if value:
-                prefix = f'{indent}{{ '
-                suffix = ' }'
-                placeholders = self._extract_placeholders(value)
-                return prefix, value, suffix, placeholders
-        
-        # === JSON формат: "key": "value" ===
-        # Шукаємо патерн "ключ": "значення" або 'ключ': 'значення'
-        json_match = re.match(r'^(["\'])([^"\']+)\1\s*:\s*(["\'])(.*)(\3)\s*(,?)$', stripped)
-        if json_match:
-            key_quote, key, val_quote, value, _, comma = json_match.groups()
-            
-            # Список ключів які НЕ перекладаємо (системні ключі)
-            skip_keys = ['speaker', 'id', 'key', 'name', 'type', 'class', 'tag', 'is_code', 
-                         'code', 'script', 'function', 'method', 'variable', 'path', 'file',
-                         'icon', 'image', 'sound', 'audio', 'animation', 'sprite', 'texture']
-            
-            # Якщо ключ системний - не перекладаємо значення
-            if key.lower() in skip_keys:
-                return indent, "", "", []
-            
-            # Перекладаємо тільки VALUE якщо це текстовий контент
-            # (message, text, description, title, label, hint, tooltip, dialogue, etc.)
-            translatable_keys = ['message', 'text', 'description', 'title', 'label', 'hint',
-                                 'tooltip', 'dialogue', 'dialog', 'content', 'body', 'value',
-                                 'caption', 'placeholder', 'button', 'option', 'choice',
-                                 'question', 'answer', 'reply', 'response', 'note', 'warning',
-                                 'error', 'success', 'info', 'help', 'about', 'summary']
-            
-            if value.strip() and key.lower() in translatable_keys:
-                prefix = f'{indent}{key_quote}{key}{key_quote}: {val_quote}'
-                suffix = f'{val_quote}{comma}'
-                placeholders = self._extract_placeholders(value)
-                return prefix, value, suffix, placeholders
-            
-            return indent, "", "", []  # Ключ не в списку - не перекладаємо
-        
-        # === JSON просте значення: "value" або "value", ===
-        json_simple = re.match(r'^(["\'])(.+)\1\s*(,?)$', stripped)
-        if json_simple:
-            quote, value, comma = json_simple.groups()
-            # Перевіряємо чи це не ключ (немає двокрапки далі - це значення)
-            if value.strip():
-                prefix = f'{indent}{quote}'
-                suffix = f'{quote}{comma}'
-                placeholders = self._extract_placeholders(value)
-                return prefix, value, suffix, placeholders
-        
-        # === XML формат: <tag attr="x">text</tag> ===
-        xml_match = re.match(r'^(<[^>]+>)(.+)(<\/[^>]+>)$', stripped)
-        if xml_match:
-            open_tag, content, close_tag = xml_match.groups()
-            if content.strip():
-                prefix = f'{indent}{open_tag}'
-                suffix = close_tag
-                placeholders = self._extract_placeholders(content)
-                return prefix, content, suffix, placeholders
-        
-        # === INI формат: key=value ===
-        ini_match = re.match(r'^([a-zA-Z_][a-zA-Z0-9_\.]*)\s*=\s*(.+)$', stripped)
-        if ini_match:
-            key, value = ini_match.groups()
-            # Перевіряємо чи значення не є числом або булевим
-            if not re.match(r'^-?\d+\.?\d*$', value) and value.lower() not in ['true', 'false', 'yes', 'no', 'null', 'none']:
-                # Видаляємо лапки якщо є
-                if (value.startswith('"') and value.endswith('"')) or (value.startswith("'") and value.endswith("'")):
-                    inner_value = value[1:-1]
-                    prefix = f'{indent}{key}={value[0]}'
-                    suffix = value[-1]
-                else:
-                    inner_value = value
-                    prefix = f'{indent}{key}='
-                    suffix = ''
-                placeholders = self._extract_placeholders(inner_value)
-                return prefix, inner_value, suffix, placeholders
-        
-        # === YAML формат: key: value або key: "value" ===
-        yaml_match = re.match(r'^([a-zA-Z_][a-zA-Z0-9_\-]*)\s*:\s*(.+)$', stripped)
-        if yaml_match:
-            key, value = yaml_match.groups()
-            # Пропускаємо якщо значення - список або об'єкт
-            if not value.startswith('[') and not value.startswith('{'):
-                # Видаляємо лапки
-                if (value.startswith('"') and value.endswith('"')) or (value.startswith("'") and value.endswith("'")):
-                    inner_value = value[1:-1]
-                    prefix = f'{indent}{key}: {value[0]}'
-                    suffix = value[-1]
-                else:
-                    inner_value = value
-                    prefix = f'{indent}{key}: '
-                    suffix = ''
-                # Пропускаємо числа та булеві
-                if not re.match(r'^-?\d+\.?\d*$', inner_value) and inner_value.lower() not in ['true', 'false', 'yes', 'no', 'null', '~']:
-                    placeholders = self._extract_placeholders(inner_value)
-                    return prefix, inner_value, suffix, placeholders
-        
-        # === Lua формат: ["key"] = "value" або key = "value" ===
-        lua_match = re.match(r'^(\[?["\']?[^\]"\']+["\']?\]?\s*=\s*)(["\'])(.*)(\2)\s*(,?)$', stripped)
-        if lua_match:
-            key_part, quote, value, _, comma = lua_match.groups()
-            if value.strip():
-                prefix = f'{indent}{key_part}{quote}'
-                suffix = f'{quote}{comma}'
-                placeholders = self._extract_placeholders(value)
-                return prefix, value, suffix, placeholders
-        
-        # === PO/POT формат: msgstr "text" ===
-        po_match = re.match(r'^(msgstr\s+)(["\'])(.*)(\2)$', stripped)
-        if po_match:
-            prefix_part, quote, value, _ = po_match.groups()
-            if value.strip():
-                prefix = f'{indent}{prefix_part}{quote}'
-                suffix = quote
-                placeholders = self._extract_placeholders(value)
-                return prefix, value, suffix, placeholders
-        
-        # === CSV формат (спрощено) - текст в лапках ===
-        csv_match = re.match(r'^([^,]*,)(["\'])(.+)\2(,.*)$', stripped)
-        if csv_match:
-            before, quote, value, after = csv_match.groups()
-            prefix = f'{indent}{before}{quote}'
-            suffix = f'{quote}{after}'
-            placeholders = self._extract_placeholders(value)
-            return prefix, value, suffix, placeholders
-        
-        # === Якщо не знайшли формат - перекладаємо весь рядок якщо є текст ===
-        # Перевіряємо чи містить кириличні або латинські літери (тобто текст)
-        if re.search(r'[a-zA-Zа-яА-ЯіІїЇєЄґҐ]', stripped):
-            placeholders = self._extract_placeholders(stripped)
-            return indent, stripped, "", placeholders
-        
-        # Немає тексту для перекладу
-        return indent, "", "", []
-    
-    def _extract_placeholders(self, text):
-        """Витягує всі плейсхолдери/коди з тексту"""
-        placeholders = []
-        
-        # Порядок важливий - спочатку більш специфічні патерни
-        patterns = [
-            r'\{\{[^}]+\}\}',              # {{name}}, {{variable}}
-            r'\{[^}]+\}',                  # {0}, {name}, {variable}
-            r'%\([^)]+\)[sdifx]',          # %(name)s
-            r'%\d*\.?\d*[sdifxXeEgGcpb%]', # %s, %d, %2d, %.2f, %%
-            r'\$\{[^}]+\}',                # ${variable}
-            r'\$[a-zA-Z_][a-zA-Z0-9_]*',   # $variable
-            r'<[^>]+>',                    # <tag>, <color=#FF0000>, </tag>
-            r'\[[^\]]+\]',                 # [variable], [color]
-            r'\\[nrtv\\"\'/]',             # \n, \t, \r, \\, \", \', \/
-            r'&[a-zA-Z]+;',                # &nbsp;, &amp;
-            r'&#x?[0-9a-fA-F]+;',          # &#123;, &#xAB;
-            r'@[a-zA-Z_][a-zA-Z0-9_]*',    # @variable (деякі движки)
-            r'#[a-zA-Z_][a-zA-Z0-9_]*#',   # #variable# (деякі движки)
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            placeholders.extend(matches)
-        
-        return placeholders
-    
-    def _restore_placeholders(self, original_text, translated_text, placeholders):
-        """Відновлює плейсхолдери у перекладеному тексті"""
-        if not placeholders:
-            return translated_text
-        
-        result = translated_text
-        
-        # Знаходимо плейсхолдери в перекладі (можуть бути змінені/загублені)
-        translated_placeholders = self._extract_placeholders(result)
-        
-        # Якщо всі плейсхолдери на місці та ідентичні - повертаємо як є
-        if set(translated_placeholders) == set(placeholders):
-            return result
-        
-        # Перевіряємо кожен плейсхолдер
-        for placeholder in placeholders:
-            if placeholder not in result:
-                # Плейсхолдер зник - шукаємо схожий та замінюємо
-                found_replacement = False
-                for trans_ph in translated_placeholders:
-                    # Якщо є щось схоже (напр. {0} став { 0 })
-                    if trans_ph not in placeholders:
-                        result = result.replace(trans_ph, placeholder, 1)
-                        translated_placeholders.remove(trans_ph)
-                        found_replacement = True
-                        break
-                
-                # Якщо не знайшли заміну - додаємо в кінець
-                if not found_replacement:
-                    # Не додаємо теги в кінець, бо це зламає форматування
-                    if not placeholder.startswith('<'):
-                        result = result.rstrip() + ' ' + placeholder
-        
-        return result
-    
-    def _translate_line(self, line, model, placeholders=None, max_retries=3):
-        """Переклад одного рядка з retry логікою та обробкою помилок контексту"""
-        if placeholders is None:
-            placeholders = []
-        
-        # Якщо рядок дуже довгий - розбиваємо на частини
-        max_chars = 2000  # Безпечний ліміт для більшості моделей
-        if len(line) > max_chars:
-            return self._translate_long_line(line, model, max_chars)
-        
-        # Формуємо інформацію про плейсхолдери для промпту
-        placeholder_info = ""
-        if placeholders:
-            placeholder_info = (
-                f"\n\nУВАГА! У тексті є спеціальні коди/плейсхолдери, які ОБОВ'ЯЗКОВО треба зберегти БЕЗ ЗМІН: "
-                f"{', '.join(set(placeholders))}"
-            )
+    def _translate_stream_worker(self):
+        """Потоковий переклад великого файлу: рядки одразу пишуться у файл -ukr поруч з оригіналом"""
+        self.translated_text.delete("1.0", "end")
+        self.translated_highlighter.reset()
+        self.translated_lines = []
+        self.stream_output_path = None
         
-        system_prompt = (
-            "You are a translator. Translate the text to Ukrainian. Output ONLY the translation, nothing else. "
-            "No comments, no explanations, no 'I understand', no 'Ready to work' - ONLY the translated text."
-            "\n\nRULES:"
-            "\n- Keep all placeholders unchanged: {0}, {name}, %s, %d, $var, <tag>, [var], \\n"
-            "\n- Use correct Ukrainian grammar: cases, genders, verb forms"
-            "\n- Use natural Ukrainian: 'є' not 'являється', 'треба' not 'необхідно'"
-            "\n- Gaming terms: quest→квест, skill→навичка, level→рівень, boss→бос"
-            "\n- Names: Michael→Майкл, John→Джон, James→Джеймс"
-            f"{placeholder_info}"
-            "\n\nIMPORTANT: Your response must contain ONLY the Ukrainian translation. "
-            "If you output anything other than the translation, you have failed."
-        )
+        self.translation_start_time = time.time()
+        self.translated_count = 0
         
-        for attempt in range(max_retries):
-            try:
-                response = self.client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": f"Translate to Ukrainian: {line}"}
-                    ],
-                    temperature=0.3,
-                    max_tokens=min(len(line) * 3 + 100, 4000)  # Обмежуємо max_tokens
-                )
-                result = response.choices[0].message.content.strip()
-                
-                # Перевірка на погані відповіді (LLM відповідає замість перекладу)
-                bad_responses = [
-                    "зрозуміло", "готовий до роботи", "надайте текст", "готовий перекладати",
-                    "i understand", "ready to", "please provide", "i'm ready",
-                    "вибачте", "не можу", "sorry", "i cannot", "i can't"
-                ]
-                result_lower = result.lower()
-                for bad in bad_responses:
-                    if bad in result_lower and len(result) > len(line) * 2:
-                        # LLM відповів системним повідомленням - повертаємо оригінал
-                        return line
-                
-                # Якщо відповідь занадто коротка або порожня
-                if not result or len(result) < 2:
-                    return line
-                
-                return result
-                
-            except Exception as e:
-                error_str = str(e).lower()
-                
-                # Перевіряємо на помилки контекстного вікна
-                context_errors = [
-                    "context_length_exceeded",
-                    "context length",
-                    "maximum context",
-                    "token limit",
-                    "too many tokens",
-                    "max_tokens",
-                    "context window",
-                    "reduce the length",
-                    "reduce your prompt"
-                ]
-                
-                is_context_error = any(err in error_str for err in context_errors)
-                
-                if is_context_error:
-                    # Спробуємо розбити рядок на менші частини
-                    self.after(0, lambda: self._update_status(
-                        f"⚠️ Рядок занадто довгий, розбиваємо...", 
-                        self.colors["warning"]
-                    ))
-                    return self._translate_long_line(line, model, max_chars // 2)
-                
-                # Перевіряємо на rate limit
-                rate_limit_errors = ["rate_limit", "rate limit", "too many requests", "429"]
-                is_rate_limit = any(err in error_str for err in rate_limit_errors)
-                
-                if is_rate_limit:
-                    wait_time = (attempt + 1) * 5  # 5, 10, 15 секунд
-                    self.after(0, lambda wt=wait_time: self._update_status(
-                        f"⏳ Rate limit, очікування {wt}с...", 
-                        self.colors["warning"]
-                    ))
-                    time.sleep(wait_time)
-                    continue
-                
-                # Для інших помилок - експоненційна затримка
-                if attempt < max_retries - 1:
-                    wait_time = (2 ** attempt)  # 1, 2, 4 секунди
-                    self.after(0, lambda wt=wait_time, att=attempt: self._update_status(
-                        f"⚠️ Помилка, спроба {att + 2}/{max_retries} через {wt}с...", 
-                        self.colors["warning"]
-                    ))
-                    time.sleep(wait_time)
-                else:
-                    # Остання спроба не вдалася - повертаємо оригінал з міткою
-                    return f"[!] {line}"
-        
-        return line  # Fallback - повертаємо оригінал
-    
-    def _translate_long_line(self, line, model, chunk_size):
-        """Переклад довгого рядка частинами"""
-        # Розбиваємо по реченнях або словах
-        chunks = self._split_into_chunks(line, chunk_size)
-        translated_chunks = []
-        
-        for i, chunk in enumerate(chunks):
-            if not self.is_translating:
-                break
-                
-            self.after(0, lambda idx=i, total=len(chunks): self._update_status(
-                f"📝 Довгий рядок: частина {idx + 1}/{total}...", 
-                self.colors["warning"]
-            ))
+        output_path = Path(self.file_path).parent / translated_file_name(self.file_path)
+        completed = False
+        try:
+            reader = LineReader(self.file_path)
             
-            # Перекладаємо кожну частину
-            try:
-                response = self.client.chat.completions.create(
-                    model=model,
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": (
-                                "Translate to Ukrainian. Output ONLY the translation, nothing else. "
-                                "Keep placeholders: {0}, %s, <tag>, [var], $var, \\n unchanged."
-                            )
-                        },
-                        {"role": "user", "content": chunk}
-                    ],
-                    temperature=0.3,
-                    max_tokens=min(len(chunk) * 3, 2000)
-                )
-                translated_chunks.append(response.choices[0].message.content.strip())
-            except Exception as e:
-                # Якщо навіть частина не перекладається - копіюємо оригінал
-                translated_chunks.append(chunk)
+            def on_line(idx, translated_line):
+                self.ui_updates.put((idx, translated_line, reader.estimated_total))
             
-            # Невелика пауза між частинами
-            time.sleep(0.3)
+            completed, failed = translate_file_streaming(self.engine, reader, output_path, on_line)
+        except Exception as e:
+            error = str(e)
+            self.after(0, lambda: messagebox.showerror("Помилка", f"Помилка потокового перекладу:\n{error}"))
         
-        return " ".join(translated_chunks)
+        self.after(0, self._translation_complete)
+        if completed:
+            self.stream_output_path = output_path
+            message = f"💾 Переклад збережено: {output_path.name}" + (f" ({failed} рядків з [!])" if failed else "")
+            self.after(0, lambda: self._update_status(message, self.colors["success"]))
+        else:
+            self.after(0, lambda: self._update_status(
+                f"⏹ Потоковий переклад не завершено - {output_path.name} не змінено", self.colors["warning"]
+            ))
     
-    def _split_into_chunks(self, text, max_size):
-        """Розбиття тексту на частини по реченнях"""
-        # Спочатку спробуємо по реченнях
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        
-        chunks = []
-        current_chunk = ""
-        
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) <= max_size:
-                current_chunk += (" " if current_chunk else "") + sentence
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk)
-                
-                # Якщо речення само по собі занадто довге - розбиваємо по словах
-                if len(sentence) > max_size:
-                    words = sentence.split()
-                    current_chunk = ""
-                    for word in words:
-                        if len(current_chunk) + len(word) + 1 <= max_size:
-                            current_chunk += (" " if current_chunk else "") + word
-                        else:
-                            if current_chunk:
-                                chunks.append(current_chunk)
-                            current_chunk = word
-                else:
-                    current_chunk = sentence
-        
-        if current_chunk:
-            chunks.append(current_chunk)
-        
-        return chunks if chunks else [text]
-    
-    def _append_translated(self, text, line_idx):
-        """Додавання перекладеного тексту"""
-        if line_idx > 0:
-            self.translated_text.insert("end", "\n")
-        self.translated_text.insert("end", text)
-        self.translated_text.see("end")
+    def _cache_enabled(self):
+        """Чи використовується пам'ять перекладів у поточному запуску"""
+        return self.translation_memory is not None and self.use_cache_var.get()
+    
+    def _append_translated(self, texts, first_idx):
+        """Додавання перекладених рядків (усі рядки кадру - одним вставленням)"""
+        # Готовий рядок замінює частковий переклад
+        self._clear_partial()
+        last_idx = first_idx + len(texts) - 1
+        if self.translated_pane.active:
+            # Рядки вже в translated_lines - панель дописує все, чого ще не показала
+            self.translated_pane.follow_tail()
+        else:
+            prefix = "\n" if first_idx > 0 else ""
+            self.translated_text.insert("end", prefix + "\n".join(texts))
+            # Великий файл: у панелі лише останні рядки, решта вже у файлі
+            if self.stream_mode and last_idx >= PREVIEW_LINES:
+                shown = int(self.translated_text.index("end-1c").split(".")[0])
+                if shown > PREVIEW_LINES:
+                    self.translated_text.delete("1.0", f"{shown - PREVIEW_LINES + 1}.0")
+                    self.translated_highlighter.reset()
+            self.translated_text.see("end")
         
         # Оновлення лічильника
-        self.translated_lines_label.configure(text=f"{line_idx + 1} рядків")
+        self.translated_lines_label.configure(text=f"{last_idx + 1} рядків")
     
     def _update_progress(self, current, total):
         """Оновлення прогресу"""
@@ -1617,15 +1833,60 @@ class TranslatorApp(ctk.CTk):
             self.speed_label.configure(
                 text=f"⚡ {lines_per_min:.1f} р/хв | ⏳ ~{int(remaining)} хв залишилось"
             )
+        
+        self._update_cache_stats()
+        self._update_rate_stats()
+    
+    def _update_rate_stats(self):
+        """Оновлення поточних лімітів (RPM/TPM) та часу очікування на них"""
+        if self.engine is None:
+            return
+        text = self.engine.rate_limiter.describe()
+        if self.engine.throttle_time >= 1:
+            text += f" | пауза {self.engine.throttle_time:.0f}с"
+        if len(self.engine.router) > 1:
+            text += f" | 🔀 {self.engine.router.describe()}"
+        self.rate_label.configure(text=f"🚦 {text.strip(' |')}" if text else "")
+    
+    def _update_cache_stats(self):
+        """Оновлення лічильників влучань/промахів кешу в рядку статусу"""
+        if not self._cache_enabled():
+            self.cache_label.configure(text="")
+            return
+        memory = self.translation_memory
+        lookups = memory.hits + memory.misses
+        hit_rate = memory.hits / lookups * 100 if lookups else 0
+        self.cache_label.configure(
+            text=f"🧠 кеш: {memory.hits} влучань / {memory.misses} промахів ({hit_rate:.0f}%)"
+        )
+    
+    def _purge_translation_memory(self):
+        """Очищення пам'яті перекладів"""
+        if self.translation_memory is None:
+            return
+        if self.is_translating:
+            messagebox.showwarning("Увага", "Не можна очищати кеш під час перекладу!")
+            return
+        count = self.translation_memory.count()
+        if not messagebox.askyesno("Очистити кеш", f"Видалити всі збережені переклади ({count})?"):
+            return
+        self.translation_memory.purge()
+        self.translation_memory.reset_stats()
+        self._update_cache_stats()
+        self._update_status(f"🗑️ Кеш перекладів очищено ({count} записів)", self.colors["success"])
     
     def _update_status(self, text, color=None):
         """Оновлення статусу"""
         self.status_label.configure(text=text, text_color=color or self.colors["text_muted"])
     
-    def _translation_complete(self):
-        """Завершення перекладу"""
+    def _translation_complete(self, report_name=None):
+        """Завершення перекладу (report_name - назва звіту, за замовчуванням - ім'я файлу)"""
         self.is_translating = False
+        # Рядки, що надійшли після останнього кадру
+        self._flush_ui_updates()
+        self._clear_partial()
         self.translate_btn.configure(state="normal")
+        self._update_resume_button()
         self.stop_btn.configure(state="disabled")
         self.file_btn.configure(state="normal")
         self.save_btn.configure(state="normal")
@@ -1638,19 +1899,133 @@ class TranslatorApp(ctk.CTk):
             minutes = int(elapsed // 60)
             seconds = int(elapsed % 60)
             lines_per_min = self.translated_count / (elapsed / 60) if elapsed > 0 else 0
-            self.speed_label.configure(
-                text=f"⏱️ {minutes}:{seconds:02d} | 📊 {lines_per_min:.1f} рядків/хв"
-            )
+            stats_text = f"⏱️ {minutes}:{seconds:02d} | 📊 {lines_per_min:.1f} рядків/хв"
+            
+            # Скільки запитів зекономлено на однакових рядках
+            total_segments, unique_segments = self.engine.dedup_stats
+            if total_segments > unique_segments:
+                duplicates = total_segments - unique_segments
+                stats_text += f" | ♻️ дублікатів: {duplicates} ({duplicates / total_segments * 100:.0f}%)"
+            
+            self.speed_label.configure(text=stats_text)
+        
+        self._update_cache_stats()
+        self._update_rate_stats()
+        self._save_run_report(report_name or self.file_path or "translation")
         
         self._update_status("✅ Переклад завершено!", self.colors["success"])
     
+    def _save_run_report(self, name):
+        """Телеметрія запуску -> reports/<ім'я>-<час>.json і .csv"""
+        if self.engine is None:
+            return
+        telemetry = self.engine.telemetry
+        telemetry.finish()
+        try:
+            report_path = telemetry.save(RunTelemetry.report_path(name))
+        except OSError:
+            report_path = None
+        self.last_report = (telemetry.summary(), report_path)
+        self.report_btn.configure(state="normal")
+    
+    def _show_run_report(self):
+        """Панель звіту: підсумки, час за фазами та найповільніші рядки"""
+        if self.last_report is None:
+            return
+        summary, report_path = self.last_report
+        
+        report = ctk.CTkToplevel(self)
+        report.title("📈 Звіт про переклад")
+        report.geometry("700x620")
+        report.configure(fg_color=self.colors["bg_dark"])
+        report.transient(self)
+        set_dark_title_bar(report)
+        
+        ctk.CTkLabel(
+            report, text="📈 Звіт про переклад",
+            font=ctk.CTkFont(size=18, weight="bold"),
+            text_color=self.colors["text"]
+        ).pack(pady=(20, 10))
+        
+        # Підсумки
+        duration = summary["duration"]
+        totals = [
+            f"⏱️ {int(duration // 60)}:{int(duration % 60):02d} | 📄 {summary['lines']} рядків | "
+            f"🌐 {summary['requests']} запитів ({summary['failed_requests']} з помилкою) | ↻ {summary['retries']} повторів",
+            f"🔤 токени: {summary['prompt_tokens']} у запитах / {summary['completion_tokens']} у відповідях",
+        ]
+        if summary["latency_p50"] is not None:
+            totals.append(f"⚡ затримка запиту: p50 {summary['latency_p50']:.2f}с / p95 {summary['latency_p95']:.2f}с")
+        if summary["cached_tokens"]:
+            cache_text = f"💾 кеш промпту: {summary['cached_tokens']} токенів ({summary['prompt_cache_rate']:.0%} запиту)"
+            if summary["latency_p50_cached"] is not None and summary["latency_p50_uncached"] is not None:
+                cache_text += (f" | p50 з кешем {summary['latency_p50_cached']:.2f}с, "
+                               f"без кешу {summary['latency_p50_uncached']:.2f}с")
+            totals.append(cache_text)
+        if summary["errors"]:
+            totals.append("❌ " + ", ".join(f"{name}: {count}" for name, count in summary["errors"].items()))
+        if len(summary["routes"]) > 1:
+            totals.append("🔀 " + ", ".join(
+                f"{route}: {stats['requests']} запитів, {stats['errors']} помилок, ~{stats['avg_seconds']:.2f}с"
+                for route, stats in summary["routes"].items()
+            ))
+        for text in totals:
+            ctk.CTkLabel(report, text=text, font=ctk.CTkFont(size=12),
+                         text_color=self.colors["text"], anchor="w").pack(fill="x", padx=25, pady=1)
+        
+        # Час за фазами (сума по всіх потоках)
+        phases_frame = ctk.CTkFrame(report, fg_color=self.colors["bg_card"], corner_radius=10)
+        phases_frame.pack(fill="x", padx=20, pady=(12, 10))
+        longest = max(summary["phases"].values()) or 1
+        for phase, seconds in summary["phases"].items():
+            row = ctk.CTkFrame(phases_frame, fg_color="transparent")
+            row.pack(fill="x", padx=12, pady=3)
+            ctk.CTkLabel(row, text=RunTelemetry.PHASES[phase], width=200, anchor="w",
+                         font=ctk.CTkFont(size=12), text_color=self.colors["text"]).pack(side="left")
+            bar = ctk.CTkProgressBar(row, height=8, fg_color=self.colors["bg_input"],
+                                     progress_color=self.colors["accent"])
+            bar.pack(side="left", fill="x", expand=True, padx=10)
+            bar.set(seconds / longest)
+            ctk.CTkLabel(row, text=f"{seconds:.1f}с", width=70, anchor="e",
+                         font=ctk.CTkFont(size=12), text_color=self.colors["text_muted"]).pack(side="left")
+        
+        # Найповільніші рядки
+        ctk.CTkLabel(report, text="🐢 Найповільніші рядки", font=ctk.CTkFont(size=13, weight="bold"),
+                     text_color=self.colors["text"], anchor="w").pack(fill="x", padx=25)
+        list_frame = ctk.CTkScrollableFrame(report, fg_color=self.colors["bg_card"],
+                                             corner_radius=10, height=180)
+        list_frame.pack(fill="both", expand=True, padx=20, pady=(5, 10))
+        for item in summary["slowest_lines"]:
+            ctk.CTkLabel(
+                list_frame, text=f"{item['seconds']:.1f}с  {item['text'][:90]}",
+                font=ctk.CTkFont(size=12),
+                text_color=self.colors["text"],
+                anchor="w"
+            ).pack(fill="x", padx=10, pady=2)
+        
+        if report_path:
+            ctk.CTkLabel(report, text=f"💾 {report_path} (запити - у .csv)", font=ctk.CTkFont(size=11),
+                         text_color=self.colors["text_muted"]).pack(pady=(0, 5))
+        
+        ctk.CTkButton(report, text="Закрити", width=120, height=35,
+                      fg_color=self.colors["bg_input"], hover_color=self.colors["border"],
+                      command=report.destroy).pack(pady=(0, 20))
+    
     def _stop_translation(self):
         """Зупинка перекладу"""
         self.is_translating = False
+        if self.engine:
+            self.engine.stop()
         self._update_status("⏹ Переклад зупинено", self.colors["warning"])
     
     def _save_translation(self):
         """Збереження перекладу"""
+        if self.stream_mode:
+            if self.stream_output_path:
+                messagebox.showinfo("Збереження", f"Великий файл перекладено потоково, він уже збережений:\n{self.stream_output_path}")
+            else:
+                messagebox.showwarning("Увага", "Великий файл зберігається автоматично після завершення перекладу")
+            return
         if not self.translated_lines:
             messagebox.showwarning("Увага", "Немає що зберігати!")
             return
@@ -1658,7 +2033,7 @@ class TranslatorApp(ctk.CTk):
         # Генерація імені файлу з -ukr
         original_path = Path(self.file_path)
         original_ext = original_path.suffix.lower()
-        new_name = f"{original_path.stem}-ukr{original_path.suffix}"
+        new_name = translated_file_name(original_path)
         
         # Визначаємо тип файлу для фільтра
         ext_names = {
@@ -1693,9 +2068,7 @@ class TranslatorApp(ctk.CTk):
         
         if save_path:
             try:
-                content = "\n".join(self.translated_lines)
-                with open(save_path, "w", encoding="utf-8") as f:
-                    f.write(content)
+                save_translation(save_path, self.translated_lines)
                 
                 self._update_status(f"💾 Збережено: {Path(save_path).name}", self.colors["success"])
                 messagebox.showinfo("Успіх", f"Файл збережено:\n{save_path}")
@@ -1868,13 +2241,13 @@ class TranslatorApp(ctk.CTk):
     </table>
 </body>
 </html>"""
-            
+
             with open(save_path, "w", encoding="utf-8") as f:
                 f.write(content)
             
             self._update_status(f"📤 Експортовано: {Path(save_path).name}", self.colors["success"])
             messagebox.showinfo("Успіх", f"Файл експортовано:\n{save_path}")
-            
+        
         except Exception as e:
             messagebox.showerror("Помилка", f"Не вдалося експортувати:\n{str(e)}")
     
@@ -1901,27 +2274,26 @@ class TranslatorApp(ctk.CTk):
         self.original_text.tag_config("search", background="#ffd700", foreground="#000000")
         self.translated_text.tag_config("search", background="#ffd700", foreground="#000000")
         
-        # Шукати в оригіналі
-        start = "1.0"
-        while True:
-            pos = self.original_text.search(query, start, nocase=True, stopindex="end")
-            if not pos:
-                break
-            end = f"{pos}+{len(query)}c"
-            self.original_text.tag_add("search", pos, end)
-            self.search_matches.append(("original", pos))
-            start = end
-        
-        # Шукати в перекладі
-        start = "1.0"
-        while True:
-            pos = self.translated_text.search(query, start, nocase=True, stopindex="end")
-            if not pos:
-                break
-            end = f"{pos}+{len(query)}c"
-            self.translated_text.tag_add("search", pos, end)
-            self.search_matches.append(("translated", pos))
-            start = end
+        # Шукати в оригіналі, потім у перекладі
+        for source, textbox, pane in (("original", self.original_text, self.original_pane),
+                                      ("translated", self.translated_text, self.translated_pane)):
+            # Віртуальна панель: пошук у рядках, позиції (рядок, стовпчик), підсвітка - у вікні
+            if pane.active:
+                pane.sync_edits()
+                pane.query = query
+                pane.tag_query()
+                self.search_matches.extend((source, match) for match in pane.find(query))
+                continue
+            
+            start = "1.0"
+            while True:
+                pos = textbox.search(query, start, nocase=True, stopindex="end")
+                if not pos:
+                    break
+                end = f"{pos}+{len(query)}c"
+                textbox.tag_add("search", pos, end)
+                self.search_matches.append((source, pos))
+                start = end
         
         if self.search_matches:
             self.search_result_label.configure(
@@ -1953,12 +2325,13 @@ class TranslatorApp(ctk.CTk):
             return
         
         source, pos = self.search_matches[index]
-        if source == "original":
-            self.original_text.see(pos)
-            self.original_text.mark_set("insert", pos)
+        textbox = self.original_text if source == "original" else self.translated_text
+        pane = self.original_pane if source == "original" else self.translated_pane
+        if pane.active:
+            pane.goto(*pos)
         else:
-            self.translated_text.see(pos)
-            self.translated_text.mark_set("insert", pos)
+            textbox.see(pos)
+            textbox.mark_set("insert", pos)
         
         self.search_result_label.configure(
             text=f"{index + 1} / {len(self.search_matches)}"
@@ -2004,6 +2377,7 @@ class TranslatorApp(ctk.CTk):
                 "continue": "продовжити"
             }
             self._save_glossary()
+        self.glossary_index = GlossaryIndex(self.glossary)
     
     def _save_glossary(self):
         """Збереження глосарію"""
@@ -2061,6 +2435,7 @@ class TranslatorApp(ctk.CTk):
             trans = trans_entry.get().strip()
             if orig and trans:
                 self.glossary[orig] = trans
+                self.glossary_index.add(orig, trans)
                 self._save_glossary()
                 refresh_list()
                 orig_entry.delete(0, "end")
@@ -2099,6 +2474,7 @@ class TranslatorApp(ctk.CTk):
                 
                 def delete_term(o=orig):
                     del self.glossary[o]
+                    self.glossary_index.remove(o)
                     self._save_glossary()
                     refresh_list()
                 
@@ -2196,7 +2572,7 @@ class TranslatorApp(ctk.CTk):
 • Збереження структури файлу — код та теги не перекладаються
 • Глосарій для послідовного перекладу термінів
 • Міні-ігри для очікування (Змійка, Понг, Flappy Bird)"""
-        
+
         ctk.CTkLabel(
             about_frame, text=about_text,
             font=ctk.CTkFont(size=14),
@@ -2258,8 +2634,14 @@ class TranslatorApp(ctk.CTk):
 • Для великих файлів використовуйте потужніші моделі
 • Локальні LLM працюють без інтернету та безкоштовно
 • Глосарій допомагає зберегти консистентність термінів
-• Автозбереження зберігає прогрес кожні 30 секунд"""
-        
+• Автозбереження зберігає прогрес кожні 30 секунд
+• Після збою або зупинки натисніть "↻ Продовжити" — перекладуться лише нові та змінені рядки
+• "⚡ Потоковий вивід" показує переклад рядка по мірі генерації (пакетні запити — без нього)
+• Кеш перекладів пам'ятає вже перекладені рядки — повторний переклад оновленого файлу майже миттєвий
+• "Потоки" — кількість одночасних запитів; для хмарних API 4-8 пришвидшує переклад у рази
+• "Async" — запити йдуть через один пул з'єднань без окремих потоків; дозволяє 64-256 потоків
+• 🚦 у рядку статистики — поточні ліміти провайдера (RPM/TPM); вони підлаштовуються під відповіді 429 автоматично"""
+
         ctk.CTkLabel(
             guide_frame, text=guide_text,
             font=ctk.CTkFont(size=13),
@@ -2319,9 +2701,9 @@ class TranslatorApp(ctk.CTk):
     def _copy_to_clipboard(self, source):
         """Копіювання тексту в буфер обміну"""
         if source == "original":
-            text = self.original_text.get("1.0", "end-1c")
+            text = self.original_pane.text() if self.original_pane.active else self.original_text.get("1.0", "end-1c")
         else:
-            text = self.translated_text.get("1.0", "end-1c")
+            text = self.translated_pane.text() if self.translated_pane.active else self.translated_text.get("1.0", "end-1c")
         
         self.clipboard_clear()
         self.clipboard_append(text)
@@ -2331,13 +2713,20 @@ class TranslatorApp(ctk.CTk):
     
     def _toggle_edit_mode(self):
         """Перемикання режиму редагування перекладу"""
+        if self.stream_mode:
+            self._update_status("⚠️ Великий файл показано частково - редагуйте збережений файл перекладу",
+                                self.colors["warning"])
+            return
         current_state = self.translated_text.cget("state")
         if current_state == "normal":
             self.translated_text.configure(state="disabled")
             self.edit_btn.configure(text="✏️ Редагувати", fg_color="transparent")
             self._update_status("🔒 Редагування вимкнено", self.colors["text_muted"])
-            # Оновлюємо translated_lines з текстового поля
-            self.translated_lines = self.translated_text.get("1.0", "end-1c").split("\n")
+            # Оновлюємо translated_lines з текстового поля (віртуальна панель - лише видиме вікно)
+            if self.translated_pane.active:
+                self.translated_pane.sync_edits()
+            else:
+                self.translated_lines = self.translated_text.get("1.0", "end-1c").split("\n")
         else:
             self.translated_text.configure(state="normal")
             self.edit_btn.configure(text="💾 Зберегти", fg_color="#2ea043")
@@ -2359,21 +2748,96 @@ class TranslatorApp(ctk.CTk):
                 continue
             
             # Перевірка плейсхолдерів
-            orig_placeholders = set(self._extract_placeholders(orig))
-            trans_placeholders = set(self._extract_placeholders(trans))
+            orig_placeholders = set(extract_placeholders(orig))
+            trans_placeholders = set(extract_placeholders(trans))
             
             missing = orig_placeholders - trans_placeholders
             if missing:
                 issues.append(f"Рядок {i+1}: відсутні плейсхолдери: {', '.join(missing)}")
         
+        # Глосарій: термін є в оригіналі, а його перекладу (в будь-якій формі) немає -
+        # у структурованих форматах порівнюються одиниці (PO: msgid і msgstr), а не рядки
+        glossary_issues = {}
+        if self.glossary:
+            if self.translated_pane.active:
+                self.translated_pane.sync_edits()
+            segments = glossary_segments(self.original_lines, self.translated_lines, self.file_path)
+            violations = GlossaryChecker(self.glossary).check(
+                [segment[1] for segment in segments], [segment[2] for segment in segments]
+            )
+            glossary_issues = {term: [segments[k][0] for k in found] for term, found in violations.items()}
+        
         # Показати результати
-        if issues:
-            self._show_quality_report(issues)
+        if issues or glossary_issues:
+            self._show_quality_report(issues, glossary_issues)
+            if glossary_issues:
+                self._resend_glossary_lines(
+                    [segments[k] for k in sorted({k for found in violations.values() for k in found})]
+                )
         else:
-            self._update_status("✅ Перевірка пройдена! Всі плейсхолдери на місці", self.colors["success"])
+            self._update_status("✅ Перевірка пройдена! Всі плейсхолдери і терміни на місці", self.colors["success"])
+    
+    def _resend_glossary_lines(self, segments):
+        """Сегменти з порушеннями глосарію - повторно в API цільовим пакетом (у фоновому потоці)"""
+        if self.is_translating or self.glossary_resending or self.stream_mode:
+            return
+        # Окремий рушій: рушій перекладу після зупинки чи завершення вже не надсилає запитів
+        engine = self._create_engine()
+        if engine is None:
+            return
+        
+        indices = {segment[0] for segment in segments}
+        translated_lines = self.translated_lines
+        self.glossary_resending = True
+        self._update_status(f"♻️ Глосарій: повторний переклад {len(indices)} рядків...", self.colors["accent"])
+        
+        def resend_thread():
+            try:
+                fixed = engine.enforce_glossary(translated_lines, segments)
+            except Exception as e:
+                fixed = None
+                error = str(e)
+            
+            def apply():
+                self.glossary_resending = False
+                if fixed is None:
+                    self._update_status(f"❌ Глосарій: {error[:60]}", "#da3633")
+                    return
+                # Поки йшов запит, почався новий переклад - старі рядки вже не актуальні
+                if self.translated_lines is not translated_lines:
+                    return
+                self._replace_translated_lines(fixed)
+                # Багаторядкова одиниця змінює кілька рядків - рахуємо за її першим рядком
+                done = len(indices & fixed.keys())
+                color = self.colors["success"] if done == len(indices) else self.colors["warning"]
+                self._update_status(f"♻️ Глосарій: виправлено {done} з {len(indices)} рядків", color)
+            
+            self.after(0, apply)
+        
+        threading.Thread(target=resend_thread, daemon=True).start()
     
-    def _show_quality_report(self, issues):
-        """Показати звіт про якість"""
+    def _replace_translated_lines(self, replacements):
+        """Заміна окремих рядків перекладу {індекс: рядок} у списку та на панелі"""
+        if not replacements:
+            return
+        for idx, line in replacements.items():
+            self.translated_lines[idx] = line
+        
+        if self.translated_pane.active:
+            self.translated_pane.scroll_to(self.translated_pane.top, force=True)
+        else:
+            state = self.translated_text.cget("state")
+            self.translated_text.configure(state="normal")
+            for idx, line in replacements.items():
+                self.translated_text.delete(f"{idx + 1}.0", f"{idx + 1}.end")
+                self.translated_text.insert(f"{idx + 1}.0", line)
+            self.translated_text.configure(state=state)
+        self.translated_highlighter.highlight_visible()
+    
+    def _show_quality_report(self, issues, glossary_issues=None):
+        """Показати звіт про якість (glossary_issues - {термін: [індекси рядків]} з порушенням глосарію)"""
+        glossary_issues = glossary_issues or {}
+        glossary_lines = sum(len(lines) for lines in glossary_issues.values())
         report = ctk.CTkToplevel(self)
         report.title("⚠️ Звіт про якість перекладу")
         report.geometry("600x450")
@@ -2384,7 +2848,7 @@ class TranslatorApp(ctk.CTk):
         
         # Заголовок
         ctk.CTkLabel(
-            report, text=f"⚠️ Знайдено {len(issues)} проблем",
+            report, text=f"⚠️ Знайдено {len(issues) + glossary_lines} проблем",
             font=ctk.CTkFont(size=18, weight="bold"),
             text_color=self.colors["warning"]
         ).pack(pady=(20, 15))
@@ -2409,12 +2873,266 @@ class TranslatorApp(ctk.CTk):
                 text_color=self.colors["text_muted"]
             ).pack(padx=10, pady=5)
         
+        # Глосарій - згруповано за терміном, найчастіші порушення першими
+        if glossary_issues:
+            ctk.CTkLabel(
+                list_frame, text=f"📚 Глосарій: {len(glossary_issues)} термінів у {glossary_lines} рядках "
+                                 f"(відправлено на повторний переклад)",
+                font=ctk.CTkFont(size=13, weight="bold"),
+                text_color=self.colors["accent"],
+                anchor="w"
+            ).pack(fill="x", padx=10, pady=(10, 3))
+        
+        by_count = sorted(glossary_issues.items(), key=lambda item: -len(item[1]))
+        for term, lines in by_count[:50]:
+            shown = ", ".join(str(idx + 1) for idx in lines[:10])
+            more = f" та ще {len(lines) - 10}" if len(lines) > 10 else ""
+            ctk.CTkLabel(
+                list_frame, text=f"• {term} → {self.glossary.get(term, '')}: рядки {shown}{more}",
+                font=ctk.CTkFont(size=12),
+                text_color=self.colors["text"],
+                anchor="w", justify="left", wraplength=520
+            ).pack(fill="x", padx=10, pady=3)
+        
+        if len(by_count) > 50:
+            ctk.CTkLabel(
+                list_frame, text=f"... та ще {len(by_count) - 50} термінів",
+                font=ctk.CTkFont(size=12),
+                text_color=self.colors["text_muted"]
+            ).pack(padx=10, pady=5)
+        
         ctk.CTkButton(report, text="Закрити", width=120, height=35,
                       fg_color=self.colors["bg_input"], hover_color=self.colors["border"],
                       command=report.destroy).pack(pady=(0, 20))
     
     # ============ BATCH ПЕРЕКЛАД ============
     
+    def _open_batch_window(self):
+        """Вікно перекладу цілої папки проєкту"""
+        if self.is_translating:
+            messagebox.showwarning("Увага", "Дочекайтесь завершення поточного перекладу!")
+            return
+        
+        window = ctk.CTkToplevel(self)
+        window.title("📁 Переклад проєкту")
+        window.geometry("760x620")
+        window.configure(fg_color=self.colors["bg_dark"])
+        window.transient(self)
+        set_dark_title_bar(window)
+        
+        # Заголовок
+        ctk.CTkLabel(
+            window, text="📁 Переклад проєкту",
+            font=ctk.CTkFont(size=18, weight="bold"),
+            text_color=self.colors["text"]
+        ).pack(pady=(20, 5))
+        
+        ctk.CTkLabel(
+            window, text="Всі файли папки за шаблоном перекладаються в дзеркальну папку з суфіксом -ukr",
+            font=ctk.CTkFont(size=12),
+            text_color=self.colors["text_muted"]
+        ).pack(pady=(0, 15))
+        
+        # Налаштування
+        settings_frame = ctk.CTkFrame(window, fg_color=self.colors["bg_card"], corner_radius=10)
+        settings_frame.pack(fill="x", padx=20, pady=(0, 15))
+        
+        dir_row = ctk.CTkFrame(settings_frame, fg_color="transparent")
+        dir_row.pack(fill="x", padx=15, pady=(15, 8))
+        
+        ctk.CTkLabel(dir_row, text="Папка:", width=80, anchor="w", font=ctk.CTkFont(size=12),
+                     text_color=self.colors["text"]).pack(side="left")
+        
+        dir_entry = ctk.CTkEntry(dir_row, height=32,
+                                 fg_color=self.colors["bg_input"],
+                                 border_color=self.colors["border"])
+        dir_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
+        
+        pattern_row = ctk.CTkFrame(settings_frame, fg_color="transparent")
+        pattern_row.pack(fill="x", padx=15, pady=(0, 8))
+        
+        ctk.CTkLabel(pattern_row, text="Шаблон:", width=80, anchor="w", font=ctk.CTkFont(size=12),
+                     text_color=self.colors["text"]).pack(side="left")
+        
+        pattern_entry = ctk.CTkEntry(pattern_row, width=200, height=32,
+                                     fg_color=self.colors["bg_input"],
+                                     border_color=self.colors["border"])
+        pattern_entry.insert(0, "**/*.json")
+        pattern_entry.pack(side="left", padx=(0, 20))
+        
+        ctk.CTkLabel(pattern_row, text="Файлів одночасно:", font=ctk.CTkFont(size=12),
+                     text_color=self.colors["text"]).pack(side="left", padx=(0, 10))
+        
+        parallel_var = ctk.StringVar(value="4")
+        ctk.CTkOptionMenu(
+            pattern_row, width=70, height=32,
+            values=["1", "2", "4", "8"],
+            variable=parallel_var,
+            fg_color=self.colors["bg_input"],
+            button_color=self.colors["accent"],
+            button_hover_color=self.colors["accent_hover"]
+        ).pack(side="left")
+        
+        output_label = ctk.CTkLabel(settings_frame, text="Результат: —", anchor="w",
+                                    font=ctk.CTkFont(size=12),
+                                    text_color=self.colors["text_muted"])
+        output_label.pack(fill="x", padx=15, pady=(0, 15))
+        
+        # Загальний прогрес
+        overall_label = ctk.CTkLabel(window, text="Файли не вибрано",
+                                     font=ctk.CTkFont(size=13, weight="bold"),
+                                     text_color=self.colors["accent"])
+        overall_label.pack(padx=20, anchor="w")
+        
+        overall_bar = ctk.CTkProgressBar(window, height=8,
+                                         fg_color=self.colors["bg_input"],
+                                         progress_color=self.colors["ukr_yellow"])
+        overall_bar.pack(fill="x", padx=20, pady=(5, 10))
+        overall_bar.set(0)
+        
+        # Список файлів з прогресом кожного
+        list_frame = ctk.CTkScrollableFrame(window, fg_color=self.colors["bg_card"],
+                                             corner_radius=10, height=220)
+        list_frame.pack(fill="both", expand=True, padx=20, pady=(0, 15))
+        
+        state = {"project": None, "labels": [], "progress": {}, "done": 0}
+        
+        def scan_files():
+            root = dir_entry.get().strip()
+            if not root or not Path(root).is_dir():
+                overall_label.configure(text="❌ Папку не знайдено", text_color="#da3633")
+                return None
+            project = ProjectTranslator(None, root, pattern_entry.get().strip() or "**/*")
+            output_label.configure(text=f"Результат: {project.output_root}")
+            
+            for widget in list_frame.winfo_children():
+                widget.destroy()
+            state["labels"] = []
+            for file_path in project.files:
+                row = ctk.CTkFrame(list_frame, fg_color="transparent")
+                row.pack(fill="x", pady=1)
+                ctk.CTkLabel(row, text=str(file_path.relative_to(project.root)), anchor="w",
+                             font=ctk.CTkFont(size=12),
+                             text_color=self.colors["text"]).pack(side="left", padx=(10, 0))
+                status = ctk.CTkLabel(row, text="⏳ у черзі", font=ctk.CTkFont(size=12),
+                                      text_color=self.colors["text_muted"])
+                status.pack(side="right", padx=10)
+                state["labels"].append(status)
+            
+            overall_label.configure(text=f"Знайдено файлів: {len(project.files)}",
+                                    text_color=self.colors["accent"])
+            return project
+        
+        def select_dir():
+            folder = filedialog.askdirectory(parent=window, title="Виберіть папку проєкту")
+            if folder:
+                dir_entry.delete(0, "end")
+                dir_entry.insert(0, folder)
+                scan_files()
+        
+        def refresh_progress():
+            # Оновлення UI з накопиченого прогресу (не частіше ніж раз на 200мс)
+            if not window.winfo_exists():
+                return
+            project = state["project"]
+            for file_idx, (done, total) in list(state["progress"].items()):
+                state["labels"][file_idx].configure(text=f"🔄 {done} / {total}",
+                                                    text_color=self.colors["warning"])
+            state["progress"].clear()
+            total_files = len(project.files)
+            overall_bar.set(state["done"] / total_files if total_files else 1)
+            overall_label.configure(text=f"Файлів: {state['done']} / {total_files}")
+            self._update_rate_stats()
+            if self.is_translating:
+                self.after(200, refresh_progress)
+        
+        def on_file_done(file_idx, status, failed):
+            texts = {
+                "done": ("✅ готово", self.colors["success"]),
+                "failed": (f"⚠️ {failed} рядків з [!]", self.colors["warning"]),
+                "stopped": ("⏹ зупинено", self.colors["text_muted"]),
+                "error": ("❌ помилка", "#da3633"),
+            }
+            text, color = texts[status]
+            state["done"] += 1
+            state["progress"].pop(file_idx, None)
+            self.after(0, lambda: window.winfo_exists() and
+                       state["labels"][file_idx].configure(text=text, text_color=color))
+        
+        def on_file_progress(file_idx, done, total):
+            state["progress"][file_idx] = (done, total)
+        
+        def run_project(project):
+            project.run()
+            self.after(0, finish_project)
+        
+        def finish_project():
+            self._translation_complete(state["project"].root.name)
+            if not window.winfo_exists():
+                return
+            total_files = len(state["project"].files)
+            overall_bar.set(state["done"] / total_files if total_files else 1)
+            overall_label.configure(text=f"✅ Готово: {state['done']} / {total_files} файлів",
+                                    text_color=self.colors["success"])
+            start_btn.configure(state="normal")
+        
+        def start_project():
+            if self.is_translating:
+                return
+            project = scan_files()
+            if project is None or not project.files:
+                return
+            engine = self._create_engine()
+            if engine is None:
+                return
+            
+            self.engine = engine
+            project.engine = engine
+            project.parallel_files = int(parallel_var.get())
+            project.on_file_progress = on_file_progress
+            project.on_file_done = on_file_done
+            state.update(project=project, done=0)
+            state["progress"].clear()
+            
+            self.is_translating = True
+            self.translation_start_time = time.time()
+            self.translated_count = 0
+            self.translate_btn.configure(state="disabled")
+            self.stop_btn.configure(state="normal")
+            self.file_btn.configure(state="disabled")
+            start_btn.configure(state="disabled")
+            self._update_status(f"📁 Переклад проєкту: {len(project.files)} файлів...", self.colors["warning"])
+            
+            threading.Thread(target=run_project, args=(project,), daemon=True).start()
+            refresh_progress()
+        
+        ctk.CTkButton(dir_row, text="📂 Вибрати", width=100, height=32,
+                      fg_color=self.colors["accent"], hover_color=self.colors["accent_hover"],
+                      command=select_dir).pack(side="left")
+        
+        btn_frame = ctk.CTkFrame(window, fg_color="transparent")
+        btn_frame.pack(fill="x", padx=20, pady=(0, 20))
+        
+        ctk.CTkButton(btn_frame, text="🔍 Знайти файли", width=140, height=38,
+                      fg_color=self.colors["bg_input"], hover_color=self.colors["border"],
+                      command=scan_files).pack(side="left", padx=(0, 10))
+        
+        start_btn = ctk.CTkButton(btn_frame, text="🚀 Почати", width=120, height=38,
+                                  font=ctk.CTkFont(size=14, weight="bold"),
+                                  fg_color=self.colors["success"], hover_color="#2ea043",
+                                  command=start_project)
+        start_btn.pack(side="left", padx=(0, 10))
+        
+        ctk.CTkButton(btn_frame, text="⏹ Зупинити", width=120, height=38,
+                      fg_color="#da3633", hover_color="#b62324",
+                      command=self._stop_translation).pack(side="left")
+        
+        ctk.CTkButton(btn_frame, text="Закрити", width=100, height=38,
+                      fg_color=self.colors["bg_input"], hover_color=self.colors["border"],
+                      command=window.destroy).pack(side="right")
+    
+    # ============ МІНІ-ІГРИ ============
+    
     def _open_games_window(self):
         """Вікно з міні-іграми для очікування перекладу"""
         if self.games_window is not None and self.games_window.winfo_exists():
@@ -3005,7 +3723,7 @@ class TranslatorApp(ctk.CTk):
     
     def _update_text_stats(self):
         """Оновлення статистики тексту"""
-        text = self.original_text.get("1.0", "end-1c")
+        text = self.original_pane.text() if self.original_pane.active else self.original_text.get("1.0", "end-1c")
         
         # Підрахунок
         chars = len(text)
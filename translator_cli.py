@@ -0,0 +1,307 @@
+"""
+TranslatorUKR 1.0 - Консольний (headless) режим перекладу без графічного інтерфейсу
+
+Приклади:
+    python translator_cli.py game.json --provider DeepSeek --model deepseek-chat
+    python translator_cli.py a.po b.po --provider Ollama --model qwen2.5 -j 4 --output-dir out
+    python translator_cli.py game/Localization --glob "**/*.po" -j 8
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from translator_core import (
+    PROVIDERS, TranslationEngine, TranslationMemory, ProjectTranslator, CheckpointJournal, AsyncBackend,
+    create_client, routes_from_config, Route, split_base_urls,
+    read_lines, save_translation, translated_file_name, load_glossary, format_parser_for,
+    LineReader, is_large_file, translate_file_streaming, is_failed_line
+)
+
+# Коди виходу
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+
+def load_settings(path="translator_settings.json"):
+    """Налаштування GUI - значення за замовчуванням для CLI"""
+    settings_file = Path(path)
+    if not settings_file.exists():
+        return {}
+    try:
+        with open(settings_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except:
+        return {}
+
+
+def build_parser():
+    """Аргументи командного рядка"""
+    parser = argparse.ArgumentParser(
+        prog="translator_cli",
+        description="TranslatorUKR - переклад файлів на українську за допомогою LLM (без GUI)"
+    )
+    parser.add_argument("files", nargs="+", help="файли або папки проєктів для перекладу")
+    parser.add_argument("--provider", help="провайдер зі списку (OpenAI, DeepSeek, Ollama, ...)")
+    parser.add_argument("--model", help="назва моделі")
+    parser.add_argument("--base-url", help="Base URL API (за замовчуванням - URL провайдера); кілька серверів однієї моделі - через кому")
+    parser.add_argument("--api-key", help="API ключ (або змінна оточення TRANSLATOR_API_KEY / OPENAI_API_KEY)")
+    parser.add_argument("-j", "--concurrency", type=int, help="кількість одночасних запитів (на кожен сервер)")
+    parser.add_argument("--pool", help="JSON зі списком додаткових провайдерів для балансування і failover "
+                                       '([{"provider": "Ollama", "model": "qwen2.5", "base_url": "...", "weight": 2}, ...])')
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="асинхронні запити через спільний пул з'єднань (для -j 64 і більше)")
+    parser.add_argument("--batch-chars", type=int, help="ліміт символів пакетного запиту (0 - вимкнено)")
+    parser.add_argument("--output-dir", help="папка для перекладів (за замовчуванням - поруч з оригіналом)")
+    parser.add_argument("--glob", default="**/*", help="шаблон файлів для папок проєктів")
+    parser.add_argument("--parallel-files", type=int, default=4, help="файлів проєкту одночасно")
+    parser.add_argument("--glossary", default="glossary.json", help="файл глосарію")
+    parser.add_argument("--no-cache", action="store_true", help="не використовувати пам'ять перекладів")
+    parser.add_argument("--cache-db", default="translation_memory.db", help="файл пам'яті перекладів")
+    parser.add_argument("--resume", action="store_true", help="продовжити перерваний переклад з журналу")
+    parser.add_argument("--stream", action="store_true",
+                        help="потоковий переклад без завантаження файлу в пам'ять (для великих файлів вмикається сам)")
+    parser.add_argument("--report", help="звіт запуску: підсумки в JSON, запити - у .csv поруч (напр. run.json)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="не показувати прогрес")
+    return parser
+
+
+def log(message):
+    """Повідомлення в stderr (stdout лишається чистим)"""
+    print(message, file=sys.stderr, flush=True)
+
+
+def translate_file(engine, file_path, output_path, quiet=False, resume=False):
+    """Переклад одного файлу. Повертає кількість рядків з помилкою перекладу"""
+    lines = read_lines(file_path)
+    total_lines = len(lines)
+    name = Path(file_path).name
+    last_report = [0.0]
+    
+    # Журнал прогресу - після збою можна продовжити з --resume
+    journal = CheckpointJournal.for_file(file_path)
+    known = journal.load(lines) if resume else {}
+    if known and not quiet:
+        log(f"↻ {name}: {len(known)} з {total_lines} рядків уже перекладено")
+    journal.start(lines, known)
+    
+    def on_line(idx, translated_line):
+        if idx not in known:
+            journal.append(idx, lines[idx], translated_line)
+        # Прогрес не частіше ніж раз на 0.5с
+        now = time.time()
+        if quiet or (now - last_report[0] < 0.5 and idx + 1 < total_lines):
+            return
+        last_report[0] = now
+        sys.stderr.write(f"\r{name}: {idx + 1} / {total_lines} рядків")
+        sys.stderr.flush()
+    
+    try:
+        translated_lines = engine.translate_lines(lines, on_line, known, parser=format_parser_for(file_path))
+    finally:
+        journal.close()
+    if not quiet:
+        sys.stderr.write("\n")
+    
+    save_translation(output_path, translated_lines)
+    return sum(1 for line in translated_lines if is_failed_line(line))
+
+
+def translate_file_stream(engine, file_path, output_path, quiet=False):
+    """Потоковий переклад великого файлу. Повертає кількість рядків з помилкою перекладу"""
+    reader = LineReader(file_path)
+    name = Path(file_path).name
+    last_report = [0.0]
+    
+    def on_line(idx, translated_line):
+        now = time.time()
+        if quiet or now - last_report[0] < 0.5:
+            return
+        last_report[0] = now
+        sys.stderr.write(f"\r{name}: {idx + 1} / ~{reader.estimated_total} рядків ({reader.progress:.0%})")
+        sys.stderr.flush()
+    
+    completed, failed = translate_file_streaming(engine, reader, output_path, on_line)
+    if not quiet:
+        sys.stderr.write(f"\r{name}: {reader.count} рядків\n")
+    if not completed:
+        log(f"⏹ {name}: переклад зупинено, {output_path} не змінено")
+    return failed
+
+
+def save_report(telemetry, path):
+    """Звіт запуску: run.json -> run.json (підсумки) і run.csv (запити)"""
+    report_base = Path(path)
+    if report_base.suffix.lower() in (".json", ".csv"):
+        report_base = report_base.with_suffix("")
+    try:
+        log(f"📈 Звіт: {telemetry.save(report_base)}")
+    except OSError as e:
+        log(f"⚠️ Не вдалося записати звіт: {e}")
+
+
+def translate_project(engine, root, args):
+    """Переклад папки проєкту в дзеркальне дерево -ukr. Повертає True якщо без помилок"""
+    output_root = Path(args.output_dir) / f"{Path(root).name}-ukr" if args.output_dir else None
+    
+    def on_file_done(file_idx, status, failed):
+        file_path = project.files[file_idx]
+        icons = {"done": "✅", "failed": "⚠️", "stopped": "⏹", "error": "❌"}
+        done = len(project.results)
+        log(f"[{done}/{len(project.files)}] {icons[status]} {file_path.relative_to(project.root)}"
+            + (f" ({failed} рядків з [!])" if failed else ""))
+    
+    project = ProjectTranslator(engine, root, args.glob, output_root,
+                                parallel_files=args.parallel_files, on_file_done=on_file_done)
+    log(f"📁 {root}: {len(project.files)} файлів -> {project.output_root}")
+    results = project.run()
+    return all(status == "done" for status, _ in results.values()) and len(results) == len(project.files)
+
+
+def main(argv=None):
+    """Точка входу консольного режиму"""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    
+    args = build_parser().parse_args(argv)
+    settings = load_settings()
+    
+    provider = args.provider or settings.get("provider", "OpenAI")
+    if provider not in PROVIDERS:
+        log(f"❌ Невідомий провайдер: {provider}")
+        return EXIT_USAGE
+    provider_info = PROVIDERS[provider]
+    
+    # Якщо провайдер змінено - не беремо URL/модель з налаштувань GUI
+    same_provider = provider == settings.get("provider")
+    base_urls = split_base_urls(args.base_url or (same_provider and settings.get("base_url")) or provider_info["url"])
+    model = (args.model or (same_provider and (settings.get("custom_model") or settings.get("model")))
+             or (provider_info["models"] or [""])[0])
+    api_key = (args.api_key or os.environ.get("TRANSLATOR_API_KEY") or os.environ.get("OPENAI_API_KEY")
+               or (same_provider and settings.get("api_key")) or "")
+    
+    if not base_urls:
+        log("❌ Вкажіть --base-url")
+        return EXIT_USAGE
+    if not model:
+        log("❌ Вкажіть --model")
+        return EXIT_USAGE
+    if provider_info.get("needs_key", True) and not api_key:
+        log("❌ Вкажіть API ключ (--api-key або TRANSLATOR_API_KEY)")
+        return EXIT_USAGE
+    
+    # Пул провайдерів: основний з аргументів + додаткові з --pool (або з налаштувань GUI)
+    pool = settings.get("provider_pool") if settings.get("use_pool") else None
+    if args.pool:
+        try:
+            with open(args.pool, "r", encoding="utf-8") as f:
+                pool = json.load(f)
+        except (OSError, ValueError) as e:
+            log(f"❌ --pool: {e}")
+            return EXIT_USAGE
+    try:
+        routes = routes_from_config(pool)
+    except ValueError as e:
+        log(f"❌ {e}")
+        return EXIT_USAGE
+    # Додаткові сервери тієї ж моделі з --base-url
+    routes = [Route(create_client(api_key, url, timeout=60), model, provider) for url in base_urls[1:]] + routes
+    
+    translation_memory = None
+    if not args.no_cache:
+        translation_memory = TranslationMemory(args.cache_db)
+    
+    # Потоки - на кожен сервер
+    concurrency = (args.concurrency or settings.get("concurrency", 1)) * len(base_urls)
+    backend = None
+    if args.use_async or settings.get("async_backend", False):
+        backend = AsyncBackend(api_key, base_urls[0], timeout=60, max_connections=max(10, concurrency))
+    
+    engine = TranslationEngine(
+        create_client(api_key, base_urls[0], timeout=60), model,
+        provider=provider,
+        glossary=load_glossary(args.glossary),
+        concurrency=concurrency,
+        batch_chars=args.batch_chars if args.batch_chars is not None else settings.get("batch_chars", 0),
+        translation_memory=translation_memory,
+        on_status=None if args.quiet else lambda text, kind: log(f"\n{text}"),
+        backend=backend,
+        budgets=settings.get("model_budgets"),
+        routes=routes
+    )
+    
+    log(f"🚀 {provider} / {model} | файлів: {len(args.files)} | потоків: {engine.concurrency}"
+        + (f" | пул: {len(engine.router)} маршрутів" if routes else "")
+        + (" | async" + (" (HTTP/2)" if backend.http2 else "") if backend else ""))
+    
+    exit_code = EXIT_OK
+    start_time = time.time()
+    try:
+        for file_path in args.files:
+            if Path(file_path).is_dir():
+                if not translate_project(engine, file_path, args):
+                    exit_code = EXIT_FAILED
+                continue
+            
+            output_dir = Path(args.output_dir) if args.output_dir else Path(file_path).parent
+            output_path = output_dir / translated_file_name(file_path)
+            try:
+                output_dir.mkdir(parents=True, exist_ok=True)
+                if args.stream or is_large_file(file_path):
+                    # Журнал потребує всіх рядків у пам'яті - у потоковому режимі продовження немає
+                    if args.resume:
+                        log(f"⚠️ {file_path}: --resume не підтримується потоковим перекладом")
+                    failed = translate_file_stream(engine, file_path, output_path, args.quiet)
+                else:
+                    failed = translate_file(engine, file_path, output_path, args.quiet, args.resume)
+            except OSError as e:
+                log(f"❌ {file_path}: {e}")
+                exit_code = EXIT_FAILED
+                continue
+            
+            if failed:
+                log(f"⚠️ {output_path}: {failed} рядків не перекладено ([!])")
+                exit_code = EXIT_FAILED
+            else:
+                log(f"✅ {output_path}")
+    except KeyboardInterrupt:
+        engine.stop()
+        log("⏹ Переклад зупинено")
+        return EXIT_INTERRUPTED
+    finally:
+        if backend:
+            backend.close()
+        engine.telemetry.finish()
+        if args.report:
+            save_report(engine.telemetry, args.report)
+    
+    elapsed = time.time() - start_time
+    summary = f"⏱️ {int(elapsed // 60)}:{int(elapsed % 60):02d}"
+    if translation_memory:
+        summary += f" | 🧠 кеш: {translation_memory.hits} влучань / {translation_memory.misses} промахів"
+    telemetry = engine.telemetry
+    if telemetry.requests:
+        summary += (f" | 🌐 {telemetry.requests} запитів, {telemetry.retries} повторів, "
+                    f"токени {telemetry.prompt_tokens}/{telemetry.completion_tokens}")
+        if telemetry.cached_tokens:
+            summary += f" (з кешу промпту {telemetry.cached_tokens})"
+    if routes:
+        summary += f" | 🔀 {engine.router.describe()}"
+    limits = engine.rate_limiter.describe()
+    if limits or engine.throttle_time:
+        summary += f" | 🚦 {limits or 'ліміти невідомі'}, пауза {engine.throttle_time:.0f}с"
+    log(summary)
+    
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
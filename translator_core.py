@@ -0,0 +1,3805 @@
+"""
+TranslatorUKR 1.0 - Рушій перекладу без графічного інтерфейсу (використовується GUI та CLI)
+"""
+
+import os
+import threading
+import queue
+import asyncio
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import time
+from collections import deque
+from pathlib import Path
+from openai import OpenAI, AsyncOpenAI
+import httpx
+import json
+import re
+import hashlib
+import csv
+import heapq
+import sqlite3
+
+
+# Провайдери API
+PROVIDERS = {
+    "OpenAI": {"url": "https://api.openai.com/v1", "models": ["gpt-4o-mini", "gpt-4o", "gpt-4-turbo", "gpt-4.1-mini", "gpt-4.1", "o1-mini", "o1"], "needs_key": True},
+    "Anthropic": {"url": "https://api.anthropic.com/v1", "models": ["claude-3-5-sonnet-20241022", "claude-3-5-haiku-20241022", "claude-3-opus-20240229"], "needs_key": True},
+    "DeepSeek": {"url": "https://api.deepseek.com/v1", "models": ["deepseek-chat", "deepseek-coder", "deepseek-reasoner"], "needs_key": True},
+    "Google AI": {"url": "https://generativelanguage.googleapis.com/v1beta/openai", "models": ["gemini-2.0-flash", "gemini-1.5-pro", "gemini-1.5-flash"], "needs_key": True},
+    "Mistral": {"url": "https://api.mistral.ai/v1", "models": ["mistral-large-latest", "mistral-medium-latest", "mistral-small-latest", "codestral-latest"], "needs_key": True},
+    "Groq": {"url": "https://api.groq.com/openai/v1", "models": ["llama-3.3-70b-versatile", "llama-3.1-8b-instant", "mixtral-8x7b-32768", "gemma2-9b-it"], "needs_key": True},
+    "OpenRouter": {"url": "https://openrouter.ai/api/v1", "models": ["openai/gpt-4o-mini", "anthropic/claude-3.5-sonnet", "google/gemini-2.0-flash-exp:free", "deepseek/deepseek-chat"], "needs_key": True},
+    "Together": {"url": "https://api.together.xyz/v1", "models": ["meta-llama/Llama-3.3-70B-Instruct-Turbo", "mistralai/Mixtral-8x7B-Instruct-v0.1", "Qwen/Qwen2.5-72B-Instruct-Turbo"], "needs_key": True},
+    "Fireworks": {"url": "https://api.fireworks.ai/inference/v1", "models": ["accounts/fireworks/models/llama-v3p1-70b-instruct", "accounts/fireworks/models/mixtral-8x7b-instruct"], "needs_key": True},
+    "Cerebras": {"url": "https://api.cerebras.ai/v1", "models": ["llama3.1-70b", "llama3.1-8b"], "needs_key": True},
+    "Perplexity": {"url": "https://api.perplexity.ai", "models": ["llama-3.1-sonar-large-128k-chat", "llama-3.1-sonar-small-128k-chat"], "needs_key": True},
+    "Cohere": {"url": "https://api.cohere.ai/v1", "models": ["command-r-plus", "command-r", "command"], "needs_key": True},
+    "─── Локальні LLM ───": {"url": "", "models": [], "needs_key": False, "separator": True},
+    "Ollama": {"url": "http://localhost:11434/v1", "models": ["llama3.2", "llama3.1", "mistral", "gemma2", "qwen2.5", "phi3", "deepseek-r1"], "needs_key": False},
+    "LM Studio": {"url": "http://localhost:1234/v1", "models": ["local-model"], "needs_key": False},
+    "LocalAI": {"url": "http://localhost:8080/v1", "models": ["gpt-4", "ggml-model"], "needs_key": False},
+    "Text Gen WebUI": {"url": "http://localhost:5000/v1", "models": ["local-model"], "needs_key": False},
+    "Jan": {"url": "http://localhost:1337/v1", "models": ["local-model"], "needs_key": False},
+    "GPT4All": {"url": "http://localhost:4891/v1", "models": ["local-model"], "needs_key": False},
+    "Kobold": {"url": "http://localhost:5001/v1", "models": ["local-model"], "needs_key": False},
+    "vLLM": {"url": "http://localhost:8000/v1", "models": ["local-model"], "needs_key": False},
+    "Власний URL": {"url": "", "models": [], "needs_key": True}
+}
+
+# Бюджет токенів моделей: контекстне вікно і максимум токенів відповіді. Ключ - назва моделі
+# або її початок (береться найдовший збіг); можна перевизначити в translator_settings.json
+# ("model_budgets" у тому ж форматі)
+MODEL_BUDGETS = {
+    "gpt-4o": {"context": 128000, "output": 16384},
+    "gpt-4-turbo": {"context": 128000, "output": 4096},
+    "gpt-4.1": {"context": 1047576, "output": 32768},
+    "o1": {"context": 200000, "output": 100000},
+    "o1-mini": {"context": 128000, "output": 65536},
+    "claude-3-5": {"context": 200000, "output": 8192},
+    "claude-3-opus": {"context": 200000, "output": 4096},
+    "anthropic/claude": {"context": 200000, "output": 8192},
+    "deepseek": {"context": 64000, "output": 8192},
+    "gemini": {"context": 1048576, "output": 8192},
+    "google/gemini": {"context": 1048576, "output": 8192},
+    "mistral-large": {"context": 128000, "output": 8192},
+    "mistral-medium": {"context": 32000, "output": 8192},
+    "mistral-small": {"context": 32000, "output": 8192},
+    "codestral": {"context": 32000, "output": 8192},
+    "llama-3.3-70b": {"context": 128000, "output": 32768},
+    "llama-3.1-8b": {"context": 128000, "output": 8192},
+    "llama3.1": {"context": 8192, "output": 4096},
+    "mixtral-8x7b": {"context": 32768, "output": 4096},
+    "gemma2": {"context": 8192, "output": 4096},
+    "command-r": {"context": 128000, "output": 4000},
+    "command": {"context": 4096, "output": 4000},
+    "llama-3.1-sonar": {"context": 127000, "output": 4096},
+}
+# Невідомі моделі: хмарні API / локальні LLM (у локальних серверів контекст часто 4096)
+DEFAULT_BUDGET = {"context": 16384, "output": 4096}
+LOCAL_BUDGET = {"context": 4096, "output": 2048}
+# max_tokens на токен тексту: український переклад довший за оригінал, плюс запас
+REPLY_TOKEN_RATIO = 3
+REPLY_TOKEN_RESERVE = 100
+# Службові токени розмітки повідомлень chat completions
+MESSAGE_TOKEN_OVERHEAD = 8
+# Скільки символів кінця попередньої частини довгого рядка передається як контекст
+CHUNK_CONTEXT_CHARS = 300
+
+
+class TranslationMemory:
+    """Постійний кеш перекладів (SQLite) з витісненням найдавніше використаних записів"""
+    
+    def __init__(self, db_path="translation_memory.db", max_size_mb=200):
+        self.db_path = str(db_path)
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._writes_since_check = 0
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS memory ("
+            "key TEXT PRIMARY KEY, source TEXT, translation TEXT, "
+            "provider TEXT, model TEXT, last_used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON memory(last_used)")
+        self._conn.commit()
+    
+    @staticmethod
+    def normalize(text):
+        """Нормалізація тексту для ключа: без крайніх та повторних пробілів"""
+        return " ".join(text.split())
+    
+    def make_key(self, text, provider, model, prompt_hash):
+        """Ключ запису: текст + провайдер + модель + хеш промпту/глосарію"""
+        raw = "\0".join([self.normalize(text), provider, model, prompt_hash])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    
+    def get(self, key):
+        """Пошук перекладу в кеші (None якщо немає)"""
+        with self._lock:
+            row = self._conn.execute("SELECT translation FROM memory WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE memory SET last_used = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+    
+    def put(self, key, source, translation, provider, model):
+        """Збереження перекладу в кеш"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO memory VALUES (?, ?, ?, ?, ?, ?)",
+                (key, source, translation, provider, model, time.time())
+            )
+            self._writes_since_check += 1
+            if self._writes_since_check >= 200:
+                self._writes_since_check = 0
+                self._evict()
+            self._conn.commit()
+    
+    def _evict(self):
+        """Видалення найстаріших записів, якщо база перевищила ліміт розміру"""
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if (page_count - free_pages) * page_size <= self.max_size_bytes:
+            return
+        
+        # Видаляємо 10% записів, які найдовше не використовувались
+        total = self._conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+        self._conn.execute(
+            "DELETE FROM memory WHERE key IN "
+            "(SELECT key FROM memory ORDER BY last_used LIMIT ?)",
+            (max(1, total // 10),)
+        )
+    
+    def count(self):
+        """Кількість записів у кеші"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+    
+    def purge(self):
+        """Повне очищення кешу"""
+        with self._lock:
+            self._conn.execute("DELETE FROM memory")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+    
+    def reset_stats(self):
+        """Скидання лічильників влучань/промахів"""
+        self.hits = 0
+        self.misses = 0
+    
+    def commit(self):
+        """Запис змін на диск (виклик після оновлень last_used)"""
+        with self._lock:
+            self._conn.commit()
+
+
+# ============ КЛАСИФІКАЦІЯ РЯДКІВ ============
+# Патерни компілюються один раз; перед кожним regex - дешева перевірка символів,
+# без якої збіг неможливий, а набір форматів для рядка обирається за першим символом.
+
+_TIMESTAMP_RE = re.compile(r'^\d{2}:\d{2}:\d{2}[,\.]\d{3}\s*-->\s*\d{2}:\d{2}:\d{2}[,\.]\d{3}$')
+_SPEAKER_TAG_RE = re.compile(r'^\[[A-Z_]+:\s*[^\]]+\]$')
+_ASSIGN_OPEN_RE = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*\s*=\s*[\[\{]$')
+# Включає і "is_code": true/false
+_BOOL_VALUE_RE = re.compile(r'^["\']?[a-zA-Z_]+["\']?\s*:\s*(True|False|true|false|None|null|\d+),?$', re.IGNORECASE)
+_XML_CLOSE_RE = re.compile(r'^<\/[^>]+>$')
+_XML_SELF_CLOSE_RE = re.compile(r'^<[^>]+\/>$')
+_XML_OPEN_RE = re.compile(r'^<[a-zA-Z_][^>]*>$')
+
+_STRUCTURAL_TOKENS = frozenset(['{', '}', '[', ']', ',', '};', '},', '];', '],', '(', ')', '):'])
+_COMMENT_CHARS = frozenset('`/*#-;<')
+_IDENT_START = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_')
+_QUOTES = frozenset('"\'')
+
+_KEY_BRACE_RE = re.compile(r'^([a-zA-Z_][a-zA-Z0-9_]*)\s*\{\s*(.+)\s*\}$', re.DOTALL)
+_BRACE_ONLY_RE = re.compile(r'^\{\s*(.+)\s*\}$', re.DOTALL)
+_JSON_PAIR_RE = re.compile(r'^(["\'])([^"\']+)\1\s*:\s*(["\'])(.*)(\3)\s*(,?)$')
+_JSON_VALUE_RE = re.compile(r'^(["\'])(.+)\1\s*(,?)$')
+_XML_TEXT_RE = re.compile(r'^(<[^>]+>)(.+)(<\/[^>]+>)$')
+_INI_RE = re.compile(r'^([a-zA-Z_][a-zA-Z0-9_\.]*)\s*=\s*(.+)$')
+_YAML_RE = re.compile(r'^([a-zA-Z_][a-zA-Z0-9_\-]*)\s*:\s*(.+)$')
+_LUA_RE = re.compile(r'^(\[?["\']?[^\]"\']+["\']?\]?\s*=\s*)(["\'])(.*)(\2)\s*(,?)$')
+_PO_RE = re.compile(r'^(msgstr\s+)(["\'])(.*)(\2)$')
+_CSV_RE = re.compile(r'^([^,]*,)(["\'])(.+)\2(,.*)$')
+_NUMBER_RE = re.compile(r'^-?\d+\.?\d*$')
+_LETTER_RE = re.compile(r'[a-zA-Zа-яА-ЯіІїЇєЄґҐ]')
+
+# Список ключів які НЕ перекладаємо (системні ключі)
+_SKIP_KEYS = frozenset([
+    'speaker', 'id', 'key', 'name', 'type', 'class', 'tag', 'is_code',
+    'code', 'script', 'function', 'method', 'variable', 'path', 'file',
+    'icon', 'image', 'sound', 'audio', 'animation', 'sprite', 'texture'
+])
+
+# Ключі з текстовим контентом
+# (message, text, description, title, label, hint, tooltip, dialogue, etc.)
+_TRANSLATABLE_KEYS = frozenset([
+    'message', 'text', 'description', 'title', 'label', 'hint',
+    'tooltip', 'dialogue', 'dialog', 'content', 'body', 'value',
+    'caption', 'placeholder', 'button', 'option', 'choice',
+    'question', 'answer', 'reply', 'response', 'note', 'warning',
+    'error', 'success', 'info', 'help', 'about', 'summary'
+])
+
+# Плейсхолдери одним проходом. Порядок альтернатив важливий - спочатку більш специфічні
+_PLACEHOLDER_PATTERNS = [
+    ("mustache", r'\{\{[^}]+\}\}'),            # {{name}}, {{variable}}
+    ("brace", r'\{[^}]+\}'),                   # {0}, {name}, {variable}
+    ("printf_named", r'%\([^)]+\)[sdifx]'),    # %(name)s
+    ("printf", r'%\d*\.?\d*[sdifxXeEgGcpb%]'), # %s, %d, %2d, %.2f, %%
+    ("dollar_brace", r'\$\{[^}]+\}'),          # ${variable}
+    ("dollar", r'\$[a-zA-Z_][a-zA-Z0-9_]*'),   # $variable
+    ("tag", r'<[^>]+>'),                       # <tag>, <color=#FF0000>, </tag>
+    ("bracket", r'\[[^\]]+\]'),                # [variable], [color]
+    ("escape", r'\\[nrtv\\"\'/]'),             # \n, \t, \r, \\, \", \', \/
+    ("entity", r'&[a-zA-Z]+;'),                # &nbsp;, &amp;
+    ("char_ref", r'&#x?[0-9a-fA-F]+;'),        # &#123;, &#xAB;
+    ("at_var", r'@[a-zA-Z_][a-zA-Z0-9_]*'),    # @variable (деякі движки)
+    ("hash_var", r'#[a-zA-Z_][a-zA-Z0-9_]*#'), # #variable# (деякі движки)
+]
+_PLACEHOLDER_RE = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in _PLACEHOLDER_PATTERNS))
+# Символи, з яких починається будь-який плейсхолдер (рядки без них не скануються)
+_PLACEHOLDER_START_RE = re.compile(r'[{%$<\[\\&@#]')
+
+
+def is_timestamp(line):
+    """Перевірка чи рядок є таймстампом (для субтитрів)"""
+    # SRT timestamp pattern: 00:00:00,000 --> 00:00:00,000
+    return '-->' in line and bool(_TIMESTAMP_RE.match(line.strip()))
+
+
+def is_code_line(line):
+    """Перевірка чи рядок є кодом/технічним рядком (не перекладати)"""
+    stripped = line.strip()
+    
+    # Порожній рядок або тільки числа
+    if not stripped or stripped.isdigit():
+        return True
+    
+    first = stripped[0]
+    last = stripped[-1]
+    
+    # Блок коду markdown (```) та коментарі (різні формати)
+    if first in _COMMENT_CHARS:
+        if stripped.startswith('```'):
+            return True
+        if stripped.startswith('//') or stripped.startswith('/*') or stripped.startswith('*/'):
+            return True
+        if first == '#' and not stripped.startswith('##'):
+            return True
+        if stripped.startswith('--') and not stripped.startswith('---'):
+            return True
+        if first == ';' or stripped.startswith('<!--'):
+            return True
+    
+    # Чисто структурні символи JSON/XML/Python
+    if stripped in _STRUCTURAL_TOKENS:
+        return True
+    
+    # Теги [SPEAKER: ...], [CHARACTER: ...] тощо
+    if first == '[' and last == ']' and _SPEAKER_TAG_RE.match(stripped):
+        return True
+    
+    # Список/масив: dialogue_data = [
+    if last in '[{' and '=' in stripped and _ASSIGN_OPEN_RE.match(stripped):
+        return True
+    
+    # Булеві/None значення в JSON/Python
+    if ':' in stripped and _BOOL_VALUE_RE.match(stripped):
+        return True
+    
+    if first == '<' and last == '>':
+        # Закриваючі/самозакриваючі теги XML
+        if _XML_CLOSE_RE.match(stripped) or _XML_SELF_CLOSE_RE.match(stripped):
+            return True
+        # Відкриваючий тег без тексту
+        if _XML_OPEN_RE.match(stripped) and '>' not in stripped[1:-1]:
+            return True
+    
+    return False
+
+
+def _unquote(value):
+    """Значення без лапок: (внутрішній текст, лапка або '')"""
+    if (value.startswith('"') and value.endswith('"')) or (value.startswith("'") and value.endswith("'")):
+        return value[1:-1], value[0]
+    return value, ''
+
+
+def _parse_key_brace(indent, stripped):
+    """Формат KEY { text } (Unreal, деякі ігрові движки)"""
+    # Текст може містити будь-які символи крім закриваючої дужки
+    if stripped[-1] != '}':
+        return None
+    match = _KEY_BRACE_RE.match(stripped)
+    if match:
+        key, value = match.groups()
+        value = value.strip()
+        if value:
+            return f'{indent}{key} {{ ', value, ' }', extract_placeholders(value)
+    return None
+
+
+def _parse_brace_only(indent, stripped):
+    """Формат тільки { text } без ключа"""
+    if stripped[-1] != '}':
+        return None
+    match = _BRACE_ONLY_RE.match(stripped)
+    if match:
+        value = match.group(1).strip()
+        if value:
+            return f'{indent}{{ ', value, ' }', extract_placeholders(value)
+    return None
+
+
+def _parse_json_pair(indent, stripped):
+    """JSON формат: "key": "value" або 'ключ': 'значення'"""
+    if ':' not in stripped:
+        return None
+    match = _JSON_PAIR_RE.match(stripped)
+    if not match:
+        return None
+    key_quote, key, val_quote, value, _, comma = match.groups()
+    
+    # Якщо ключ системний - не перекладаємо значення
+    key_lower = key.lower()
+    if key_lower in _SKIP_KEYS:
+        return indent, "", "", []
+    
+    # Перекладаємо тільки VALUE якщо це текстовий контент
+    if value.strip() and key_lower in _TRANSLATABLE_KEYS:
+        prefix = f'{indent}{key_quote}{key}{key_quote}: {val_quote}'
+        return prefix, value, f'{val_quote}{comma}', extract_placeholders(value)
+    
+    return indent, "", "", []  # Ключ не в списку - не перекладаємо
+
+
+def _parse_json_value(indent, stripped):
+    """JSON просте значення: "value" або "value","""
+    match = _JSON_VALUE_RE.match(stripped)
+    if match:
+        quote, value, comma = match.groups()
+        if value.strip():
+            return f'{indent}{quote}', value, f'{quote}{comma}', extract_placeholders(value)
+    return None
+
+
+def _parse_xml_text(indent, stripped):
+    """XML формат: <tag attr="x">text</tag>"""
+    if stripped[-1] != '>':
+        return None
+    match = _XML_TEXT_RE.match(stripped)
+    if match:
+        open_tag, content, close_tag = match.groups()
+        if content.strip():
+            return f'{indent}{open_tag}', content, close_tag, extract_placeholders(content)
+    return None
+
+
+def _parse_ini(indent, stripped):
+    """INI формат: key=value"""
+    if '=' not in stripped:
+        return None
+    match = _INI_RE.match(stripped)
+    if not match:
+        return None
+    key, value = match.groups()
+    # Перевіряємо чи значення не є числом або булевим
+    if _NUMBER_RE.match(value) or value.lower() in ('true', 'false', 'yes', 'no', 'null', 'none'):
+        return None
+    inner_value, quote = _unquote(value)
+    return f'{indent}{key}={quote}', inner_value, quote, extract_placeholders(inner_value)
+
+
+def _parse_yaml(indent, stripped):
+    """YAML формат: key: value або key: "value" """
+    if ':' not in stripped:
+        return None
+    match = _YAML_RE.match(stripped)
+    if not match:
+        return None
+    key, value = match.groups()
+    # Пропускаємо якщо значення - список або об'єкт
+    if value.startswith('[') or value.startswith('{'):
+        return None
+    inner_value, quote = _unquote(value)
+    # Пропускаємо числа та булеві
+    if _NUMBER_RE.match(inner_value) or inner_value.lower() in ('true', 'false', 'yes', 'no', 'null', '~'):
+        return None
+    return f'{indent}{key}: {quote}', inner_value, quote, extract_placeholders(inner_value)
+
+
+def _parse_lua(indent, stripped):
+    """Lua формат: ["key"] = "value" або key = "value" """
+    if '=' not in stripped:
+        return None
+    match = _LUA_RE.match(stripped)
+    if match:
+        key_part, quote, value, _, comma = match.groups()
+        if value.strip():
+            return f'{indent}{key_part}{quote}', value, f'{quote}{comma}', extract_placeholders(value)
+    return None
+
+
+def _parse_po(indent, stripped):
+    """PO/POT формат: msgstr "text" """
+    if not stripped.startswith('msgstr'):
+        return None
+    match = _PO_RE.match(stripped)
+    if match:
+        prefix_part, quote, value, _ = match.groups()
+        if value.strip():
+            return f'{indent}{prefix_part}{quote}', value, quote, extract_placeholders(value)
+    return None
+
+
+def _parse_csv(indent, stripped):
+    """CSV формат (спрощено) - текст в лапках"""
+    if ',' not in stripped:
+        return None
+    match = _CSV_RE.match(stripped)
+    if match:
+        before, quote, value, after = match.groups()
+        return f'{indent}{before}{quote}', value, f'{quote}{after}', extract_placeholders(value)
+    return None
+
+
+# Формати в порядку перевірки та умова на перший символ, без якої формат неможливий
+_LINE_PARSERS = [
+    (_parse_key_brace, lambda first: first in _IDENT_START),
+    (_parse_brace_only, lambda first: first == '{'),
+    (_parse_json_pair, lambda first: first in _QUOTES),
+    (_parse_json_value, lambda first: first in _QUOTES),
+    (_parse_xml_text, lambda first: first == '<'),
+    (_parse_ini, lambda first: first in _IDENT_START),
+    (_parse_yaml, lambda first: first in _IDENT_START),
+    (_parse_lua, lambda first: first != ']'),
+    (_parse_po, lambda first: first == 'm'),
+    (_parse_csv, lambda first: True),
+]
+_PARSERS_BY_FIRST_CHAR = {}
+
+
+def _parsers_for(first):
+    """Формати, можливі для рядка з цим першим символом (кешується)"""
+    parsers = _PARSERS_BY_FIRST_CHAR.get(first)
+    if parsers is None:
+        parsers = [parser for parser, accepts in _LINE_PARSERS if accepts(first)]
+        _PARSERS_BY_FIRST_CHAR[first] = parsers
+    return parsers
+
+
+def extract_translatable_text(line):
+    """
+    Витягує текст для перекладу зі збереженням структури.
+    Повертає: (prefix, text_to_translate, suffix, placeholders)
+    """
+    # Зберігаємо початкові пробіли/відступи
+    leading_spaces = len(line) - len(line.lstrip())
+    indent = line[:leading_spaces]
+    stripped = line.strip()
+    if not stripped:
+        return indent, "", "", []
+    
+    for parser in _parsers_for(stripped[0]):
+        result = parser(indent, stripped)
+        if result is not None:
+            return result
+    
+    # === Якщо не знайшли формат - перекладаємо весь рядок якщо є текст ===
+    # Перевіряємо чи містить кириличні або латинські літери (тобто текст)
+    if _LETTER_RE.search(stripped):
+        return indent, stripped, "", extract_placeholders(stripped)
+    
+    # Немає тексту для перекладу
+    return indent, "", "", []
+
+
+def extract_placeholders(text):
+    """Витягує всі плейсхолдери/коди з тексту (один прохід, у порядку появи)"""
+    if not _PLACEHOLDER_START_RE.search(text):
+        return []
+    return [match.group() for match in _PLACEHOLDER_RE.finditer(text)]
+
+
+def restore_placeholders(original_text, translated_text, placeholders):
+    """Відновлює плейсхолдери у перекладеному тексті"""
+    if not placeholders:
+        return translated_text
+    
+    result = translated_text
+    
+    # Знаходимо плейсхолдери в перекладі (можуть бути змінені/загублені)
+    translated_placeholders = extract_placeholders(result)
+    
+    # Якщо всі плейсхолдери на місці та ідентичні - повертаємо як є
+    if set(translated_placeholders) == set(placeholders):
+        return result
+    
+    # Перевіряємо кожен плейсхолдер
+    for placeholder in placeholders:
+        if placeholder not in result:
+            # Плейсхолдер зник - шукаємо схожий та замінюємо
+            found_replacement = False
+            for trans_ph in translated_placeholders:
+                # Якщо є щось схоже (напр. {0} став { 0 })
+                if trans_ph not in placeholders:
+                    result = result.replace(trans_ph, placeholder, 1)
+                    translated_placeholders.remove(trans_ph)
+                    found_replacement = True
+                    break
+            
+            # Якщо не знайшли заміну - додаємо в кінець
+            if not found_replacement:
+                # Не додаємо теги в кінець, бо це зламає форматування
+                if not placeholder.startswith('<'):
+                    result = result.rstrip() + ' ' + placeholder
+    
+    return result
+
+
+def split_into_chunks(text, max_size, measure=len):
+    """Розбиття тексту на частини по реченнях (measure - розмір у символах або токенах)"""
+    # Спочатку спробуємо по реченнях
+    sentences = re.split(r'(?<=[.!?])\s+', text)
+    
+    chunks = []
+    current_chunk = ""
+    current_size = 0
+    space_size = measure(" ")
+    
+    for sentence in sentences:
+        sentence_size = measure(sentence)
+        if current_size + sentence_size <= max_size:
+            if current_chunk:
+                current_chunk += " "
+                current_size += space_size
+            current_chunk += sentence
+            current_size += sentence_size
+        else:
+            if current_chunk:
+                chunks.append(current_chunk)
+            
+            # Якщо речення само по собі занадто довге - розбиваємо по словах
+            if sentence_size > max_size:
+                words = sentence.split()
+                current_chunk = ""
+                current_size = 0
+                for word in words:
+                    word_size = measure(word)
+                    if current_size + word_size + space_size <= max_size:
+                        if current_chunk:
+                            current_chunk += " "
+                            current_size += space_size
+                        current_chunk += word
+                        current_size += word_size
+                    else:
+                        if current_chunk:
+                            chunks.append(current_chunk)
+                        current_chunk = word
+                        current_size = word_size
+            else:
+                current_chunk = sentence
+                current_size = sentence_size
+    
+    if current_chunk:
+        chunks.append(current_chunk)
+    
+    return chunks if chunks else [text]
+
+
+def context_tail(text, max_chars=CHUNK_CONTEXT_CHARS):
+    """Кінець тексту як контекст для наступної частини: з початку речення або слова"""
+    if len(text) <= max_chars:
+        return text
+    tail = text[-max_chars:]
+    match = re.search(r'[.!?]\s+', tail)
+    if match and match.end() < len(tail):
+        return tail[match.end():]
+    space = tail.find(" ")
+    return tail[space + 1:] if space != -1 else tail
+
+
+def _budget_lookup(table, model):
+    """Бюджет з таблиці за найдовшим префіксом назви моделі (None - немає збігу)"""
+    model_key = (model or "").lower()
+    matches = [prefix for prefix in table if model_key.startswith(prefix.lower())]
+    return dict(table[max(matches, key=len)]) if matches else None
+
+
+def model_budget(provider, model, custom=None):
+    """
+    Бюджет токенів моделі {"context", "output"}: власні налаштування, потім таблиця.
+    Для локальних LLM контекст задає сервер, а не модель - таблиця не застосовується.
+    """
+    budget = _budget_lookup(custom or {}, model)
+    if budget:
+        return budget
+    if not PROVIDERS.get(provider, {}).get("needs_key", True):
+        return dict(LOCAL_BUDGET)
+    return _budget_lookup(MODEL_BUDGETS, model) or dict(DEFAULT_BUDGET)
+
+
+_tokenizers = {}
+_tokenizers_lock = threading.Lock()
+
+
+def tokenizer_for(model):
+    """Токенізатор tiktoken для моделі (None - бібліотеки немає або кодування недоступне)"""
+    if importlib.util.find_spec("tiktoken") is None:
+        return None
+    with _tokenizers_lock:
+        if model not in _tokenizers:
+            try:
+                import tiktoken
+                try:
+                    _tokenizers[model] = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    # Не-OpenAI модель: o200k - близьке наближення для сучасних BPE
+                    _tokenizers[model] = tiktoken.get_encoding("o200k_base")
+            except Exception:
+                _tokenizers[model] = None
+        return _tokenizers[model]
+
+
+def count_tokens(text, tokenizer=None):
+    """
+    Кількість токенів тексту. Без токенізатора - швидка оцінка: латиниця ~4 символи на
+    токен, кирилиця та інші не-ASCII ~2.5, з запасом 10%.
+    """
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, disallowed_special=()))
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return int((ascii_chars / 4 + (len(text) - ascii_chars) / 2.5) * 1.1) + 1
+
+
+def glossary_prompt(terms):
+    """Правило промпту з термінами глосарію, знайденими в тексті запиту ('' - немає)"""
+    if not terms:
+        return ""
+    return "\n- Glossary, use exactly these translations: " + "; ".join(
+        f"{term}→{translation}" for term, translation in terms
+    )
+
+
+# Глосарій до такого розміру (токенів) іде цілим у спільний префікс промпту,
+# більший - лише терміни з тексту запиту в його кінці
+GLOSSARY_PREFIX_TOKENS = 1500
+
+# Завдання для кожного типу запиту - після спільного префікса
+LINE_TASK = (
+    "\n\nTASK: Translate the user's text to Ukrainian. Output ONLY the translated text. "
+    "If you output anything other than the translation, you have failed."
+)
+BATCH_TASK = (
+    "\n\nTASK: Translate each numbered line of the user's text to Ukrainian. "
+    "Output ONLY the translations, one per line, in the same format: [N] translation. "
+    "Keep the numbering exactly as in the input, do not merge, split or skip lines."
+)
+CHUNK_TASK = (
+    "\n\nTASK: The user's text is one part of a long text. Translate it to Ukrainian. "
+    "Output ONLY the translation, nothing else."
+)
+
+
+def build_prompt_prefix(glossary=None):
+    """
+    Початок системного промпту, спільний для всіх запитів: правила і (якщо передано) весь
+    глосарій. Він побайтово однаковий у кожному запиті, тож провайдери з автоматичним
+    кешуванням промпту (OpenAI, DeepSeek) і локальні сервери з кешем префікса не обробляють
+    його повторно - усе, що стосується конкретного запиту, йде після нього.
+    """
+    prefix = (
+        "You are a translator to Ukrainian. "
+        "No comments, no explanations, no 'I understand', no 'Ready to work' - ONLY the translated text."
+        "\n\nRULES:"
+        "\n- Keep all placeholders unchanged: {0}, {name}, %s, %d, $var, <tag>, [var], \\n"
+        "\n- Use correct Ukrainian grammar: cases, genders, verb forms"
+        "\n- Use natural Ukrainian: 'є' not 'являється', 'треба' not 'необхідно'"
+        "\n- Names: Michael→Майкл, John→Джон, James→Джеймс"
+    )
+    if glossary:
+        # Сортування - щоб порядок термінів не залежав від порядку в файлі глосарію
+        prefix += "\n\nGLOSSARY, use exactly these translations:\n" + "\n".join(
+            f"{term}→{translation}" for term, translation in sorted(glossary.items())
+        )
+    return prefix
+
+
+def build_system_prompt(placeholder_info="", terms=None, prefix=None):
+    """Системний промпт для перекладу одного рядка (terms - терміни глосарію з цього рядка)"""
+    if prefix is None:
+        prefix = build_prompt_prefix()
+    return f"{prefix}{LINE_TASK}{glossary_prompt(terms)}{placeholder_info}"
+
+
+def parse_batch_response(content, expected_count):
+    """Розбір нумерованої відповіді; None якщо кількість або нумерація не збігаються"""
+    if not content:
+        return None
+    
+    translations = {}
+    for raw_line in content.strip().split("\n"):
+        match = re.match(r'^\s*\[(\d+)\]\s?(.*)$', raw_line)
+        if not match:
+            # Пропускаємо порожні рядки, будь-що інше - зламана відповідь
+            if raw_line.strip():
+                return None
+            continue
+        number = int(match.group(1))
+        if number in translations or not 1 <= number <= expected_count:
+            return None
+        translations[number] = match.group(2).strip()
+    
+    if len(translations) != expected_count:
+        return None
+    
+    return [translations[n] for n in range(1, expected_count + 1)]
+
+
+def create_client(api_key, base_url, timeout=60, http_client=None):
+    """Створення OpenAI-сумісного клієнта (http_client - власний httpx.Client, напр. для бенчмарку)"""
+    # Для локальних моделей використовуємо фіктивний ключ
+    return OpenAI(api_key=api_key or "not-needed", base_url=base_url, timeout=timeout, http_client=http_client)
+
+
+class AsyncBackend:
+    """
+    Асинхронний клієнт AsyncOpenAI у власному потоці з event loop. Всі запити йдуть
+    через спільний пул keep-alive з'єднань (HTTP/2, якщо встановлено h2), тому сотні
+    одночасних запитів не потребують сотень потоків.
+    """
+    
+    def __init__(self, api_key, base_url, timeout=60, max_connections=100, event_hooks=None):
+        self.http2 = importlib.util.find_spec("h2") is not None
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="translator-async", daemon=True)
+        self._thread.start()
+        
+        http_client = httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=30
+            ),
+            timeout=httpx.Timeout(timeout, connect=10),
+            event_hooks=event_hooks
+        )
+        # Для локальних моделей використовуємо фіктивний ключ; повтори після 429 робить RateLimiter
+        self.http_client = http_client
+        self.client = AsyncOpenAI(api_key=api_key or "not-needed", base_url=base_url,
+                                  http_client=http_client, max_retries=0)
+        # Клієнти маршрутів пулу (інші base_url/ключі) на тому самому пулі з'єднань
+        self._clients = {((api_key or "not-needed"), base_url.rstrip("/")): self.client}
+        self._clients_lock = threading.Lock()
+    
+    def client_for(self, api_key, base_url):
+        """Клієнт для іншого сервера або ключа (маршрути ProviderRouter) без нового пулу з'єднань"""
+        key = ((api_key or "not-needed"), base_url.rstrip("/"))
+        with self._clients_lock:
+            if key not in self._clients:
+                self._clients[key] = AsyncOpenAI(api_key=key[0], base_url=base_url,
+                                                 http_client=self.http_client, max_retries=0)
+            return self._clients[key]
+    
+    def submit(self, coro):
+        """Запуск корутини в event loop бекенду. Повертає concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def close(self):
+        """Закриття з'єднань і зупинка event loop"""
+        if self.loop.is_closed():
+            return
+        try:
+            self.submit(self.client.close()).result(timeout=5)
+        except:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        if not self.loop.is_running():
+            self.loop.close()
+
+
+def parse_duration(value):
+    """Тривалість із заголовків лімітів ('6m0s', '1.5s', '20ms', '30') -> секунди (None якщо не розпізнано)"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    parts = re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', str(value))
+    if not parts:
+        return None
+    return sum(float(number) * units[unit] for number, unit in parts)
+
+
+def is_rate_limit_error(error):
+    """Чи є помилка API відмовою через перевищення ліміту (HTTP 429)"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    error_str = str(error).lower()
+    rate_limit_errors = ["rate_limit", "rate limit", "too many requests", "429"]
+    return any(err in error_str for err in rate_limit_errors)
+
+
+# Після зменшення ліміт повертається до швидкості, з якою запити вже проходили:
+# половина різниці за стільки секунд (далі - +1 запит за хвилину на кожну відповідь)
+LIMIT_RECOVERY_HALF_LIFE = 5
+# "Тиск" 429: +1 за кожну, ×0.9 за кожну успішну відповідь. 429 при тиску нижче порогу
+# (після кількох успішних відповідей) - поодинока і не знижує ліміт нижче фактичної швидкості
+LIMIT_PRESSURE_DECAY = 0.9
+LIMIT_PRESSURE_STRAY = 0.5
+# Скільки відповідей 429 поспіль чекати на лімітер, перш ніж здатися (не витрачають спроби)
+RATE_LIMIT_RETRIES = 10
+
+
+class RateLimiter:
+    """
+    Спільний ліміт запитів до однієї моделі провайдера: token bucket для запитів (RPM)
+    і токенів (TPM). Ліміти підлаштовуються на ходу (AIMD): після 429 зменшуються
+    (поодинока 429 - лише пауза і не нижче швидкості, з якою запити вже проходили;
+    429 підряд - вдвічі), після успішних відповідей за кілька секунд відновлюються до
+    цієї швидкості і далі повільно зростають. Заголовки x-ratelimit-* задають стелю,
+    retry-after - паузу для всіх запитів. Висновки з 429 живуть в межах запуску
+    (begin_run/end_run).
+    """
+    
+    _instances = {}
+    _instances_lock = threading.Lock()
+    
+    @classmethod
+    def for_model(cls, provider, model, base_url=""):
+        """Лімітер, спільний для всіх рушіїв з тим самим провайдером, моделлю і сервером"""
+        key = (provider, model, base_url.rstrip("/"))
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls()
+            return cls._instances[key]
+    
+    def __init__(self, rpm=None, tpm=None):
+        self.rpm = rpm  # None - ліміт ще невідомий, запити не стримуються
+        self.tpm = tpm
+        self._configured = (rpm, tpm)
+        self.max_rpm = None  # Стеля з x-ratelimit-limit-*
+        self.max_tpm = None
+        self.rate_limited = 0  # Кількість відповідей 429
+        self._requests = float(rpm or 0)
+        self._tokens = float(tpm or 0)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_limit = 0.0
+        self._consecutive_limits = 0
+        self._pressure = 0.0
+        self._rpm_target = None  # Швидкість, що проходила до останнього зменшення - до неї відновлення
+        self._tpm_target = None
+        self._recent = deque()  # (час, токени) запитів за останню хвилину
+        self._done = deque()  # Час успішних відповідей за останню хвилину
+        self._last_success = time.monotonic()
+        self._runs = 0  # Запусків перекладу, що зараз користуються лімітером
+        self._lock = threading.Lock()
+    
+    def begin_run(self):
+        """
+        Початок запуску перекладу. Якщо одночасних запусків немає, висновки попереднього
+        (зменшені після 429 ліміти, паузи) забуваються - лишаються стеля із заголовків
+        або задані ліміти
+        """
+        with self._lock:
+            if self._runs == 0:
+                self.rpm = self.max_rpm or self._configured[0]
+                self.tpm = self.max_tpm or self._configured[1]
+                self._requests = float(self.rpm or 0)
+                self._tokens = float(self.tpm or 0)
+                self._updated = time.monotonic()
+                self._blocked_until = 0.0
+                self._consecutive_limits = 0
+                self._pressure = 0.0
+                self._rpm_target = self._tpm_target = None
+                self._recent.clear()
+                self._done.clear()
+            self._runs += 1
+    
+    def end_run(self):
+        with self._lock:
+            self._runs = max(0, self._runs - 1)
+    
+    def _refill(self, now):
+        """Поповнення відер пропорційно часу, що минув"""
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+    
+    def reserve(self, tokens):
+        """
+        Резервує один запит і tokens токенів. Повертає, скільки секунд треба
+        зачекати перед відправкою (черга утворюється через борг у відрі).
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            delay = max(0.0, self._blocked_until - now)
+            
+            if self.rpm:
+                self._requests -= 1
+                if self._requests < 0:
+                    delay = max(delay, -self._requests * 60 / self.rpm)
+            if self.tpm:
+                # Запит, більший за хвилинний ліміт, не повинен блокувати назавжди
+                self._tokens -= min(tokens, self.tpm)
+                if self._tokens < 0:
+                    delay = max(delay, -self._tokens * 60 / self.tpm)
+            
+            self._recent.append((now + delay, tokens))
+            while self._recent and self._recent[0][0] < now - 60:
+                self._recent.popleft()
+            return delay
+    
+    def update(self, headers):
+        """Успішна відповідь: відновлення і зростання лімітів та синхронізація з заголовками"""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last_success
+            self._last_success = now
+            self._done.append(now)
+            while self._done[0] < now - 60:
+                self._done.popleft()
+            self._consecutive_limits = 0
+            self._pressure *= LIMIT_PRESSURE_DECAY
+            self._apply_headers(headers, now)
+            
+            # Адитивне зростання: +1 запит і +1 середній запит токенів за хвилину
+            if self.rpm:
+                average_tokens = self.tpm / self.rpm if self.tpm else 0
+                self.rpm = self._recovered(self.rpm, self._rpm_target, 1, self.max_rpm, elapsed)
+                if self.tpm:
+                    self.tpm = self._recovered(self.tpm, self._tpm_target, average_tokens, self.max_tpm, elapsed)
+    
+    @staticmethod
+    def _recovered(rate, target, step, ceiling, elapsed):
+        """Ліміт після успішної відповіді: +step, а нижче target - експоненційне наближення до нього"""
+        grown = rate + step
+        if target and rate < target:
+            approach = target - (target - rate) * 0.5 ** (elapsed / LIMIT_RECOVERY_HALF_LIFE)
+            grown = min(max(target, rate + step), max(grown, approach))
+        return grown if ceiling is None else min(ceiling, grown)
+    
+    def limit_exceeded(self, error):
+        """Відповідь 429: мультиплікативне зменшення лімітів і пауза для всіх запитів"""
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        with self._lock:
+            now = time.monotonic()
+            self.rate_limited += 1
+            self._apply_headers(headers, now)
+            
+            # Одночасні 429 з одного "вибуху" (запити, що вже були в дорозі) рахуються як одна
+            burst = now - self._last_limit < 2
+            stray = self._pressure < LIMIT_PRESSURE_STRAY
+            self._pressure += 1
+            if not burst:
+                self._last_limit = now
+                self._consecutive_limits += 1
+            
+            # Пауза: retry-after від провайдера, інакше 5, 10, 15... секунд
+            retry_after = parse_duration(headers.get("retry-after-ms"))
+            if retry_after is not None:
+                retry_after /= 1000
+            else:
+                retry_after = parse_duration(headers.get("retry-after"))
+            if retry_after is None:
+                retry_after = min(60, 5 * self._consecutive_limits)
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+            if burst:
+                return
+            
+            # Фактична швидкість за останню хвилину, з якою запити проходили (успішні відповіді)
+            while self._done and self._done[0] < now - 60:
+                self._done.popleft()
+            span = max(1.0, now - self._recent[0][0]) if self._recent else 60.0
+            sustained_rpm = len(self._done) * 60 / span
+            success_share = min(1.0, len(self._done) / len(self._recent)) if self._recent else 0.0
+            sustained_tpm = sum(tokens for _, tokens in self._recent) * success_share * 60 / span
+            
+            if self.rpm is None:
+                # Ліміт ще невідомий: поодинока 429 - лише пауза, інакше беремо фактичну швидкість
+                # (не менше 10 RPM: кілька перших запитів - занадто мала вибірка)
+                if not stray:
+                    self.rpm = max(10.0, sustained_rpm)
+                    self._requests = 0.0
+            else:
+                self._rpm_target = sustained_rpm or self._rpm_target
+                self.rpm = self._decreased(self.rpm, sustained_rpm, stray, 1.0)
+                self._requests = min(self._requests, 0.0)
+            
+            if "token" in str(error).lower():
+                if self.tpm is None:
+                    if not stray:
+                        self.tpm = max(1000.0, sustained_tpm)
+                        self._tokens = 0.0
+                else:
+                    self._tpm_target = sustained_tpm or self._tpm_target
+                    self.tpm = self._decreased(self.tpm, sustained_tpm, stray, 1000.0)
+                    self._tokens = min(self._tokens, 0.0)
+    
+    @staticmethod
+    def _decreased(rate, sustained, stray, minimum):
+        """Ліміт після 429: вдвічі менший, але поодинока 429 не опускає його нижче фактичної швидкості"""
+        decreased = rate / 2
+        if stray:
+            decreased = max(decreased, min(rate, sustained))
+        return max(minimum, decreased)
+    
+    def _apply_headers(self, headers, now):
+        """Стеля та залишок лімітів із заголовків x-ratelimit-*"""
+        for kind in ("requests", "tokens"):
+            limit = parse_duration(headers.get(f"x-ratelimit-limit-{kind}"))
+            remaining = parse_duration(headers.get(f"x-ratelimit-remaining-{kind}"))
+            reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            
+            if limit:
+                rate_attr, level_attr = ("rpm", "_requests") if kind == "requests" else ("tpm", "_tokens")
+                setattr(self, "max_" + rate_attr, limit)
+                rate = getattr(self, rate_attr)
+                if rate is None:
+                    # Ліміт став відомий - відро заповнене тим, що залишилось
+                    setattr(self, rate_attr, limit)
+                    setattr(self, level_attr, limit if remaining is None else remaining)
+                elif rate > limit:
+                    setattr(self, rate_attr, limit)
+                if remaining is not None:
+                    setattr(self, level_attr, min(getattr(self, level_attr), remaining))
+            
+            # Ліміт вичерпано - чекаємо до його оновлення
+            if remaining is not None and remaining < 1 and reset:
+                self._blocked_until = max(self._blocked_until, now + reset)
+    
+    def wait_time(self):
+        """Скільки секунд ще триває пауза після 429"""
+        return max(0.0, self._blocked_until - time.monotonic())
+    
+    def describe(self):
+        """Поточні ліміти для рядка статистики ('' якщо ще невідомі)"""
+        parts = []
+        if self.rpm:
+            parts.append(f"{self.rpm:.0f} RPM")
+        if self.tpm:
+            parts.append(f"{self.tpm / 1000:.0f}k TPM" if self.tpm >= 10000 else f"{self.tpm:.0f} TPM")
+        return " · ".join(parts)
+
+
+# Запобіжник маршруту: після стількох збоїв бекенду підряд маршрут вимикається на паузу,
+# після неї пропускається один пробний запит
+CIRCUIT_FAILURES = 3
+CIRCUIT_COOLDOWN = 30
+# Згладжування затримки маршруту (експоненційне ковзне середнє)
+LATENCY_SMOOTHING = 0.3
+# Пропускна здатність маршруту рахується після стількох відповідей; старші за вікно
+# (секунд роботи) відповіді поступово забуваються
+THROUGHPUT_MIN_REQUESTS = 3
+THROUGHPUT_WINDOW = 60
+# Тайм-аут перевірки сервера перед перекладом, с
+PROBE_TIMEOUT = 5
+
+
+def split_base_urls(value):
+    """Кілька Base URL в одному полі (через кому, крапку з комою або пробіл) -> список"""
+    return [url for url in re.split(r"[,;\s]+", value or "") if url]
+
+
+def probe_endpoint(api_key, base_url, timeout=10):
+    """
+    Перевірка сервера запитом списку моделей. Повертає (відповідає, моделі, секунди, помилка);
+    сервер без /models, що відповів HTTP-помилкою, теж вважається живим
+    """
+    start = time.perf_counter()
+    try:
+        client = create_client(api_key, base_url, timeout=timeout).with_options(max_retries=0)
+        models = [model.id for model in client.models.list().data]
+        return True, models, time.perf_counter() - start, None
+    except Exception as e:
+        return getattr(e, "status_code", None) is not None, [], time.perf_counter() - start, e
+
+
+def is_backend_failure(error):
+    """Чи свідчить помилка про збій самого бекенду (мережа, 5xx, ключ, модель), а не конкретного запиту"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        # Немає відповіді сервера: з'єднання, таймаут
+        return not is_rate_limit_error(error)
+    return status >= 500 or status in (401, 403, 404)
+
+
+class Route:
+    """Один бекенд пулу: провайдер і модель зі своїм клієнтом, лімітером, затримкою та запобіжником"""
+    
+    def __init__(self, client, model, provider="", weight=1.0):
+        self.client = client
+        self.model = model
+        self.provider = provider
+        self.weight = max(0.01, float(weight))
+        self.base_url = str(getattr(client, "base_url", "")).rstrip("/")
+        self.name = f"{provider or 'API'}/{model}"
+        # Повтори після 429 робить лімітер, а не вбудована логіка клієнта
+        self.api = client.with_options(max_retries=0)
+        self.rate_limiter = RateLimiter.for_model(provider, model, self.base_url)
+        self.latency = None  # згладжена тривалість запиту, с (None - ще не виміряно)
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.failures = 0  # збоїв бекенду підряд
+        self.open_until = 0.0  # запобіжник розімкнено до цього часу (time.monotonic)
+        # Пропускна здатність: успішні відповіді за час, коли в маршруті були запити
+        self.completed = 0.0
+        self.busy_time = 0.0
+        self.busy_since = None
+    
+    def throughput(self, now):
+        """Відповідей за секунду роботи з урахуванням паралельних запитів (None - ще мало даних)"""
+        if self.completed < THROUGHPUT_MIN_REQUESTS:
+            return None
+        busy = self.busy_time + (now - self.busy_since if self.busy_since is not None else 0.0)
+        return self.completed / busy if busy > 0 else None
+    
+    def available(self, now):
+        """Запобіжник замкнений, або пауза минула і пробний запит ще не відправлено"""
+        return now >= self.open_until and (self.failures < CIRCUIT_FAILURES or self.in_flight == 0)
+    
+    def async_client(self, backend):
+        """Клієнт цього бекенду в AsyncBackend (спільний пул з'єднань)"""
+        return backend.client_for(getattr(self.client, "api_key", ""), self.base_url)
+
+
+class RouteStream:
+    """
+    Потокова відповідь маршруту: маршрут звільняється, а тривалість записується
+    лише після читання всього потоку (див. TranslationEngine._stream_finished)
+    """
+    
+    def __init__(self, chunks, route, start):
+        self.chunks = chunks
+        self.route = route
+        self.start = start  # time.perf_counter() на початку запиту до маршруту
+
+
+class ProviderRouter:
+    """
+    Зважений пул маршрутів. Запит іде туди, де він, імовірно, завершиться найшвидше:
+    (запитів у роботі + 1) / виміряна пропускна здатність / вага + пауза лімітера після 429
+    (поки відповідей мало - за згладженою затримкою). Тож сервери отримують роботу
+    пропорційно до своєї швидкості. Ще не виміряні маршрути пробуються першими, маршрути
+    з розімкненим запобіжником пропускаються. Запит, що впав зі збоєм бекенду або 429,
+    engine передає іншому маршруту.
+    """
+    
+    def __init__(self, routes):
+        self.routes = list(routes)
+        self._lock = threading.Lock()
+        # Однакові провайдер/модель на різних серверах - розрізняємо за адресою
+        names = [route.name for route in self.routes]
+        for route in self.routes:
+            if names.count(route.name) > 1:
+                route.name += f" ({re.sub(r'^https?://', '', route.base_url)})"
+    
+    def __len__(self):
+        return len(self.routes)
+    
+    @staticmethod
+    def _cost(route, now):
+        throughput = route.throughput(now)
+        if throughput:
+            expected = (route.in_flight + 1) / throughput / route.weight
+        else:
+            expected = (route.in_flight + 1) * (route.latency or 0.0) / route.weight
+        return expected + route.rate_limiter.wait_time(), route.in_flight / route.weight
+    
+    def pick(self, exclude=()):
+        """Маршрут для наступного запиту (exclude - вже випробувані для цього запиту)"""
+        with self._lock:
+            now = time.monotonic()
+            candidates = [route for route in self.routes if route not in exclude] or self.routes
+            ready = [route for route in candidates if route.available(now)]
+            if ready:
+                route = min(ready, key=lambda candidate: self._cost(candidate, now))
+            else:
+                # Усі запобіжники розімкнені - той, що відкриється найраніше
+                route = min(candidates, key=lambda candidate: candidate.open_until)
+            if route.in_flight == 0:
+                route.busy_since = now
+            route.in_flight += 1
+            return route
+    
+    def release(self, route, seconds, error=None):
+        """Завершення запиту. Повертає True, якщо через цю помилку запобіжник маршруту розімкнувся"""
+        with self._lock:
+            route.in_flight -= 1
+            route.requests += 1
+            if route.in_flight == 0 and route.busy_since is not None:
+                route.busy_time += time.monotonic() - route.busy_since
+                route.busy_since = None
+            if route.busy_time > THROUGHPUT_WINDOW:
+                route.busy_time /= 2
+                route.completed /= 2
+            if error is None:
+                route.completed += 1
+                if route.latency is None:
+                    route.latency = seconds
+                else:
+                    route.latency += LATENCY_SMOOTHING * (seconds - route.latency)
+                route.failures = 0
+                route.open_until = 0.0
+                return False
+            route.errors += 1
+            if not is_backend_failure(error):
+                return False
+            route.failures += 1
+            if route.failures < CIRCUIT_FAILURES:
+                return False
+            route.open_until = time.monotonic() + CIRCUIT_COOLDOWN
+            return True
+    
+    def can_failover(self, error, tried):
+        """Чи передати запит іншому маршруту: збій бекенду або 429 і є ще не випробуваний доступний"""
+        if not (is_backend_failure(error) or is_rate_limit_error(error)):
+            return False
+        with self._lock:
+            now = time.monotonic()
+            return any(route not in tried and route.available(now) for route in self.routes)
+    
+    def probe(self, timeout=PROBE_TIMEOUT):
+        """
+        Паралельна перевірка всіх серверів (як кнопка "Тест"): запобіжник маршруту, що не
+        відповідає, одразу розмикається. Повертає [(маршрут, відповідає), ...]
+        """
+        with ThreadPoolExecutor(max_workers=len(self.routes)) as executor:
+            results = list(executor.map(
+                lambda route: probe_endpoint(getattr(route.client, "api_key", ""), route.base_url, timeout)[0],
+                self.routes
+            ))
+        with self._lock:
+            now = time.monotonic()
+            for route, alive in zip(self.routes, results):
+                if not alive:
+                    route.failures = CIRCUIT_FAILURES
+                    route.open_until = now + CIRCUIT_COOLDOWN
+        return list(zip(self.routes, results))
+    
+    def describe(self):
+        """Стан маршрутів для рядка статистики"""
+        now = time.monotonic()
+        parts = []
+        for route in self.routes:
+            throughput = route.throughput(now)
+            state = f"{route.latency:.1f}с" if route.latency is not None else "-"
+            if throughput:
+                state += f", {throughput:.1f}/с"
+            if not route.available(now) and route.failures >= CIRCUIT_FAILURES:
+                state = "⛔"
+            parts.append(f"{route.name}: {route.requests} ({state})")
+        return " · ".join(parts)
+
+
+def routes_from_config(entries, timeout=60):
+    """
+    Маршрути пулу з налаштувань: [{"provider", "model", "base_url", "api_key" або "api_key_env",
+    "weight"}, ...]. Без base_url/model - значення провайдера. ValueError - якщо запис неповний
+    """
+    routes = []
+    for number, entry in enumerate(entries or [], 1):
+        provider = entry.get("provider", "")
+        provider_info = PROVIDERS.get(provider, {})
+        base_url = entry.get("base_url") or provider_info.get("url")
+        model = entry.get("model") or (provider_info.get("models") or [""])[0]
+        api_key = entry.get("api_key") or os.environ.get(entry.get("api_key_env", ""), "")
+        if not base_url or not model:
+            raise ValueError(f"пул, запис {number}: вкажіть base_url і model")
+        if provider_info.get("needs_key", True) and not api_key:
+            raise ValueError(f"пул, запис {number} ({provider or base_url}): немає API ключа")
+        routes.append(Route(create_client(api_key, base_url, timeout=timeout), model, provider,
+                            weight=entry.get("weight", 1)))
+    return routes
+
+
+# Скільки найповільніших рядків потрапляє у звіт
+TELEMETRY_SLOWEST = 20
+# Скільки записів запитів зберігається для CSV (далі - лише підсумки)
+TELEMETRY_MAX_RECORDS = 100000
+
+
+def cached_prompt_tokens(usage):
+    """
+    Токени промпту, які провайдер узяв з кешу префікса: OpenAI - prompt_tokens_details.cached_tokens,
+    DeepSeek - prompt_cache_hit_tokens, Anthropic-сумісні - cache_read_input_tokens
+    """
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None)
+    if cached is None:
+        cached = getattr(usage, "prompt_cache_hit_tokens", None)
+    if cached is None:
+        cached = getattr(usage, "cache_read_input_tokens", None)
+    return cached or 0
+
+
+class RunTelemetry:
+    """
+    Телеметрія запуску перекладу: час фаз, запити з токенами з response.usage, повтори
+    та класи помилок, найповільніші рядки. Час фаз - сума по всіх потоках, тому при
+    кількох одночасних запитах "мережа" може бути більшою за тривалість запуску.
+    """
+    
+    PHASES = {
+        "parse": "розбір рядків",
+        "network": "запити до API",
+        "throttle": "очікування лімітера",
+        "retry_wait": "паузи перед повтором",
+        "placeholders": "відновлення плейсхолдерів",
+        "ui": "оновлення інтерфейсу",
+    }
+    CSV_FIELDS = ["kind", "route", "start", "seconds", "prompt_tokens", "cached_tokens", "completion_tokens", "error"]
+    
+    def __init__(self):
+        self.started = time.time()
+        self.finished = None
+        self.phases = dict.fromkeys(self.PHASES, 0.0)
+        self.lines = 0
+        self.requests = 0
+        self.failed_requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0  # з prompt_tokens - узяті провайдером з кешу промпту
+        self.completion_tokens = 0
+        self.retries = 0
+        self.errors = {}  # клас помилки -> кількість
+        self.routes = {}  # маршрут пулу -> {"requests", "errors", "seconds"}
+        self.records = []  # запити для CSV
+        self._slowest = []  # мін-купа (секунди, номер, текст)
+        self._counter = 0
+        self._lock = threading.Lock()
+    
+    def add_time(self, phase, seconds):
+        with self._lock:
+            self.phases[phase] += seconds
+    
+    def add_lines(self, count):
+        with self._lock:
+            self.lines += count
+    
+    def request(self, kind, seconds, usage=None, error=None, route=""):
+        """Завершений запит (kind: line, chunk, batch, stream; route - маршрут пулу): тривалість, токени, помилка"""
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        cached_tokens = cached_prompt_tokens(usage)
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        error_name = type(error).__name__ if error is not None else ""
+        with self._lock:
+            self.requests += 1
+            self.phases["network"] += seconds
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+            self.completion_tokens += completion_tokens
+            if error_name:
+                self.failed_requests += 1
+                self.errors[error_name] = self.errors.get(error_name, 0) + 1
+            if route:
+                route_stats = self.routes.setdefault(route, {"requests": 0, "errors": 0, "seconds": 0.0})
+                route_stats["requests"] += 1
+                route_stats["errors"] += bool(error_name)
+                route_stats["seconds"] += seconds
+            if len(self.records) < TELEMETRY_MAX_RECORDS:
+                self.records.append({
+                    "kind": kind,
+                    "route": route,
+                    "start": round(time.time() - self.started - seconds, 3),
+                    "seconds": round(seconds, 3),
+                    "prompt_tokens": prompt_tokens,
+                    "cached_tokens": cached_tokens,
+                    "completion_tokens": completion_tokens,
+                    "error": error_name,
+                })
+    
+    def retry(self, wait_time=0):
+        """Повторний запит після помилки і пауза перед ним"""
+        with self._lock:
+            self.retries += 1
+            self.phases["retry_wait"] += wait_time or 0
+    
+    def line(self, text, seconds):
+        """Час перекладу тексту (з повторами і частинами) - для списку найповільніших"""
+        with self._lock:
+            self._counter += 1
+            item = (seconds, self._counter, text[:200])
+            if len(self._slowest) < TELEMETRY_SLOWEST:
+                heapq.heappush(self._slowest, item)
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, item)
+    
+    def finish(self):
+        self.finished = time.time()
+    
+    def summary(self):
+        """Підсумки запуску (словник для JSON і панелі звіту)"""
+        with self._lock:
+            latencies = sorted(record["seconds"] for record in self.records if not record["error"])
+            # Затримка запитів з кешованим префіксом промпту і без нього
+            cached = sorted(record["seconds"] for record in self.records
+                            if not record["error"] and record["cached_tokens"])
+            uncached = sorted(record["seconds"] for record in self.records
+                              if not record["error"] and not record["cached_tokens"])
+            slowest = sorted(self._slowest, reverse=True)
+            return {
+                "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                "duration": round((self.finished or time.time()) - self.started, 3),
+                "lines": self.lines,
+                "requests": self.requests,
+                "failed_requests": self.failed_requests,
+                "retries": self.retries,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "prompt_cache_rate": round(self.cached_tokens / self.prompt_tokens, 3) if self.prompt_tokens else None,
+                "completion_tokens": self.completion_tokens,
+                "latency_p50": latencies[(len(latencies) - 1) // 2] if latencies else None,
+                "latency_p95": latencies[int((len(latencies) - 1) * 0.95)] if latencies else None,
+                "latency_p50_cached": cached[(len(cached) - 1) // 2] if cached else None,
+                "latency_p50_uncached": uncached[(len(uncached) - 1) // 2] if uncached else None,
+                "phases": {phase: round(seconds, 3) for phase, seconds in self.phases.items()},
+                "errors": dict(self.errors),
+                "routes": {
+                    route: {"requests": stats["requests"], "errors": stats["errors"],
+                            "avg_seconds": round(stats["seconds"] / stats["requests"], 3)}
+                    for route, stats in self.routes.items()
+                },
+                "slowest_lines": [{"seconds": round(seconds, 3), "text": text} for seconds, _, text in slowest],
+            }
+    
+    def save(self, path):
+        """Звіт: підсумки в <path>.json, запити в <path>.csv. Повертає шлях JSON"""
+        json_path = Path(f"{path}.json")
+        json_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        with self._lock:
+            records = list(self.records)
+        with open(f"{path}.csv", "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=self.CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+        return json_path
+    
+    @staticmethod
+    def report_path(file_path, report_dir="reports"):
+        """Шлях звіту без розширення: reports/<ім'я файлу>-<дата>-<час>"""
+        return Path(report_dir) / f"{Path(file_path).stem}-{time.strftime('%Y%m%d-%H%M%S')}"
+
+
+def load_glossary(path="glossary.json"):
+    """Завантаження глосарію з файлу (порожній словник якщо файлу немає)"""
+    glossary_file = Path(path)
+    if not glossary_file.exists():
+        return {}
+    try:
+        with open(glossary_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except:
+        return {}
+
+
+# Скільки термінів глосарію щонайбільше додається в один запит
+GLOSSARY_MAX_TERMS = 40
+# Додаткове правило для повторного перекладу рядків, де глосарій не дотримано
+GLOSSARY_RETRY_NOTE = (
+    "\n- The previous translation ignored the glossary: every glossary term MUST be translated "
+    "exactly as given (only change its ending to fit the sentence)"
+)
+
+
+class GlossaryIndex:
+    """
+    Індекс термінів глосарію (автомат Aho-Corasick): усі терміни, що є в тексті, знаходяться
+    за один прохід незалежно від розміру глосарію. Додавання і видалення терміна змінюють
+    лише його шлях у борі; суфіксні посилання після додавання перераховуються один раз -
+    перед наступним пошуком.
+    """
+    
+    # Закінчення, з якими термін ще вважається знайденим (quest -> quests, boss's)
+    SUFFIXES = ("", "s", "es", "'s")
+    
+    def __init__(self, glossary=None):
+        self.terms = {}  # ключ у нижньому регістрі -> (термін, переклад)
+        self._goto = [{}]  # переходи вузлів бору за символом
+        self._fail = [0]  # суфіксні посилання
+        self._output = [0]  # найближчий вузол з терміном за суфіксними посиланнями (0 - немає)
+        self._key = [None]  # ключ терміна, що закінчується у вузлі
+        self._dirty = False
+        self._lock = threading.Lock()
+        for term, translation in (glossary or {}).items():
+            self.add(term, translation)
+    
+    def __len__(self):
+        return len(self.terms)
+    
+    def add(self, term, translation):
+        """Додавання або зміна терміна"""
+        key = term.strip().lower()
+        if not key:
+            return
+        with self._lock:
+            node = 0
+            for char in key:
+                child = self._goto[node].get(char)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][char] = child
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(0)
+                    self._key.append(None)
+                node = child
+            self._key[node] = key
+            self.terms[key] = (term, translation)
+            self._dirty = True
+    
+    def remove(self, term):
+        """Видалення терміна: вузли лишаються, знімається лише позначка кінця терміна"""
+        key = term.strip().lower()
+        with self._lock:
+            if self.terms.get(key, (None,))[0] != term:
+                return
+            del self.terms[key]
+            node = 0
+            for char in key:
+                node = self._goto[node][char]
+            self._key[node] = None
+    
+    def _relink(self):
+        """Суфіксні посилання обходом бору в ширину"""
+        order = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            self._output[child] = 0
+            order.append(child)
+        while order:
+            node = order.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[child] = fail
+                self._output[child] = fail if self._key[fail] is not None else self._output[fail]
+                order.append(child)
+        self._dirty = False
+    
+    def _whole_word(self, text, key, start, end):
+        """Термін не є частиною іншого слова (закінчення з SUFFIXES дозволені)"""
+        if key[0].isalnum() and start > 0 and text[start - 1].isalnum():
+            return False
+        if not key[-1].isalnum():
+            return True
+        tail = end
+        while tail < len(text) and (text[tail].isalnum() or text[tail] == "'"):
+            tail += 1
+        return text[end:tail] in self.SUFFIXES
+    
+    def find(self, text, limit=GLOSSARY_MAX_TERMS):
+        """Терміни, що трапляються в тексті цілими словами: [(термін, переклад), ...] у порядку появи"""
+        if not self.terms:
+            return []
+        with self._lock:
+            if self._dirty:
+                self._relink()
+        
+        goto, fail, output, keys = self._goto, self._fail, self._output, self._key
+        lowered = text.lower()
+        found = {}
+        node = 0
+        for end, char in enumerate(lowered, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            match = node if keys[node] is not None else output[node]
+            while match:
+                key = keys[match]
+                if key is not None and key not in found and self._whole_word(lowered, key, end - len(key), end):
+                    entry = self.terms.get(key)
+                    if entry:
+                        found[key] = entry
+                        if len(found) >= limit:
+                            return list(found.values())
+                match = output[match]
+        return list(found.values())
+
+
+# Розділові знаки -> пробіли: після заміни рядок розбивається на слова звичайним split()
+_GLOSSARY_SEPARATORS = str.maketrans({
+    **{char: " " for char in map(chr, range(128)) if not (char.isalnum() or char in "_'\n")},
+    **dict.fromkeys("«»“”„‘…–—¡¿·•", " "),
+    "’": "'"
+})
+# Слова перекладу терміна (лише літери)
+_RENDERING_WORD_RE = re.compile(r"[^\W\d_]+")
+
+# Закінчення українських слів, від найдовших (основа лишається не коротшою за 3 літери)
+UKRAINIAN_ENDINGS = (
+    "ами", "ями", "ові", "еві", "єві", "ого", "ому", "ими", "іми",
+    "ою", "ею", "єю", "ам", "ям", "ах", "ях", "ів", "їв", "ий", "ій", "ої", "ом", "ем", "єм", "им", "ім", "их", "іх",
+    "а", "я", "у", "ю", "і", "ї", "и", "е", "є", "о", "ь", "й"
+)
+UKRAINIAN_VOWELS = "аеєиіїоуюя"
+
+
+def ukrainian_stem(word):
+    """
+    Основа слова для пошуку у відмінюваних формах: без закінчення і без останньої літери
+    основи (навичка -> навич: навичок), а перед голосною - без двох (рівень -> рів: рівня)
+    """
+    word = word.lower()
+    for ending in UKRAINIAN_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 3:
+            word = word[:-len(ending)]
+            break
+    cut = 2 if len(word) > 1 and word[-2] in UKRAINIAN_VOWELS else 1
+    return word[:max(3, len(word) - cut)]
+
+
+class GlossaryChecker:
+    """
+    Перевірка перекладу за глосарієм: рядки (або одиниці формату, див. glossary_segments),
+    де термін є в оригіналі, а його обов'язкового перекладу (з урахуванням відмінювання)
+    у перекладі немає. Увесь файл розбивається на
+    слова одним проходом, рядки без жодного можливого першого слова терміна відкидаються
+    перетином множин, решта термінів шукається за першим словом у словнику.
+    """
+    
+    def __init__(self, glossary):
+        self.terms = {}  # ключ у нижньому регістрі -> (термін, переклад)
+        self._first = {}  # форма першого слова -> [(решта слів терміна, ключ), ...]
+        self._stems = {}  # ключ -> основи слів перекладу
+        for term, translation in (glossary or {}).items():
+            words = term.lower().translate(_GLOSSARY_SEPARATORS).split()
+            if not words or not translation:
+                continue
+            key = " ".join(words)
+            self.terms[key] = (term, translation)
+            self._stems[key] = [ukrainian_stem(word) for word in _RENDERING_WORD_RE.findall(translation)]
+            # Закінчення дозволені лише в останньому слові терміна
+            forms = self._forms(words[0]) if len(words) == 1 else (words[0],)
+            for form in forms:
+                self._first.setdefault(form, []).append((tuple(words[1:]), key))
+    
+    def __len__(self):
+        return len(self.terms)
+    
+    @staticmethod
+    def _forms(word):
+        return {word + suffix for suffix in GlossaryIndex.SUFFIXES}
+    
+    def _occurrences(self, lines):
+        """{ключ: [індекси рядків]} для термінів, що є в рядках"""
+        first = self._first
+        candidates = first.keys()
+        found = {}
+        # Одиниця формату може бути багаторядковою - її індекс не повинен зсуватись
+        text = "\n".join(line.replace("\n", " ") for line in lines).lower().translate(_GLOSSARY_SEPARATORS)
+        for line, words in enumerate(text.split("\n")):
+            words = words.split()
+            # Більшість рядків без термінів відсікається перетином множин
+            if candidates.isdisjoint(words):
+                continue
+            for pos, word in enumerate(words):
+                for rest, key in first.get(word, ()):
+                    if rest:
+                        end = pos + 1 + len(rest)
+                        if (end > len(words) or words[pos + 1:end - 1] != list(rest[:-1])
+                                or words[end - 1] not in self._forms(rest[-1])):
+                            continue
+                    seen = found.setdefault(key, [])
+                    if not seen or seen[-1] != line:
+                        seen.append(line)
+        return found
+    
+    def check(self, original_lines, translated_lines):
+        """
+        Порушення глосарію: {термін: [індекси рядків]}. Пропускаються рядки без перекладу,
+        з міткою помилки [!] та ті, що лишились як в оригіналі (код, службові рядки).
+        Замість рядків файлу можна передати тексти одиниць формату (glossary_segments).
+        """
+        violations = {}
+        lowered = {}
+        for key, indices in self._occurrences(original_lines).items():
+            term, _ = self.terms[key]
+            stems = self._stems[key]
+            for idx in indices:
+                translated = translated_lines[idx] if idx < len(translated_lines) else None
+                if not translated or translated == original_lines[idx] or translated.startswith("[!] "):
+                    continue
+                text = lowered.get(idx)
+                if text is None:
+                    text = lowered[idx] = translated.lower()
+                if not all(stem in text for stem in stems):
+                    violations.setdefault(term, []).append(idx)
+        return violations
+    
+    def line_ok(self, original, translated):
+        """Чи відповідає переклад одного рядка глосарію"""
+        return not self.check([original], [translated])
+
+
+def translated_file_name(file_path):
+    """Ім'я файлу перекладу з суфіксом -ukr (game.json -> game-ukr.json)"""
+    original_path = Path(file_path)
+    return f"{original_path.stem}-ukr{original_path.suffix}"
+
+
+def read_lines(file_path):
+    """Читання файлу як списку рядків"""
+    with open(file_path, "r", encoding="utf-8") as f:
+        return f.read().split("\n")
+
+
+def save_translation(file_path, lines):
+    """Збереження перекладених рядків у файл"""
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
+# Файли, більші за цей розмір, перекладаються потоково (без повного завантаження в пам'ять)
+STREAMING_THRESHOLD = 32 * 1024 * 1024
+# Рядків у вікні потокового перекладу (дедуплікація і пакети - в межах вікна)
+STREAM_WINDOW = 2000
+
+
+def is_large_file(file_path):
+    """Чи варто перекладати файл потоково"""
+    try:
+        return Path(file_path).stat().st_size >= STREAMING_THRESHOLD
+    except OSError:
+        return False
+
+
+class LineReader:
+    """
+    Ліниве читання файлу частинами по chunk_size символів. Рядки ті самі, що й у
+    read_lines (включно з останнім порожнім після завершального \\n), але файл не
+    завантажується в пам'ять цілком.
+    """
+    
+    def __init__(self, file_path, chunk_size=1024 * 1024):
+        self.file_path = Path(file_path)
+        self.chunk_size = chunk_size
+        self.size = self.file_path.stat().st_size
+        self.position = 0  # байтів у вже відданих рядках
+        self.count = 0  # віддано рядків
+    
+    @property
+    def progress(self):
+        """Частка прочитаного файлу (0..1)"""
+        return min(1.0, self.position / self.size) if self.size else 1.0
+    
+    @property
+    def estimated_total(self):
+        """Оцінка кількості рядків у файлі за вже прочитаною частиною"""
+        if self.progress >= 1.0 or not self.count:
+            return self.count
+        return max(self.count, int(self.count / self.progress))
+    
+    def __iter__(self):
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            tail = []  # початок рядка, що продовжується в наступній частині
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                tail.append(chunk)
+                if "\n" not in chunk:
+                    continue
+                parts = "".join(tail).split("\n")
+                tail = [parts.pop()]
+                for line in parts:
+                    self.count += 1
+                    self.position += len(line.encode("utf-8")) + 1
+                    yield line
+            self.position = self.size
+            self.count += 1
+            yield "".join(tail)
+
+
+class AtomicLineWriter:
+    """
+    Поступовий запис рядків у тимчасовий файл поруч із цільовим. commit() атомарно
+    замінює ним ціль, abort() видаляє - недописаний переклад ніколи не займає місце готового.
+    """
+    
+    def __init__(self, file_path, buffer_size=1024 * 1024):
+        self.path = Path(file_path)
+        self.temp_path = self.path.with_name(f".{self.path.name}.part")
+        self._file = open(self.temp_path, "w", encoding="utf-8", buffering=buffer_size)
+        self.count = 0
+    
+    def write(self, line):
+        if self.count:
+            self._file.write("\n")
+        self._file.write(line)
+        self.count += 1
+    
+    def commit(self):
+        self._file.close()
+        self.temp_path.replace(self.path)
+    
+    def abort(self):
+        self._file.close()
+        try:
+            self.temp_path.unlink()
+        except OSError:
+            pass
+
+
+class CheckpointJournal:
+    """
+    Журнал перекладу (JSON Lines, тільки дописування): індекс рядка, хеш оригіналу, переклад.
+    Дозволяє продовжити переклад після збою або зупинки, не перекладаючи готові рядки.
+    Для структурованого файлу (file_path) рядок з одиницями перекладу ще й має ключ
+    одиниць: переклад такого рядка залежить не лише від нього самого (PO: msgstr "").
+    """
+    
+    def __init__(self, path, file_path=None):
+        self.path = Path(path)
+        self.file_path = file_path
+        self._file = None
+        self._unit_keys = {}
+        self._keyed_lines = None  # рядки, для яких пораховано _unit_keys (load перед start)
+    
+    @classmethod
+    def for_file(cls, file_path, journal_dir="checkpoints"):
+        """Журнал для файлу перекладу (checkpoints/<ім'я>-<хеш шляху>.jsonl)"""
+        source = Path(file_path).resolve()
+        path_hash = hashlib.sha1(str(source).encode("utf-8")).hexdigest()[:10]
+        return cls(Path(journal_dir) / f"{source.name}-{path_hash}.jsonl", file_path)
+    
+    @staticmethod
+    def line_hash(line):
+        """Хеш рядка оригіналу"""
+        return hashlib.sha1(line.encode("utf-8")).hexdigest()[:16]
+    
+    def exists(self):
+        """Чи є збережений прогрес"""
+        return self.path.exists() and self.path.stat().st_size > 0
+    
+    def unit_keys(self, lines):
+        """
+        {індекс рядка: ключ} для рядків з одиницями формату: хеш тексту і позицій (відносно
+        рядка) усіх одиниць на ньому. Формат невідомий або не розбирається - {} (як у рушія)
+        """
+        parser = format_parser_for(self.file_path) if self.file_path else None
+        if parser is None:
+            return {}
+        units_by_line = {}
+        try:
+            for unit in parser.iter_units(lines):
+                for idx in unit.lines:
+                    units_by_line.setdefault(idx, []).append(unit)
+        except FormatError:
+            return {}
+        keys = {}
+        for idx, units in units_by_line.items():
+            source = json.dumps([[unit.text, [[line - idx, start, end] for line, start, end in unit.spans]]
+                                 for unit in units], ensure_ascii=False)
+            keys[idx] = self.line_hash(source)
+        return keys
+    
+    def load(self, lines):
+        """
+        Готові переклади для поточного вмісту файлу: {індекс: переклад}.
+        Рядок вважається готовим, якщо хеш оригіналу (і ключ одиниць) збігається; якщо
+        рядки зсунулись (вставки/видалення), переклад шукається за тим самим хешем і ключем.
+        """
+        by_index = {}
+        by_hash = {}
+        if not self.exists():
+            return {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            for raw in f:
+                try:
+                    entry = json.loads(raw)
+                    key, translation = (entry["h"], entry.get("u")), entry["t"]
+                    by_index[entry["i"]] = (key, translation)
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    continue  # Обірваний останній запис після збою
+                by_hash[key] = translation
+        
+        self._unit_keys = self.unit_keys(lines)
+        self._keyed_lines = lines
+        known = {}
+        for idx, line in enumerate(lines):
+            key = (self.line_hash(line), self._unit_keys.get(idx))
+            entry = by_index.get(idx)
+            if entry and entry[0] == key:
+                known[idx] = entry[1]
+            elif key in by_hash:
+                known[idx] = by_hash[key]
+        return known
+    
+    def start(self, lines, known=None):
+        """Новий журнал; готові переклади (при продовженні) записуються одразу"""
+        self.close()
+        if self._keyed_lines is not lines:
+            self._unit_keys = self.unit_keys(lines)
+            self._keyed_lines = lines
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        for idx, translation in sorted((known or {}).items()):
+            self._write(idx, lines[idx], translation)
+        self._file.flush()
+    
+    def append(self, idx, line, translation):
+        """Запис готового рядка (невдалі переклади [!] не записуються)"""
+        if self._file is None or is_failed_line(translation):
+            return
+        self._write(idx, line, translation)
+        self._file.flush()
+    
+    def _write(self, idx, line, translation):
+        entry = {"i": idx, "h": self.line_hash(line), "t": translation}
+        if idx in self._unit_keys:
+            entry["u"] = self._unit_keys[idx]
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    
+    def close(self):
+        """Закриття файлу журналу"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# ============ СТРУКТУРОВАНІ ФОРМАТИ ============
+# Для відомих форматів текст витягується справжнім розбором файлу, а не вгадуванням
+# формату кожного рядка: JSON-рядки з екрануванням, PO з продовженнями "...",
+# багаторядкові репліки SRT та текст XML, що займає кілька рядків.
+
+class FormatError(ValueError):
+    """Файл не відповідає очікуваному формату (переклад виконується по рядках)"""
+
+
+def is_failed_line(line):
+    """
+    Чи є в рядку перекладу мітка [!]: звичайний рядок нею починається, а в структурованих
+    форматах вона стоїть усередині значення (JSON-рядок, msgstr, текст елемента)
+    """
+    return "[!] " in line
+
+
+def distribute_text(text, weights, joiner=" "):
+    """
+    Розподіл перекладу по частинах одиниці пропорційно довжині частин оригіналу,
+    щоб переклад ліг у ті самі рядки файлу. joiner - як частини з'єднуються у формі
+    ("" - PO, пробіл між частинами лишається в кінці кожної частини).
+    """
+    count = len(weights)
+    if count == 1:
+        return [text]
+    
+    # Модель зберегла розбиття на рядки - беремо як є
+    text_lines = text.split("\n")
+    if len(text_lines) == count:
+        return text_lines
+    
+    if not any(weights):
+        weights = [0] * (count - 1) + [1]
+    total = sum(weights)
+    words = text.split()
+    
+    parts = []
+    start = 0
+    cumulative = 0
+    for k, weight in enumerate(weights):
+        cumulative += weight
+        end = len(words) if k == count - 1 else round(len(words) * cumulative / total)
+        parts.append(" ".join(words[start:end]))
+        start = end
+    
+    if joiner == "":
+        last = max((k for k, part in enumerate(parts) if part), default=-1)
+        parts = [part + " " if part and k < last else part for k, part in enumerate(parts)]
+    return parts
+
+
+class TranslationUnit:
+    """Одиниця перекладу: текст і точні позиції його частин у файлі (рядок, початок, кінець)"""
+    
+    __slots__ = ("text", "spans", "weights", "joiner", "encode", "placeholders")
+    
+    def __init__(self, text, spans, weights=None, joiner=" ", encode=None):
+        self.text = text
+        self.spans = spans
+        self.weights = weights if weights is not None else [end - start for _, start, end in spans]
+        self.joiner = joiner
+        self.encode = encode
+        self.placeholders = []
+    
+    @property
+    def lines(self):
+        """Індекси рядків, які зачіпає одиниця"""
+        return sorted({idx for idx, _, _ in self.spans})
+    
+    def replacements(self, translation):
+        """Заміни (рядок, початок, кінець, новий текст) для запису перекладу на місце оригіналу"""
+        parts = distribute_text(translation, self.weights, self.joiner)
+        encode = self.encode or (lambda part: part)
+        return [(idx, start, end, encode(part)) for (idx, start, end), part in zip(self.spans, parts)]
+
+
+class UnitWriter:
+    """Збирає переклади одиниць і віддає рядок, щойно перекладено всі одиниці на ньому"""
+    
+    def __init__(self):
+        self.remaining = {}  # рядок -> кількість ще не перекладених одиниць
+        self.replacements = {}  # рядок -> [(початок, кінець, текст)]
+    
+    def add(self, unit):
+        """Реєстрація одиниці, переклад якої ще очікується"""
+        for idx in unit.lines:
+            self.remaining[idx] = self.remaining.get(idx, 0) + 1
+    
+    def covers(self, idx):
+        """Чи є на рядку одиниці перекладу"""
+        return idx in self.remaining
+    
+    def finish(self, unit, translation, lines):
+        """
+        Запис перекладу одиниці (None - переклад не вдався). Повертає [(індекс, рядок)]
+        рядків, які стали повністю готовими.
+        """
+        if translation is None:
+            # Оригінал з міткою всередині значення: синтаксис формату не ламається
+            translation = f"[!] {unit.text}"
+        for idx, start, end, text in unit.replacements(translation):
+            self.replacements.setdefault(idx, []).append((start, end, text))
+        
+        completed = []
+        for idx in unit.lines:
+            self.remaining[idx] -= 1
+            if self.remaining[idx]:
+                continue
+            line = lines[idx]
+            # Заміни з кінця рядка, щоб позиції попередніх не зсувались
+            for start, end, text in sorted(self.replacements.pop(idx, []), reverse=True):
+                line = line[:start] + text + line[end:]
+            completed.append((idx, line))
+        return completed
+
+
+class StructuredFormat:
+    """
+    Основа розбору формату. Рядки подаються по одному (feed), стан зберігається між
+    викликами - тож великий файл можна розбирати частинами, не тримаючи його в пам'яті.
+    """
+    
+    name = ""
+    retranslate = False  # Вже перекладені значення теж є одиницями (PO: заповнений msgstr)
+    
+    @property
+    def pending(self):
+        """Чи є незавершена одиниця (між її рядками файл не можна розрізати)"""
+        return False
+    
+    def iter_units(self, lines):
+        """Одиниці перекладу всього файлу (індекси рядків - від початку lines)"""
+        for idx, line in enumerate(lines):
+            yield from self.feed(idx, line)
+        yield from self.finish()
+    
+    def feed(self, idx, line):
+        """Розбір чергового рядка, повертає одиниці, що на ньому завершились"""
+        raise NotImplementedError
+    
+    def finish(self):
+        """Кінець файлу: одиниці, що лишились незавершеними"""
+        return iter(())
+
+
+class JsonFormat(StructuredFormat):
+    """JSON: значення-рядки з ключами тексту та елементи масивів (ключі та службові поля - ні)"""
+    
+    name = "JSON"
+    _TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]:,]|[^\s{}\[\]:,"]+|"')
+    
+    @staticmethod
+    def encode(text):
+        return json.dumps(text, ensure_ascii=False)[1:-1]
+    
+    def __init__(self):
+        self.stack = []  # (дужка, ключ, під яким відкрито контейнер)
+        self.expect_key = False
+        self.key = None
+    
+    def feed(self, idx, line):
+        stack = self.stack
+        expect_key = self.expect_key
+        key = self.key
+        
+        for match in self._TOKEN_RE.finditer(line):
+            token = match.group()
+            if token in "{[":
+                stack.append((token, key if stack and stack[-1][0] == "{" else None))
+                expect_key = token == "{"
+            elif token in "}]":
+                if not stack or stack[-1][0] != {"}": "{", "]": "["}[token]:
+                    raise FormatError(f"рядок {idx + 1}: зайва дужка {token}")
+                stack.pop()
+                expect_key = False
+            elif token == ":":
+                expect_key = False
+            elif token == ",":
+                expect_key = bool(stack) and stack[-1][0] == "{"
+            elif token[0] == '"':
+                if token == '"':
+                    raise FormatError(f"рядок {idx + 1}: незакритий рядок")
+                try:
+                    value = json.loads(token)
+                except ValueError:
+                    raise FormatError(f"рядок {idx + 1}: некоректний рядок {token}")
+                if stack and stack[-1][0] == "{" and expect_key:
+                    key = value
+                    continue
+                # Ключ значення: ключ пари в об'єкті або ключ, під яким лежить масив
+                value_key = key if stack and stack[-1][0] == "{" else (stack[-1][1] if stack else None)
+                if self._translatable(value_key, value, in_array=bool(stack) and stack[-1][0] == "["):
+                    yield TranslationUnit(value, [(idx, match.start() + 1, match.end() - 1)],
+                                          encode=self.encode)
+        
+        self.expect_key = expect_key
+        self.key = key
+    
+    def finish(self):
+        if self.stack:
+            raise FormatError("файл закінчився всередині об'єкта або масиву")
+        return iter(())
+    
+    @staticmethod
+    def _translatable(key, value, in_array):
+        """Та сама політика ключів, що й у розборі по рядках"""
+        if not value.strip() or not _LETTER_RE.search(value):
+            return False
+        if key is not None and key.lower() in _SKIP_KEYS:
+            return False
+        return in_array or (key is not None and key.lower() in _TRANSLATABLE_KEYS)
+
+
+class PoFormat(StructuredFormat):
+    """
+    Gettext PO/POT: переклад msgid записується в msgstr (з усіма рядками-продовженнями).
+    Вже заповнені msgstr пропускаються (retranslate=True - перекладаються як є)
+    """
+    
+    name = "PO"
+    _KEYWORD_RE = re.compile(r'^\s*(msgctxt|msgid_plural|msgid|msgstr(?:\[\d+\])?)\s+"(.*)"\s*$')
+    _CONTINUATION_RE = re.compile(r'^\s*"(.*)"\s*$')
+    _ESCAPES = {"n": "\n", "t": "\t", "r": "\r", '"': '"', "\\": "\\"}
+    _ESCAPE_RE = re.compile(r'\\(.)')
+    
+    @classmethod
+    def decode(cls, raw):
+        return cls._ESCAPE_RE.sub(lambda m: cls._ESCAPES.get(m.group(1), m.group(0)), raw)
+    
+    @staticmethod
+    def encode(text):
+        return (text.replace("\\", "\\\\").replace('"', '\\"')
+                .replace("\n", "\\n").replace("\t", "\\t").replace("\r", "\\r"))
+    
+    def __init__(self, retranslate=False):
+        self.retranslate = retranslate
+        self.entry = {}  # ключове слово -> [(рядок, початок, кінець, текст)]
+        self.current = None
+    
+    @property
+    def pending(self):
+        return bool(self.entry)
+    
+    def feed(self, idx, line):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            # Порожній рядок завершує запис
+            if not stripped and self.entry:
+                yield from self._entry_units(self.entry)
+                self.entry = {}
+            self.current = None
+            return
+        
+        match = self._KEYWORD_RE.match(line)
+        if match:
+            self.current = match.group(1)
+            # Новий msgid/msgctxt після msgstr - новий запис без порожнього рядка
+            if self.current in ("msgctxt", "msgid") and any(k.startswith("msgstr") for k in self.entry):
+                yield from self._entry_units(self.entry)
+                self.entry = {}
+            self.entry[self.current] = [(idx, match.start(2), match.end(2), self.decode(match.group(2)))]
+            return
+        
+        match = self._CONTINUATION_RE.match(line)
+        if match and self.current:
+            self.entry[self.current].append((idx, match.start(1), match.end(1), self.decode(match.group(1))))
+    
+    def finish(self):
+        if self.entry:
+            yield from self._entry_units(self.entry)
+            self.entry = {}
+    
+    def _entry_units(self, entry):
+        """Одиниці перекладу одного запису (кожен msgstr / msgstr[n])"""
+        msgid = "".join(piece[3] for piece in entry.get("msgid", []))
+        # Заголовок файлу (msgid "") не перекладаємо
+        if not msgid:
+            return
+        msgid_plural = "".join(piece[3] for piece in entry.get("msgid_plural", [])) or msgid
+        
+        for keyword, pieces in entry.items():
+            if not keyword.startswith("msgstr"):
+                continue
+            # Порожній msgstr перекладаємо з msgid, вже заповнений - лише з retranslate
+            source = "".join(piece[3] for piece in pieces)
+            if source and not self.retranslate:
+                continue
+            if not source:
+                source = msgid if keyword in ("msgstr", "msgstr[0]") else msgid_plural
+            if not _LETTER_RE.search(source):
+                continue
+            yield TranslationUnit(
+                source,
+                [(idx, start, end) for idx, start, end, _ in pieces],
+                weights=[len(text) for _, _, _, text in pieces],
+                joiner="",
+                encode=self.encode
+            )
+
+
+class SrtFormat(StructuredFormat):
+    """SubRip: текст репліки (усі її рядки) перекладається разом"""
+    
+    name = "SRT"
+    
+    def __init__(self):
+        self.cue = []  # (рядок, початок, кінець, текст)
+        self.in_text = False
+    
+    @property
+    def pending(self):
+        return bool(self.cue)
+    
+    def feed(self, idx, line):
+        stripped = line.strip()
+        if not stripped:
+            unit = self._cue_unit(self.cue)
+            if unit:
+                yield unit
+            self.cue = []
+            self.in_text = False
+        elif is_timestamp(line):
+            self.in_text = True
+        elif self.in_text:
+            start = len(line) - len(line.lstrip())
+            self.cue.append((idx, start, len(line.rstrip()), stripped))
+    
+    def finish(self):
+        unit = self._cue_unit(self.cue)
+        self.cue = []
+        if unit:
+            yield unit
+    
+    @staticmethod
+    def _cue_unit(cue):
+        """Одиниця перекладу з рядків репліки (None якщо в ній немає тексту)"""
+        text = "\n".join(text for _, _, _, text in cue)
+        if not _LETTER_RE.search(text):
+            return None
+        return TranslationUnit(text,
+                               [(idx, start, end) for idx, start, end, _ in cue], joiner="\n")
+
+
+class XmlFormat(StructuredFormat):
+    """
+    XML: текстовий вміст елементів (також на кількох рядках). Теги форматування - частина
+    тексту, лише якщо стоять серед тексту самого вузла (змішаний вміст: <p>Натисніть <b>Старт</b></p>)
+    """
+    
+    name = "XML"
+    # Теги форматування (<b>, <color=#fff>, <br/>); у вузлі без власного тексту (<s>One</s>
+    # <s>Two</s>) вони структурні - кожен елемент окрема одиниця
+    INLINE_TAGS = frozenset(["b", "i", "u", "s", "em", "strong", "br", "span", "font", "color",
+                             "size", "sub", "sup", "a", "small", "big", "c"])
+    VOID_TAGS = frozenset(["br"])
+    _INLINE_TAG_RE = re.compile(r'</?([a-zA-Z][\w:.-]*)(?:[\s=][^<>]*)?/?>')
+    _BARE_AMPERSAND_RE = re.compile(r'&(?!(?:[a-zA-Z]+|#x?[0-9a-fA-F]+);)')
+    # Кінець конструкцій, що можуть займати кілька рядків
+    _CLOSERS = {"comment": "-->", "cdata": "]]>", "pi": "?>", "tag": ">"}
+    
+    @classmethod
+    def encode(cls, text):
+        """Екранування &, < і > у тексті вузла; сутності та вбудовані теги форматування лишаються"""
+        parts = []
+        pos = 0
+        for match in cls._INLINE_TAG_RE.finditer(text):
+            if match.group(1).lower() in cls.INLINE_TAGS:
+                parts.append(cls._escape(text[pos:match.start()]))
+                parts.append(match.group())
+                pos = match.end()
+        parts.append(cls._escape(text[pos:]))
+        return "".join(parts)
+    
+    @classmethod
+    def _escape(cls, text):
+        return cls._BARE_AMPERSAND_RE.sub("&amp;", text).replace("<", "&lt;").replace(">", "&gt;")
+    
+    def __init__(self):
+        self.state = "text"
+        self.pieces = []  # частини поточного текстового вузла: (рядок, початок, кінець, текст)
+    
+    @property
+    def pending(self):
+        return bool(self.pieces)
+    
+    def feed(self, idx, line):
+        state = self.state
+        pieces = self.pieces
+        pos = 0
+        piece_start = 0
+        length = len(line)
+        while pos < length or (state == "text" and pos == length):
+            if state != "text":
+                close = line.find(self._CLOSERS[state], pos)
+                if close < 0:
+                    break
+                pos = piece_start = close + len(self._CLOSERS[state])
+                state = "text"
+                continue
+            
+            lt = line.find("<", pos)
+            if lt < 0:
+                self._add_piece(pieces, idx, line, piece_start, length)
+                break
+            
+            inline = self._INLINE_TAG_RE.match(line, lt)
+            if inline and inline.group(1).lower() in self.INLINE_TAGS:
+                pos = inline.end()
+                continue
+            
+            # Структурний тег завершує текстовий вузол
+            self._add_piece(pieces, idx, line, piece_start, lt)
+            yield from self._node_units(pieces)
+            pieces = []
+            
+            if line.startswith("<!--", lt):
+                state = "comment"
+            elif line.startswith("<![CDATA[", lt):
+                state = "cdata"
+            elif line.startswith("<?", lt):
+                state = "pi"
+            else:
+                state = "tag"
+            pos = lt + 1
+        
+        self.state = state
+        self.pieces = pieces
+    
+    def finish(self):
+        if self.state != "text":
+            raise FormatError("файл закінчився всередині тегу або коментаря")
+        pieces = self.pieces
+        self.pieces = []
+        yield from self._node_units(pieces)
+    
+    @staticmethod
+    def _add_piece(pieces, idx, line, start, end):
+        """Частина тексту на рядку без пробілів по краях"""
+        text = line[start:end]
+        stripped = text.strip()
+        if stripped:
+            start += len(text) - len(text.lstrip())
+            pieces.append((idx, start, start + len(stripped), stripped))
+    
+    def _node_units(self, pieces):
+        """
+        Одиниці текстового вузла: весь вузол, якщо в ньому є текст поза тегами форматування,
+        інакше - вміст кожного елемента верхнього рівня окремо (з тим самим правилом всередині)
+        """
+        tokens = []
+        for idx, start, _, text in pieces:
+            pos = 0
+            for match in self._INLINE_TAG_RE.finditer(text):
+                tokens.append((idx, start + pos, start + match.start(), text[pos:match.start()], None))
+                tokens.append((idx, start + match.start(), start + match.end(), match.group(), self._tag_kind(match)))
+                pos = match.end()
+            tokens.append((idx, start + pos, start + len(text), text[pos:], None))
+        return self._token_units(tokens)
+    
+    def _tag_kind(self, match):
+        """Тег форматування: open, close або void (<br>, <x/>)"""
+        tag = match.group()
+        if tag.startswith("</"):
+            return "close"
+        if tag.endswith("/>") or match.group(1).lower() in self.VOID_TAGS:
+            return "void"
+        return "open"
+    
+    def _token_units(self, tokens):
+        depth = 0
+        direct_text = False
+        for token in tokens:
+            kind = token[4]
+            if kind is None:
+                direct_text = direct_text or (depth == 0 and bool(token[3].strip()))
+            elif kind == "open":
+                depth += 1
+            elif kind == "close":
+                depth = max(0, depth - 1)
+        if direct_text:
+            unit = self._node_unit(self._token_pieces(tokens))
+            return [unit] if unit else []
+        
+        units = []
+        inner = None
+        depth = 0
+        for token in tokens:
+            kind = token[4]
+            if depth == 0:
+                if kind == "open":
+                    inner = []
+                    depth = 1
+                continue
+            if kind == "open":
+                depth += 1
+            elif kind == "close":
+                depth -= 1
+                if depth == 0:
+                    units.extend(self._token_units(inner))
+                    continue
+            inner.append(token)
+        if depth:
+            # Незакритий тег до кінця вузла
+            units.extend(self._token_units(inner))
+        return units
+    
+    @staticmethod
+    def _token_pieces(tokens):
+        """Частини тексту на рядках з послідовних токенів, без пробілів по краях"""
+        pieces = []
+        for idx, start, end, text, _ in tokens:
+            if pieces and pieces[-1][0] == idx and pieces[-1][2] == start:
+                last = pieces.pop()
+                start, text = last[1], last[3] + text
+            pieces.append((idx, start, end, text))
+        result = []
+        for idx, start, end, text in pieces:
+            stripped = text.strip()
+            if stripped:
+                start += len(text) - len(text.lstrip())
+                result.append((idx, start, start + len(stripped), stripped))
+        return result
+    
+    def _node_unit(self, pieces):
+        """Одиниця перекладу з частин тексту (None якщо в них немає тексту)"""
+        if not pieces:
+            return None
+        text = " ".join(piece[3] for piece in pieces)
+        if not _LETTER_RE.search(self._INLINE_TAG_RE.sub("", text)):
+            return None
+        return TranslationUnit(text, [(idx, start, end) for idx, start, end, _ in pieces],
+                               encode=self.encode)
+
+
+# Розширення (зі списку вибору файлу) -> структурований формат
+STRUCTURED_FORMATS = {
+    ".json": JsonFormat,
+    ".po": PoFormat,
+    ".pot": PoFormat,
+    ".srt": SrtFormat,
+    ".xml": XmlFormat,
+}
+
+
+def format_parser_for(file_path):
+    """Розбір файлу за розширенням (None - формат невідомий, переклад по рядках)"""
+    format_class = STRUCTURED_FORMATS.get(Path(file_path).suffix.lower())
+    return format_class() if format_class else None
+
+
+def glossary_segments(original_lines, translated_lines, file_path=None):
+    """
+    Що перевіряти на відповідність глосарію: [(рядок, оригінал, переклад, одиниця)].
+    Для структурованого формату - одиниці: текст без екранування (PO - msgid і переклад
+    у msgstr), одиниця - та сама одиниця в перекладеному файлі (куди записати виправлення);
+    пари знаходяться за рядком початку і порядком на ньому. Інакше, або якщо файл не
+    розбирається, - рядки файлу (одиниця None).
+    """
+    parser = format_parser_for(file_path) if file_path else None
+    if parser is not None:
+        translated_parser = format_parser_for(file_path)
+        translated_parser.retranslate = True
+        try:
+            translated = {}
+            for unit in translated_parser.iter_units(translated_lines):
+                first = unit.spans[0][0]
+                translated.setdefault(first, []).append(unit)
+            segments = []
+            positions = {}
+            for unit in parser.iter_units(original_lines):
+                first = unit.spans[0][0]
+                position = positions.get(first, 0)
+                positions[first] = position + 1
+                on_line = translated.get(first, [])
+                if position < len(on_line):
+                    segments.append((first, unit.text, on_line[position].text, on_line[position]))
+            return segments
+        except FormatError:
+            pass
+    return [(idx, line, translated_lines[idx], None)
+            for idx, line in enumerate(original_lines[:len(translated_lines)])]
+
+
+class TranslationEngine:
+    """Конвеєр перекладу рядків: класифікація, дедуплікація, кеш, пакети та паралельні запити"""
+    
+    def __init__(self, client, model, provider="", glossary=None, concurrency=1, batch_chars=0,
+                 batch_max_segments=40, translation_memory=None, on_status=None, stream=False,
+                 on_partial=None, backend=None, budgets=None, glossary_index=None, routes=None):
+        self.client = client
+        # AsyncBackend: запити виконуються в його event loop замість пулу потоків
+        self.backend = backend
+        self.model = model
+        self.provider = provider
+        self.glossary = glossary or {}
+        # Індекс термінів: у запит потрапляють лише терміни, що є в його тексті
+        self.glossary_index = glossary_index if glossary_index is not None else GlossaryIndex(self.glossary)
+        self.concurrency = max(1, concurrency)
+        self.batch_chars = batch_chars
+        self.batch_max_segments = batch_max_segments
+        self.translation_memory = translation_memory
+        self.on_status = on_status
+        # Потоковий вивід: on_partial(source, text) отримує переклад, що ще генерується
+        self.stream = stream
+        self.on_partial = on_partial
+        self.is_running = True
+        self.dedup_stats = (0, 0)  # (всього сегментів, унікальних)
+        self._stats_lock = threading.Lock()
+        self._request_slots = threading.BoundedSemaphore(self.concurrency)
+        
+        # Маршрути: основний провайдер і пул додаткових (routes) - запит іде на найшвидший доступний.
+        # Пам'ять перекладів і токенізатор - за основною моделлю
+        self.router = ProviderRouter([Route(client, model, provider)] + list(routes or []))
+        
+        # Контекст і ліміт відповіді (budgets - власна таблиця з налаштувань): найменші серед маршрутів
+        route_budgets = [model_budget(route.provider, route.model, budgets) for route in self.router.routes]
+        self.budget = {key: min(budget[key] for budget in route_budgets) for key in ("context", "output")}
+        self.tokenizer = tokenizer_for(model)
+        
+        # Спільний з іншими рушіями ліміт запитів до основної моделі (для рядка статистики)
+        self.rate_limiter = self.router.routes[0].rate_limiter
+        self.throttle_time = 0.0  # Скільки секунд запити чекали на лімітер
+        self.telemetry = RunTelemetry()
+        self._routes_checked = len(self.router) == 1
+        
+        # Спільний префікс промпту: невеликий глосарій - цілим, інакше терміни додаються в кінець запиту
+        self.prompt_prefix = build_prompt_prefix(self.glossary)
+        self.glossary_in_prefix = bool(self.glossary)
+        glossary_tokens = self._count_tokens(self.prompt_prefix) - self._count_tokens(build_prompt_prefix())
+        if glossary_tokens > min(GLOSSARY_PREFIX_TOKENS, self.budget["context"] // 8):
+            self.prompt_prefix = build_prompt_prefix()
+            self.glossary_in_prefix = False
+        
+        # Контекст кешу - переклади з іншим промптом/глосарієм не змішуються
+        prompt_source = (self.prompt_prefix + LINE_TASK + BATCH_TASK + CHUNK_TASK
+                         + json.dumps(self.glossary, sort_keys=True, ensure_ascii=False))
+        self.prompt_hash = hashlib.sha1(prompt_source.encode("utf-8")).hexdigest()
+        if self.translation_memory:
+            self.translation_memory.reset_stats()
+    
+    def stop(self):
+        """Зупинка перекладу (запити, що вже виконуються, завершаться)"""
+        self.is_running = False
+    
+    def check_routes(self):
+        """Перевірка серверів пулу (один раз, перед першим перекладом): мертві одразу пропускаються"""
+        with self._stats_lock:
+            if self._routes_checked:
+                return
+            self._routes_checked = True
+        results = self.router.probe()
+        dead = [route.name for route, alive in results if not alive]
+        if dead:
+            self._status(f"⛔ Не відповідають: {', '.join(dead)} - працюють {len(results) - len(dead)} з {len(results)}")
+    
+    def _status(self, text, kind="warning"):
+        """Передача повідомлення про стан (kind: warning, success, error)"""
+        if self.on_status:
+            self.on_status(text, kind)
+    
+    def _limited_run(self, fn, *args):
+        """Виклик fn як одного запуску для лімітерів маршрутів (RateLimiter.begin_run)"""
+        limiters = list({id(route.rate_limiter): route.rate_limiter for route in self.router.routes}.values())
+        for limiter in limiters:
+            limiter.begin_run()
+        try:
+            return fn(*args)
+        finally:
+            for limiter in limiters:
+                limiter.end_run()
+    
+    def translate_lines(self, lines, on_line=None, known=None, parser=None, units=None):
+        """
+        Переклад списку рядків. on_line(idx, text) викликається для кожного готового
+        рядка строго по порядку. known - {індекс: переклад} вже готових рядків (продовження
+        з журналу), вони не відправляються. parser - структурований формат файлу
+        (format_parser_for), без нього кожен рядок розбирається окремо; units - вже
+        розібрані одиниці (потоковий режим). Повертає список перекладених рядків
+        (неповний при зупинці).
+        """
+        return self._limited_run(self._translate_lines, lines, on_line, known, parser, units)
+    
+    def _translate_lines(self, lines, on_line, known, parser, units):
+        total_lines = len(lines)
+        translated_lines = []
+        
+        # Результати за індексом рядка - віддаємо строго по порядку
+        results = [None] * total_lines
+        for idx, translation in (known or {}).items():
+            if idx < total_lines:
+                results[idx] = translation
+        pending = {}
+        next_idx = 0
+        self.telemetry.add_lines(total_lines)
+        self.check_routes()
+        
+        def flush(next_idx):
+            while next_idx < total_lines and results[next_idx] is not None:
+                translated_lines.append(results[next_idx])
+                if on_line:
+                    on_line(next_idx, results[next_idx])
+                next_idx += 1
+            return next_idx
+        
+        # Попередній прохід: однакові тексти групуються і перекладаються один раз
+        parse_start = time.perf_counter()
+        writer = None
+        if units is None and parser is not None:
+            units = parser.iter_units(lines)
+        if units is not None:
+            try:
+                segments, writer = self.group_units(lines, results, units)
+            except FormatError as e:
+                self._status(f"⚠️ {parser.name}: {e} - переклад по рядках")
+        if writer is None:
+            segments = self.group_segments(lines, results)
+        self.telemetry.add_time("parse", time.perf_counter() - parse_start)
+        with self._stats_lock:
+            total_segments, unique_segments = self.dedup_stats
+            self.dedup_stats = (total_segments + sum(len(occ) for occ in segments.values()),
+                                unique_segments + len(segments))
+        
+        # Поточний пакет унікальних текстів: (text, occurrences)
+        batch = []
+        batch_size = 0
+        
+        # В асинхронному режимі запит - корутина в event loop бекенду (потоки не створюються)
+        if self.backend is None:
+            translate_line, translate_batch_texts = self.translate_line, self.translate_batch_texts
+        else:
+            translate_line, translate_batch_texts = self.atranslate_line, self.atranslate_batch_texts
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            def submit(group, fn, *args):
+                # Не тримаємо в польоті більше запитів, ніж дозволено (ліміт спільний
+                # для всіх файлів, що перекладаються цим рушієм одночасно)
+                while not self._request_slots.acquire(timeout=0.5):
+                    if not self.is_running:
+                        return
+                    self._collect_finished(lines, pending, results, timeout=0, writer=writer)
+                if self.backend is None:
+                    future = executor.submit(fn, *args)
+                else:
+                    future = self.backend.submit(fn(*args))
+                future.add_done_callback(lambda _: self._request_slots.release())
+                pending[future] = group
+            
+            for text, occurrences in segments.items():
+                if not self.is_running:
+                    break
+                
+                placeholders = self._placeholders_of(occurrences[0])
+                # Багаторядковий текст не можна передати в нумерованому пакеті
+                if self.batch_chars and "\n" not in text:
+                    batch.append((text, occurrences))
+                    batch_size += len(text)
+                    if batch_size >= self.batch_chars or len(batch) >= self.batch_max_segments:
+                        submit(batch, translate_batch_texts, batch)
+                        batch = []
+                        batch_size = 0
+                else:
+                    submit([(text, occurrences)], translate_line, text, placeholders)
+                
+                self._collect_finished(lines, pending, results, timeout=0, writer=writer)
+                next_idx = flush(next_idx)
+            
+            # Відправляємо неповний останній пакет
+            if batch and self.is_running:
+                submit(batch, translate_batch_texts, batch)
+            
+            # Дочікуємось запитів, що ще виконуються
+            while pending and self.is_running:
+                self._collect_finished(lines, pending, results, writer=writer)
+                next_idx = flush(next_idx)
+            
+            # При зупинці - скасовуємо те, що ще не почалося
+            for future in pending:
+                future.cancel()
+        
+        # Рядки без запитів (службові, з кешу) після останнього запиту
+        flush(next_idx)
+        
+        # Зберігаємо оновлення кешу на диск
+        if self.translation_memory:
+            self.translation_memory.commit()
+        
+        return translated_lines
+    
+    def translate_stream(self, lines, on_line, parser=None, window=STREAM_WINDOW):
+        """
+        Потоковий переклад ітератора рядків (LineReader) вікнами приблизно по window
+        рядків: on_line(idx, text) отримує готові рядки по порядку, в пам'яті лише поточне
+        вікно. Вікно не розрізає одиницю формату чи блок коду ```. Повертає кількість
+        перекладених рядків (при зупинці - менше, ніж прочитано).
+        """
+        return self._limited_run(self._translate_stream, lines, on_line, parser, window)
+    
+    def _translate_stream(self, lines, on_line, parser, window):
+        offset = 0
+        buffer = []
+        units = [] if parser is not None else None
+        inside_code_block = False
+        
+        def translate_window():
+            # Індекси у вікні зсуваються на кількість уже перекладених рядків
+            done = self.translate_lines(buffer, lambda idx, text: on_line(offset + idx, text), units=units)
+            return len(done)
+        
+        for line in lines:
+            if not self.is_running:
+                return offset
+            
+            # Формат розбирається одразу при читанні - його стан переходить між вікнами
+            if parser is not None:
+                try:
+                    units.extend(parser.feed(len(buffer), line))
+                except FormatError as e:
+                    self._status(f"⚠️ {parser.name}: {e} - далі переклад по рядках")
+                    parser = units = None
+            buffer.append(line)
+            if line.strip().startswith('```'):
+                inside_code_block = not inside_code_block
+            
+            if len(buffer) < window or (parser.pending if parser is not None else inside_code_block):
+                continue
+            done = translate_window()
+            offset += done
+            if done < len(buffer):
+                return offset
+            buffer = []
+            units = [] if parser is not None else None
+        
+        if parser is not None:
+            try:
+                units.extend(parser.finish())
+            except FormatError as e:
+                self._status(f"⚠️ {parser.name}: {e} - переклад по рядках")
+                units = None
+        if buffer and self.is_running:
+            offset += translate_window()
+        return offset
+    
+    def group_segments(self, lines, results):
+        """
+        Класифікує рядки: службові одразу записує в results, а тексти для перекладу
+        групує за вмістом. Повертає {text: [(індекс, prefix, suffix, placeholders), ...]}
+        у порядку першої появи.
+        """
+        segments = {}
+        
+        # Відстеження блоків коду (``` ... ```)
+        inside_code_block = False
+        
+        for i, line in enumerate(lines):
+            if not self.is_running:
+                break
+            
+            stripped = line.strip()
+            
+            # Перевірка на початок/кінець блоку коду
+            if stripped.startswith('```'):
+                inside_code_block = not inside_code_block
+                results[i] = line  # Копіюємо маркер ``` як є
+            # Вже перекладено (продовження з журналу)
+            elif results[i] is not None:
+                continue
+            # Якщо всередині блоку коду - не перекладаємо
+            elif inside_code_block:
+                results[i] = line
+            # Якщо рядок порожній, таймстамп або код - копіюємо як є
+            elif not stripped or is_timestamp(line) or is_code_line(line):
+                results[i] = line
+            else:
+                # Витягуємо текст для перекладу зі збереженням структури
+                prefix, text_to_translate, suffix, placeholders = extract_translatable_text(line)
+                
+                # Якщо немає тексту для перекладу - копіюємо як є
+                if not text_to_translate.strip():
+                    results[i] = line
+                else:
+                    segments.setdefault(text_to_translate, []).append((i, prefix, suffix, placeholders))
+        
+        return segments
+    
+    def group_units(self, lines, results, units):
+        """
+        Структурований розбір: одиниці перекладу (parser.iter_units) групуються за
+        текстом, рядки без одиниць копіюються як є. Повертає ({text: [TranslationUnit, ...]},
+        UnitWriter). При FormatError results не змінюється.
+        """
+        segments = {}
+        writer = UnitWriter()
+        reset = []
+        
+        for unit in units:
+            if not self.is_running:
+                break
+            unit_lines = unit.lines
+            # Всі рядки одиниці вже перекладено (продовження з журналу)
+            if all(results[idx] is not None for idx in unit_lines):
+                continue
+            reset.extend(unit_lines)
+            unit.placeholders = extract_placeholders(unit.text)
+            writer.add(unit)
+            segments.setdefault(unit.text, []).append(unit)
+        
+        # Частково записана одиниця перекладається заново цілком
+        for idx in reset:
+            results[idx] = None
+        for i, line in enumerate(lines):
+            if results[i] is None and not writer.covers(i):
+                results[i] = line
+        
+        return segments, writer
+    
+    @staticmethod
+    def _placeholders_of(occurrence):
+        """Плейсхолдери входження: одиниці формату або рядка (idx, prefix, suffix, placeholders)"""
+        if isinstance(occurrence, TranslationUnit):
+            return occurrence.placeholders
+        return occurrence[3]
+    
+    def _collect_finished(self, lines, pending, results, timeout=0.5, writer=None):
+        """Очікування завершення хоча б одного запиту та розподіл перекладу по всіх входженнях"""
+        if not pending:
+            return
+        done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+        restore_start = time.perf_counter()
+        for future in done:
+            group = pending.pop(future)
+            try:
+                translations = future.result()
+                # Одиночний запит повертає рядок, пакетний - список
+                if isinstance(translations, str):
+                    translations = [translations]
+            except Exception:
+                translations = [None] * len(group)
+            
+            for (text, occurrences), translated in zip(group, translations):
+                for occurrence in occurrences:
+                    if isinstance(occurrence, TranslationUnit):
+                        # Невдалий переклад не записуємо у структуру файлу
+                        restored = None
+                        if translated is not None and not translated.startswith("[!] "):
+                            restored = restore_placeholders(text, translated, occurrence.placeholders)
+                        for idx, line in writer.finish(occurrence, restored, lines):
+                            results[idx] = line
+                        continue
+                    
+                    idx, prefix, suffix, placeholders = occurrence
+                    if translated is None:
+                        results[idx] = f"[!] {lines[idx]}"
+                        continue
+                    # Плейсхолдери відновлюємо для кожного рядка окремо
+                    restored = restore_placeholders(text, translated, placeholders)
+                    results[idx] = prefix + restored + suffix
+        if done:
+            self.telemetry.add_time("placeholders", time.perf_counter() - restore_start)
+    
+    def _cache_get(self, text):
+        """Пошук перекладу в пам'яті перекладів"""
+        if self.translation_memory is None:
+            return None
+        key = self.translation_memory.make_key(text, self.provider, self.model, self.prompt_hash)
+        return self.translation_memory.get(key)
+    
+    def _cache_put(self, text, translation):
+        """Збереження успішного перекладу в пам'ять перекладів"""
+        if self.translation_memory is None:
+            return
+        # Не кешуємо збої: оригінал, повернутий як є, або рядок з міткою помилки
+        if not translation or translation == text or translation.startswith("[!] "):
+            return
+        key = self.translation_memory.make_key(text, self.provider, self.model, self.prompt_hash)
+        self.translation_memory.put(key, text, translation, self.provider, self.model)
+    
+    def translate_batch_texts(self, batch):
+        """Переклад пакету текстів одним запитом; при невідповідності - по одному"""
+        start = time.perf_counter()
+        translated, remaining = self._batch_from_cache(batch)
+        
+        texts = [batch[n][0] for n in remaining]
+        translations = self.translate_batch(texts) if len(remaining) > 1 else None
+        
+        for k, n in enumerate(remaining):
+            text, occurrences = batch[n]
+            if translations is None or not translations[k]:
+                # Кеш уже перевірено вище - йдемо одразу в API
+                translated[n] = self.request_translation(text, self._placeholders_of(occurrences[0]))
+            else:
+                translated[n] = translations[k]
+            self._cache_put(text, translated[n])
+        
+        if remaining:
+            self._line_time(texts, time.perf_counter() - start)
+        return translated
+    
+    def _line_time(self, texts, seconds):
+        """Час тексту або пакету текстів для списку найповільніших рядків"""
+        label = texts[0] if len(texts) == 1 else f"[пакет з {len(texts)}] {texts[0]}"
+        self.telemetry.line(label, seconds)
+    
+    def _batch_from_cache(self, batch):
+        """Переклади пакету з пам'яті перекладів. Повертає (переклади, індекси відсутніх)"""
+        translated = [None] * len(batch)
+        
+        # Тексти, що вже є в пам'яті перекладів, не відправляємо
+        remaining = []
+        for n, (text, _) in enumerate(batch):
+            cached = self._cache_get(text)
+            if cached is not None:
+                translated[n] = cached
+            else:
+                remaining.append(n)
+        return translated, remaining
+    
+    def translate_line(self, line, placeholders=None, max_retries=3):
+        """Переклад одного рядка: спочатку пам'ять перекладів, потім API"""
+        cached = self._cache_get(line)
+        if cached is not None:
+            return cached
+        
+        start = time.perf_counter()
+        result = self.request_translation(line, placeholders, max_retries)
+        self._line_time([line], time.perf_counter() - start)
+        self._cache_put(line, result)
+        return result
+    
+    def _count_tokens(self, text):
+        return count_tokens(text, self.tokenizer)
+    
+    def _prompt_tokens(self, messages):
+        """Токени всіх повідомлень запиту разом зі службовою розміткою"""
+        return sum(self._count_tokens(message["content"]) + MESSAGE_TOKEN_OVERHEAD for message in messages)
+    
+    def _text_limit(self, messages, reserve=0):
+        """
+        Скільки токенів тексту (останнє повідомлення) вміщується в запит: текст, решта
+        промпту (плюс reserve) і max_tokens відповіді разом не виходять за контекст і ліміт відповіді
+        """
+        overhead = self._prompt_tokens(messages) - self._count_tokens(messages[-1]["content"]) + reserve
+        by_context = (self.budget["context"] - overhead - REPLY_TOKEN_RESERVE) // (1 + REPLY_TOKEN_RATIO)
+        by_output = (self.budget["output"] - REPLY_TOKEN_RESERVE) // REPLY_TOKEN_RATIO
+        return max(16, min(by_context, by_output))
+    
+    def _reply_tokens(self, messages):
+        """max_tokens: очікуваний переклад із запасом, але в межах ліміту відповіді та залишку контексту"""
+        text_tokens = self._count_tokens(messages[-1]["content"])
+        room = self.budget["context"] - self._prompt_tokens(messages)
+        expected = text_tokens * REPLY_TOKEN_RATIO + REPLY_TOKEN_RESERVE
+        return max(16, min(self.budget["output"], room, expected))
+    
+    def _estimate_tokens(self, messages, max_tokens):
+        """Оцінка токенів запиту для лімітера (промпт + очікувана відповідь, не весь max_tokens)"""
+        text_tokens = self._count_tokens(messages[-1]["content"])
+        return self._prompt_tokens(messages) + min(max_tokens, text_tokens * 2)
+    
+    def _throttle(self, delay):
+        """Облік часу очікування на лімітер (саме очікування - у викликача)"""
+        if delay <= 0:
+            return 0
+        with self._stats_lock:
+            self.throttle_time += delay
+        self.telemetry.add_time("throttle", delay)
+        if delay >= 1:
+            self._status(f"🚦 Ліміт запитів, очікування {delay:.0f}с...")
+        return delay
+    
+    def _chat(self, messages, max_tokens, stream=False, kind="line"):
+        """
+        Запит chat completions до маршруту пулу; після збою бекенду або 429 запит одразу
+        передається іншому доступному маршруту. kind - тип запиту для телеметрії.
+        Для stream=True повертає RouteStream: викликач читає потік і викликає _stream_finished
+        """
+        tried = []
+        while True:
+            route = self.router.pick(tried)
+            try:
+                return self._route_chat(route, messages, max_tokens, stream, kind)
+            except Exception as e:
+                tried.append(route)
+                if not self.router.can_failover(e, tried):
+                    raise
+                self._status(f"🔀 {route.name}: {type(e).__name__}, запит передано іншому провайдеру")
+    
+    def _route_chat(self, route, messages, max_tokens, stream, kind):
+        """Запит до одного маршруту через його лімітер; заголовки відповіді оновлюють ліміти"""
+        delay = self._throttle(route.rate_limiter.reserve(self._estimate_tokens(messages, max_tokens)))
+        if delay:
+            time.sleep(delay)
+        
+        kwargs = {"stream": True} if stream else {}
+        start = time.perf_counter()
+        try:
+            raw = route.api.chat.completions.with_raw_response.create(
+                model=route.model,
+                messages=messages,
+                temperature=0.3,
+                max_tokens=max_tokens,
+                **kwargs
+            )
+        except Exception as e:
+            self._route_failed(route, kind, time.perf_counter() - start, e)
+            raise
+        return self._route_response(route, kind, start, raw, stream)
+    
+    def _route_failed(self, route, kind, seconds, error):
+        """Облік невдалого запиту: телеметрія, лімітер після 429, запобіжник маршруту"""
+        self.telemetry.request(kind, seconds, error=error, route=route.name)
+        if is_rate_limit_error(error):
+            route.rate_limiter.limit_exceeded(error)
+        if self.router.release(route, seconds, error) and len(self.router) > 1:
+            self._status(f"⛔ {route.name}: {CIRCUIT_FAILURES} збої поспіль, вимкнено на {CIRCUIT_COOLDOWN}с")
+    
+    def _route_response(self, route, kind, start, raw, stream):
+        """
+        Облік успішної відповіді маршруту, повертає розібрану відповідь. Потік ще не
+        прочитано, тож маршрут лишається зайнятим до _stream_finished
+        """
+        route.rate_limiter.update(raw.headers)
+        response = raw.parse()
+        if stream:
+            return RouteStream(response, route, start)
+        seconds = time.perf_counter() - start
+        self.router.release(route, seconds)
+        self.telemetry.request(kind, seconds, getattr(response, "usage", None), route=route.name)
+        return response
+    
+    def _stream_finished(self, stream, usage=None, error=None):
+        """Потік прочитано (або обірвано помилкою): звільнення маршруту і запис повної тривалості"""
+        seconds = time.perf_counter() - stream.start
+        if error is not None:
+            self._route_failed(stream.route, "stream", seconds, error)
+            return
+        self.router.release(stream.route, seconds)
+        self.telemetry.request("stream", seconds, usage, route=stream.route.name)
+    
+    async def _achat(self, messages, max_tokens, stream=False, kind="line"):
+        """Асинхронний _chat (клієнти маршрутів на пулі з'єднань AsyncBackend)"""
+        tried = []
+        while True:
+            route = self.router.pick(tried)
+            try:
+                return await self._aroute_chat(route, messages, max_tokens, stream, kind)
+            except Exception as e:
+                tried.append(route)
+                if not self.router.can_failover(e, tried):
+                    raise
+                self._status(f"🔀 {route.name}: {type(e).__name__}, запит передано іншому провайдеру")
+    
+    async def _aroute_chat(self, route, messages, max_tokens, stream, kind):
+        """Асинхронний _route_chat"""
+        delay = self._throttle(route.rate_limiter.reserve(self._estimate_tokens(messages, max_tokens)))
+        if delay:
+            await asyncio.sleep(delay)
+        
+        kwargs = {"stream": True} if stream else {}
+        start = time.perf_counter()
+        try:
+            raw = await route.async_client(self.backend).chat.completions.with_raw_response.create(
+                model=route.model,
+                messages=messages,
+                temperature=0.3,
+                max_tokens=max_tokens,
+                **kwargs
+            )
+        except Exception as e:
+            self._route_failed(route, kind, time.perf_counter() - start, e)
+            raise
+        return self._route_response(route, kind, start, raw, stream)
+    
+    def _line_request(self, line, placeholders):
+        """Повідомлення та max_tokens для перекладу одного рядка"""
+        # Формуємо інформацію про плейсхолдери для промпту
+        placeholder_info = ""
+        if placeholders:
+            placeholder_info = (
+                f"\n\nУВАГА! У тексті є спеціальні коди/плейсхолдери, які ОБОВ'ЯЗКОВО треба зберегти БЕЗ ЗМІН: "
+                f"{', '.join(set(placeholders))}"
+            )
+        
+        messages = [
+            {"role": "system", "content": build_system_prompt(placeholder_info, self._find_terms(line), self.prompt_prefix)},
+            {"role": "user", "content": f"Translate to Ukrainian: {line}"}
+        ]
+        return messages, self._reply_tokens(messages)
+    
+    def _find_terms(self, text):
+        """Терміни глосарію для кінця промпту (порожньо, якщо весь глосарій уже в префіксі)"""
+        if self.glossary_in_prefix:
+            return []
+        return self.glossary_index.find(text)
+    
+    def _check_response(self, line, result):
+        """Відповідь моделі -> переклад (оригінал, якщо модель відповіла не перекладом)"""
+        result = (result or "").strip()
+        
+        # Перевірка на погані відповіді (LLM відповідає замість перекладу)
+        bad_responses = [
+            "зрозуміло", "готовий до роботи", "надайте текст", "готовий перекладати",
+            "i understand", "ready to", "please provide", "i'm ready",
+            "вибачте", "не можу", "sorry", "i cannot", "i can't"
+        ]
+        result_lower = result.lower()
+        for bad in bad_responses:
+            if bad in result_lower and len(result) > len(line) * 2:
+                # LLM відповів системним повідомленням - повертаємо оригінал
+                return line
+        
+        # Якщо відповідь занадто коротка або порожня
+        if not result or len(result) < 2:
+            return line
+        
+        return result
+    
+    def _request_error(self, error, attempt, max_retries, rate_limits=0):
+        """
+        Що робити після помилки запиту: ("split", None) - розбити рядок на частини,
+        ("retry", секунди) - повторити після паузи, ("wait", None) - 429, повторити без
+        витрати спроби (rate_limits - скільки 429 уже було), ("fail", None) - здатися
+        """
+        error_str = str(error).lower()
+        
+        # Перевіряємо на помилки контекстного вікна
+        context_errors = [
+            "context_length_exceeded",
+            "context length",
+            "maximum context",
+            "token limit",
+            "too many tokens",
+            "max_tokens",
+            "context window",
+            "reduce the length",
+            "reduce your prompt"
+        ]
+        
+        if any(err in error_str for err in context_errors):
+            # Спробуємо розбити рядок на менші частини
+            self._status("⚠️ Рядок занадто довгий, розбиваємо...")
+            return "split", None
+        
+        # Rate limit - паузу вже виставив лімітер, наступний запит її дочекається
+        if is_rate_limit_error(error):
+            if rate_limits >= RATE_LIMIT_RETRIES:
+                return "fail", None
+            self._status(f"⏳ Rate limit, очікування {self.rate_limiter.wait_time():.0f}с...")
+            self.telemetry.retry()
+            return "wait", None
+        
+        # Для інших помилок - експоненційна затримка
+        if attempt < max_retries - 1:
+            wait_time = (2 ** attempt)  # 1, 2, 4 секунди
+            self._status(f"⚠️ Помилка, спроба {attempt + 2}/{max_retries} через {wait_time}с...")
+            self.telemetry.retry(wait_time)
+            return "retry", wait_time
+        
+        # Остання спроба не вдалася
+        return "fail", None
+    
+    def request_translation(self, line, placeholders=None, max_retries=3):
+        """Переклад одного рядка з retry логікою та обробкою помилок контексту"""
+        messages, max_tokens = self._line_request(line, placeholders)
+        # Якщо рядок не вміщується в бюджет моделі - розбиваємо на частини
+        line_tokens = self._count_tokens(line)
+        if line_tokens > self._text_limit(messages):
+            return self.translate_long_line(line, self._chunk_limit(line))
+        
+        attempt = rate_limits = 0
+        while attempt < max_retries:
+            try:
+                if self.stream and self.on_partial:
+                    result = self.request_streaming(line, messages, max_tokens)
+                else:
+                    response = self._chat(messages, max_tokens)
+                    result = response.choices[0].message.content
+                return self._check_response(line, result)
+            
+            except Exception as e:
+                action, wait_time = self._request_error(e, attempt, max_retries, rate_limits)
+                if action == "wait":
+                    rate_limits += 1
+                    continue
+                if action == "split":
+                    # Реальний контекст менший за бюджет - частини вдвічі менші за рядок
+                    return self.translate_long_line(line, max(16, line_tokens // 2))
+                if action == "fail":
+                    # Повертаємо оригінал з міткою
+                    return f"[!] {line}"
+                attempt += 1
+                if wait_time:
+                    time.sleep(wait_time)
+        
+        return f"[!] {line}"
+    
+    def request_streaming(self, line, messages, max_tokens):
+        """
+        Запит з stream=True: часткові переклади передаються в on_partial по мірі
+        надходження токенів. Повертає повний текст відповіді (без фільтрації).
+        """
+        try:
+            stream = self._chat(messages, max_tokens, stream=True)
+        except Exception as e:
+            # Провайдер не підтримує потоковий режим - далі працюємо без нього
+            if "stream" not in str(e).lower():
+                raise
+            self.stream = False
+            self._status("⚠️ Провайдер не підтримує потоковий вивід, вимкнено")
+            response = self._chat(messages, max_tokens)
+            return response.choices[0].message.content
+        
+        parts = []
+        last_update = 0.0
+        usage = None
+        error = None
+        try:
+            for chunk in stream.chunks:
+                # При зупинці неповну відповідь не використовуємо (і не кешуємо)
+                if not self.is_running:
+                    return line
+                usage = getattr(chunk, "usage", None) or usage
+                last_update = self._stream_delta(line, chunk, parts, last_update)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            close = getattr(stream.chunks, "close", None)
+            if close:
+                close()
+            self._stream_finished(stream, usage, error)
+        
+        return "".join(parts)
+    
+    def _stream_delta(self, line, chunk, parts, last_update):
+        """Додавання токенів з чанку потокової відповіді; повертає час останнього оновлення"""
+        if not chunk.choices:
+            return last_update
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            return last_update
+        parts.append(delta)
+        
+        # Оновлення не частіше ніж 20 разів на секунду
+        now = time.time()
+        if now - last_update >= 0.05:
+            self.on_partial(line, "".join(parts))
+            return now
+        return last_update
+    
+    def _chunk_limit(self, line):
+        """Найбільша частина довгого рядка в токенах, що вміщується в бюджет запиту"""
+        # Терміни глосарію всього рядка - з запасом для кожної частини
+        messages, _ = self._chunk_request("", "...", self._find_terms(line))
+        # Контекст - не більше токена на 2 символи
+        return self._text_limit(messages, reserve=CHUNK_CONTEXT_CHARS // 2)
+    
+    def _chunk_request(self, chunk, context="", terms=None):
+        """Повідомлення та max_tokens для частини довгого рядка (context - кінець попередньої)"""
+        if terms is None:
+            terms = self._find_terms(chunk)
+        system_prompt = f"{self.prompt_prefix}{CHUNK_TASK}{glossary_prompt(terms)}"
+        if context:
+            system_prompt += (
+                "\nThe text continues this passage (context only, do NOT translate or repeat it): "
+                f"{context}"
+            )
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": chunk}
+        ]
+        return messages, self._reply_tokens(messages)
+    
+    def _long_line_parts(self, line, chunk_tokens):
+        """Частини довгого рядка (по реченнях або словах) і контекст до кожної з них"""
+        chunks = split_into_chunks(line, chunk_tokens, measure=self._count_tokens)
+        contexts = [""] + [context_tail(chunk) for chunk in chunks[:-1]]
+        self._status(f"📝 Довгий рядок: {len(chunks)} частин...")
+        return chunks, contexts
+    
+    def _take_free_slots(self, count):
+        """Займає до count вільних слотів запитів без очікування, повертає скільки вдалося"""
+        taken = 0
+        while taken < count and self._request_slots.acquire(blocking=False):
+            taken += 1
+        return taken
+    
+    def translate_long_line(self, line, chunk_tokens):
+        """
+        Переклад довгого рядка частинами (розмір частини - у токенах). Частини йдуть
+        паралельно на вільних слотах запитів; якщо якась не перекладена - рядок з міткою [!]
+        """
+        chunks, contexts = self._long_line_parts(line, chunk_tokens)
+        
+        # Слот поточного запиту вже зайнятий - додаткові лише з вільних, ліміт не перевищується
+        extra_slots = self._take_free_slots(len(chunks) - 1)
+        try:
+            with ThreadPoolExecutor(max_workers=1 + extra_slots) as executor:
+                translated_chunks = list(executor.map(self._translate_chunk, chunks, contexts))
+        finally:
+            for _ in range(extra_slots):
+                self._request_slots.release()
+        
+        if None in translated_chunks:
+            return f"[!] {line}"
+        return " ".join(translated_chunks)
+    
+    def _translate_chunk(self, chunk, context="", max_retries=3):
+        """Переклад частини довгого рядка з повторами. None - не вдалося або зупинено"""
+        messages, max_tokens = self._chunk_request(chunk, context)
+        attempt = rate_limits = 0
+        while attempt < max_retries:
+            if not self.is_running:
+                return None
+            try:
+                response = self._chat(messages, max_tokens, kind="chunk")
+                return self._check_response(chunk, response.choices[0].message.content)
+            
+            except Exception as e:
+                action, wait_time = self._request_error(e, attempt, max_retries, rate_limits)
+                if action == "wait":
+                    rate_limits += 1
+                    continue
+                if action == "split":
+                    chunk_tokens = self._count_tokens(chunk)
+                    if chunk_tokens <= 16:
+                        return None
+                    result = self.translate_long_line(chunk, chunk_tokens // 2)
+                    return None if result.startswith("[!] ") else result
+                if action == "fail":
+                    return None
+                attempt += 1
+                if wait_time:
+                    time.sleep(wait_time)
+        
+        return None
+    
+    def _batch_request(self, texts, note=""):
+        """Повідомлення та max_tokens для нумерованого пакетного запиту (note - додаткове правило)"""
+        numbered = "\n".join(f"[{n}] {text}" for n, text in enumerate(texts, 1))
+        system_prompt = f"{self.prompt_prefix}{BATCH_TASK}{glossary_prompt(self._find_terms(numbered))}{note}"
+        
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": numbered}
+        ]
+        return messages, self._reply_tokens(messages)
+    
+    def translate_batch(self, texts, note=""):
+        """
+        Переклад кількох сегментів одним нумерованим запитом.
+        Повертає список перекладів або None, якщо відповідь не співпадає з запитом.
+        """
+        messages, max_tokens = self._batch_request(texts, note)
+        
+        for _ in range(RATE_LIMIT_RETRIES):
+            try:
+                response = self._chat(messages, max_tokens, kind="batch")
+                return parse_batch_response(response.choices[0].message.content, len(texts))
+            except Exception as e:
+                # Rate limit - лімітер притримає повторний запит (спроби на 429 не витрачаються)
+                if is_rate_limit_error(e):
+                    self.telemetry.retry()
+                    continue
+                # Інші помилки - відкат на переклад по одному рядку
+                return None
+        
+        return None
+    
+    def enforce_glossary(self, lines, segments):
+        """
+        Повторний переклад сегментів (glossary_segments), у яких немає обов'язкового перекладу
+        терміна глосарію: тексти ідуть цільовими пакетами з посиленим правилом, пам'ять
+        перекладів оминається. lines - перекладені рядки файлу; одиниці формату записуються
+        в них через кодування формату. Повертає {індекс: новий рядок} лише для рядків, що
+        тепер відповідають глосарію (їхній переклад замінює старий і в пам'яті перекладів).
+        """
+        return self._limited_run(self._enforce_glossary, lines, segments)
+    
+    def _enforce_glossary(self, lines, segments):
+        checker = GlossaryChecker(self.glossary)
+        requests = {}
+        for segment in segments:
+            _, original, _, unit = segment
+            if unit is None:
+                prefix, text, suffix, placeholders = extract_translatable_text(original)
+            else:
+                prefix, text, suffix, placeholders = "", original, "", extract_placeholders(original)
+            if text:
+                requests.setdefault(text, []).append((segment, prefix, suffix, placeholders))
+        
+        texts = list(requests)
+        batches = [texts[n:n + self.batch_max_segments] for n in range(0, len(texts), self.batch_max_segments)]
+        
+        def translate(batch):
+            if not self.is_running:
+                return [None] * len(batch)
+            translations = self.translate_batch(batch, note=GLOSSARY_RETRY_NOTE)
+            if translations is None:
+                translations = [self.request_translation(text, requests[text][0][3]) for text in batch]
+            return translations
+        
+        fixed = {}
+        edits = {}  # рядок -> [(початок, кінець, текст)] для одиниць формату
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for batch, translations in zip(batches, executor.map(translate, batches)):
+                for text, translated in zip(batch, translations):
+                    if not translated or translated.startswith("[!] "):
+                        continue
+                    compliant = True
+                    for (idx, original, _, unit), prefix, suffix, placeholders in requests[text]:
+                        value = prefix + restore_placeholders(text, translated, placeholders) + suffix
+                        if not checker.line_ok(original, value):
+                            compliant = False
+                        elif unit is None:
+                            fixed[idx] = value
+                        else:
+                            for line_idx, start, end, encoded in unit.replacements(value):
+                                edits.setdefault(line_idx, []).append((start, end, encoded))
+                    if compliant:
+                        self._cache_put(text, translated)
+        
+        # Заміни з кінця рядка, щоб позиції попередніх не зсувались
+        for idx, replacements in edits.items():
+            line = lines[idx]
+            for start, end, encoded in sorted(replacements, reverse=True):
+                line = line[:start] + encoded + line[end:]
+            fixed[idx] = line
+        return fixed
+    
+    # ---- Асинхронний режим (AsyncBackend): ті самі кроки без блокування потоків ----
+    
+    async def atranslate_batch_texts(self, batch):
+        """Асинхронний translate_batch_texts"""
+        start = time.perf_counter()
+        translated, remaining = self._batch_from_cache(batch)
+        
+        texts = [batch[n][0] for n in remaining]
+        translations = await self.atranslate_batch(texts) if len(remaining) > 1 else None
+        
+        for k, n in enumerate(remaining):
+            text, occurrences = batch[n]
+            if translations is None or not translations[k]:
+                translated[n] = await self.arequest_translation(text, self._placeholders_of(occurrences[0]))
+            else:
+                translated[n] = translations[k]
+            self._cache_put(text, translated[n])
+        
+        if remaining:
+            self._line_time(texts, time.perf_counter() - start)
+        return translated
+    
+    async def atranslate_line(self, line, placeholders=None, max_retries=3):
+        """Асинхронний translate_line"""
+        cached = self._cache_get(line)
+        if cached is not None:
+            return cached
+        
+        start = time.perf_counter()
+        result = await self.arequest_translation(line, placeholders, max_retries)
+        self._line_time([line], time.perf_counter() - start)
+        self._cache_put(line, result)
+        return result
+    
+    async def arequest_translation(self, line, placeholders=None, max_retries=3):
+        """Асинхронний request_translation"""
+        messages, max_tokens = self._line_request(line, placeholders)
+        line_tokens = self._count_tokens(line)
+        if line_tokens > self._text_limit(messages):
+            return await self.atranslate_long_line(line, self._chunk_limit(line))
+        attempt = rate_limits = 0
+        while attempt < max_retries:
+            try:
+                if self.stream and self.on_partial:
+                    result = await self.arequest_streaming(line, messages, max_tokens)
+                else:
+                    response = await self._achat(messages, max_tokens)
+                    result = response.choices[0].message.content
+                return self._check_response(line, result)
+            
+            except Exception as e:
+                action, wait_time = self._request_error(e, attempt, max_retries, rate_limits)
+                if action == "wait":
+                    rate_limits += 1
+                    continue
+                if action == "split":
+                    return await self.atranslate_long_line(line, max(16, line_tokens // 2))
+                if action == "fail":
+                    return f"[!] {line}"
+                attempt += 1
+                if wait_time:
+                    await asyncio.sleep(wait_time)
+        
+        return f"[!] {line}"
+    
+    async def arequest_streaming(self, line, messages, max_tokens):
+        """Асинхронний request_streaming"""
+        try:
+            stream = await self._achat(messages, max_tokens, stream=True)
+        except Exception as e:
+            if "stream" not in str(e).lower():
+                raise
+            self.stream = False
+            self._status("⚠️ Провайдер не підтримує потоковий вивід, вимкнено")
+            response = await self._achat(messages, max_tokens)
+            return response.choices[0].message.content
+        
+        parts = []
+        last_update = 0.0
+        usage = None
+        error = None
+        try:
+            async for chunk in stream.chunks:
+                if not self.is_running:
+                    return line
+                usage = getattr(chunk, "usage", None) or usage
+                last_update = self._stream_delta(line, chunk, parts, last_update)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            close = getattr(stream.chunks, "close", None)
+            if close:
+                await close()
+            self._stream_finished(stream, usage, error)
+        
+        return "".join(parts)
+    
+    async def atranslate_long_line(self, line, chunk_tokens):
+        """Асинхронний translate_long_line"""
+        chunks, contexts = self._long_line_parts(line, chunk_tokens)
+        
+        extra_slots = self._take_free_slots(len(chunks) - 1)
+        slots = asyncio.Semaphore(1 + extra_slots)
+        
+        async def translate_chunk(chunk, context):
+            async with slots:
+                return await self._atranslate_chunk(chunk, context)
+        
+        try:
+            translated_chunks = await asyncio.gather(
+                *(translate_chunk(chunk, context) for chunk, context in zip(chunks, contexts))
+            )
+        finally:
+            for _ in range(extra_slots):
+                self._request_slots.release()
+        
+        if None in translated_chunks:
+            return f"[!] {line}"
+        return " ".join(translated_chunks)
+    
+    async def _atranslate_chunk(self, chunk, context="", max_retries=3):
+        """Асинхронний _translate_chunk"""
+        messages, max_tokens = self._chunk_request(chunk, context)
+        attempt = rate_limits = 0
+        while attempt < max_retries:
+            if not self.is_running:
+                return None
+            try:
+                response = await self._achat(messages, max_tokens, kind="chunk")
+                return self._check_response(chunk, response.choices[0].message.content)
+            
+            except Exception as e:
+                action, wait_time = self._request_error(e, attempt, max_retries, rate_limits)
+                if action == "wait":
+                    rate_limits += 1
+                    continue
+                if action == "split":
+                    chunk_tokens = self._count_tokens(chunk)
+                    if chunk_tokens <= 16:
+                        return None
+                    result = await self.atranslate_long_line(chunk, chunk_tokens // 2)
+                    return None if result.startswith("[!] ") else result
+                if action == "fail":
+                    return None
+                attempt += 1
+                if wait_time:
+                    await asyncio.sleep(wait_time)
+        
+        return None
+    
+    async def atranslate_batch(self, texts):
+        """Асинхронний translate_batch"""
+        messages, max_tokens = self._batch_request(texts)
+        
+        for _ in range(RATE_LIMIT_RETRIES):
+            try:
+                response = await self._achat(messages, max_tokens, kind="batch")
+                return parse_batch_response(response.choices[0].message.content, len(texts))
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    self.telemetry.retry()
+                    continue
+                return None
+        
+        return None
+
+
+# ============ BATCH ПЕРЕКЛАД ============
+
+def translate_file_streaming(engine, reader, output_path, on_line=None, window=STREAM_WINDOW):
+    """
+    Потоковий переклад великого файлу: reader (LineReader) читає його частинами, готові
+    рядки одразу дописуються в тимчасовий файл, який після завершення атомарно замінює
+    output_path. Повертає (завершено, рядків з помилкою); при зупинці ціль не змінюється.
+    """
+    output = AtomicLineWriter(output_path)
+    failed = [0]
+    
+    def write(idx, line):
+        output.write(line)
+        if is_failed_line(line):
+            failed[0] += 1
+        if on_line:
+            on_line(idx, line)
+    
+    try:
+        done = engine.translate_stream(reader, write, parser=format_parser_for(reader.file_path),
+                                       window=window)
+    except BaseException:
+        output.abort()
+        raise
+    
+    if not engine.is_running or done < reader.count:
+        output.abort()
+        return False, failed[0]
+    output.commit()
+    return True, failed[0]
+
+
+def find_project_files(root, pattern="**/*"):
+    """Файли проєкту за glob-шаблоном (без уже перекладених *-ukr файлів)"""
+    root = Path(root)
+    files = []
+    for path in sorted(root.glob(pattern)):
+        if path.is_file() and not path.stem.endswith("-ukr"):
+            files.append(path)
+    return files
+
+
+def project_output_root(root):
+    """Папка для перекладу проєкту: дзеркальне дерево з суфіксом -ukr (game -> game-ukr)"""
+    root = Path(root)
+    return root.parent / f"{root.name}-ukr"
+
+
+class ProjectTranslator:
+    """Черга файлів проєкту, що перекладаються одним рушієм зі спільним лімітом запитів і кешем"""
+    
+    def __init__(self, engine, root, pattern="**/*", output_root=None, parallel_files=4,
+                 on_file_progress=None, on_file_done=None):
+        self.engine = engine
+        self.root = Path(root)
+        self.output_root = Path(output_root) if output_root else project_output_root(self.root)
+        self.parallel_files = max(1, parallel_files)
+        self.on_file_progress = on_file_progress
+        self.on_file_done = on_file_done
+        
+        # Шаблон не повинен підхоплювати вже готовий переклад, якщо він всередині проєкту
+        self.files = [
+            path for path in find_project_files(self.root, pattern)
+            if self.output_root not in path.parents
+        ]
+        self.results = {}  # шлях -> (статус, рядків з помилкою)
+    
+    def output_path(self, file_path):
+        """Шлях перекладу у дзеркальному дереві з тим самим іменуванням, що й у GUI"""
+        relative = Path(file_path).relative_to(self.root)
+        return self.output_root / relative.parent / translated_file_name(file_path)
+    
+    def run(self):
+        """Переклад усіх файлів. Повертає {шлях: (статус, рядків з помилкою)}"""
+        jobs = queue.Queue()
+        for file_idx, file_path in enumerate(self.files):
+            jobs.put((file_idx, file_path))
+        
+        workers = [
+            threading.Thread(target=self._worker, args=(jobs,), daemon=True)
+            for _ in range(min(self.parallel_files, len(self.files)))
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        
+        return self.results
+    
+    def _worker(self, jobs):
+        """Робочий потік: бере файли з черги, поки вона не порожня"""
+        while self.engine.is_running:
+            try:
+                file_idx, file_path = jobs.get_nowait()
+            except queue.Empty:
+                return
+            self.results[file_path] = self._translate_file(file_idx, file_path)
+            if self.on_file_done:
+                self.on_file_done(file_idx, *self.results[file_path])
+    
+    def _translate_file(self, file_idx, file_path):
+        """Переклад одного файлу проєкту. Повертає (статус, рядків з помилкою)"""
+        if is_large_file(file_path):
+            return self._translate_large_file(file_idx, file_path)
+        try:
+            lines = read_lines(file_path)
+        except (OSError, UnicodeDecodeError):
+            return "error", 0
+        
+        total_lines = len(lines)
+        
+        def on_line(idx, translated_line):
+            if self.on_file_progress:
+                self.on_file_progress(file_idx, idx + 1, total_lines)
+        
+        translated_lines = self.engine.translate_lines(lines, on_line, parser=format_parser_for(file_path))
+        if len(translated_lines) < total_lines:
+            return "stopped", 0
+        
+        output_path = self.output_path(file_path)
+        try:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            save_translation(output_path, translated_lines)
+        except OSError:
+            return "error", 0
+        
+        failed = sum(1 for line in translated_lines if is_failed_line(line))
+        return ("failed" if failed else "done"), failed
+    
+    def _translate_large_file(self, file_idx, file_path):
+        """Потоковий переклад великого файлу проєкту (кількість рядків - оцінка)"""
+        output_path = self.output_path(file_path)
+        try:
+            reader = LineReader(file_path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            def on_line(idx, translated_line):
+                if self.on_file_progress:
+                    self.on_file_progress(file_idx, idx + 1, reader.estimated_total)
+            
+            completed, failed = translate_file_streaming(self.engine, reader, output_path, on_line)
+        except (OSError, UnicodeDecodeError):
+            return "error", 0
+        
+        if not completed:
+            return "stopped", 0
+        return ("failed" if failed else "done"), failed